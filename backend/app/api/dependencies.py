@@ -1,53 +1,119 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
-import jwt
-from jwt.exceptions import PyJWTError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Generator, Optional
 
 from app.core.config import settings
-from app.db.database import get_db
+from app.core.security import decode_token
+from app.db.database import SessionLocal, get_async_db, get_db
 from app.models.user import User
 from app.schemas.user import TokenData
+from app.services.user_cache import user_cache
 
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/auth/login"
 )
+optional_oauth2_scheme = OAuth2PasswordBearer(
+    tokenUrl=f"{settings.API_V1_STR}/auth/login", auto_error=False
+)
 
-def get_current_user(
-    db: Session = Depends(get_db),
-    token: str = Depends(oauth2_scheme)
-) -> User:
-    """
-    Get the current user based on the provided JWT token
-    """
-    credentials_exception = HTTPException(
+def credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def token_subject(token: Optional[str]) -> str:
+    """
+    Verify a JWT access token and return the id of the user it was issued to
+    """
+    if not token:
+        raise credentials_exception()
     
-    try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        user_id: Optional[str] = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-        token_data = TokenData(sub=user_id)
-    except PyJWTError:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.id == token_data.sub).first()
+    payload = decode_token(token, settings.SECRET_KEY)
+    if payload is None:
+        raise credentials_exception()
+    user_id: Optional[str] = payload.get("sub")
+    if user_id is None:
+        raise credentials_exception()
+    return TokenData(sub=user_id).sub
+
+def check_active(user: Optional[User]) -> User:
+    """
+    Reject a missing or inactive user; cache an active one
+    """
     if user is None:
-        raise credentials_exception
+        raise credentials_exception()
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Inactive user"
         )
+    user_cache.put(user)
     return user
 
+def authenticate_token(db: Session, token: Optional[str]) -> User:
+    """
+    Resolve a JWT access token to an active user
+    """
+    user_id = token_subject(token)
+    
+    # Only active users are cached, so a hit needs no further checks
+    user = user_cache.get(db, user_id)
+    if user is not None:
+        return user
+    
+    return check_active(db.query(User).filter(User.id == user_id).first())
+
+async def authenticate_token_async(db: AsyncSession, token: Optional[str]) -> User:
+    """
+    Resolve a JWT access token to an active user attached to an async session
+    """
+    user_id = token_subject(token)
+    
+    # Attaching a cached user does no I/O, so the sync session underneath
+    # the async one can take it
+    user = user_cache.get(db.sync_session, user_id)
+    if user is not None:
+        return user
+    
+    return check_active(await db.get(User, user_id))
+
+def get_current_user(
+    db: Session = Depends(get_db),
+    token: str = Depends(oauth2_scheme)
+) -> User:
+    """
+    Get the current user based on the provided JWT token
+    """
+    return authenticate_token(db, token)
+
+async def get_current_user_async(
+    db: AsyncSession = Depends(get_async_db),
+    token: str = Depends(oauth2_scheme)
+) -> User:
+    """
+    get_current_user for handlers on the async session (get_async_db)
+    """
+    return await authenticate_token_async(db, token)
+
+def get_stream_user(
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    access_token: Optional[str] = Query(None),
+) -> User:
+    """
+    Authenticate a long-lived stream once, when it opens. EventSource cannot
+    set headers, so the token may also be passed as ``?access_token=``. The
+    session is closed here rather than held for the life of the connection.
+    """
+    db = SessionLocal()
+    try:
+        return authenticate_token(db, token or access_token)
+    finally:
+        db.close()
+
 def get_current_active_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
@@ -4,14 +4,14 @@ from fastapi import APIRouter, Depends, HTTPException, status, Response, Request
 from fastapi.responses import RedirectResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-import requests
+from starlette.concurrency import run_in_threadpool
+import httpx
 import json
+import logging
 
 from app.core.config import settings
 from app.core.security import (
     create_access_token,
-    verify_password,
-    get_password_hash,
     create_token_pair,
     verify_refresh_token,
 )
@@ -19,30 +19,62 @@ from app.db.database import get_db
 from app.models.user import User
 from app.schemas.user import UserCreate, Token, UserResponse, TokenPair, RefreshToken
 from app.api.dependencies import get_current_user
-from app.services.file_storage import file_storage_service
+from app.services.http_client import http_client
+from app.services.password_hasher import PasswordHasherBusy, password_hasher
+from app.services.profile_images import is_remote_image, profile_image_jobs
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+def _hashing_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-ins right now. Please try again in a moment.",
+        headers={"Retry-After": "2"},
+    )
 
 
 @router.post("/login", response_model=TokenPair)
-def login(
+async def login(
     response: Response,
     db: Session = Depends(get_db),
     form_data: OAuth2PasswordRequestForm = Depends(),
 ) -> Any:
     """
-    Standard username/password login
+    Standard username/password login. bcrypt runs on the password hasher's
+    own threads and the queries in the threadpool, so neither blocks the
+    event loop.
     """
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = await run_in_threadpool(
+        lambda: db.query(User).filter(User.email == form_data.username).first()
+    )
+    valid, new_hash = False, None
+    if user:
+        try:
+            valid, new_hash = await password_hasher.verify_and_update(
+                form_data.password, user.hashed_password
+            )
+        except PasswordHasherBusy:
+            raise _hashing_busy()
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Read before the commit below expires it: a reload would query the
+    # database on the event loop
+    user_id = user.id
+
+    # The stored hash predates the current BCRYPT_ROUNDS
+    if new_hash:
+        user.hashed_password = new_hash
+        await run_in_threadpool(db.commit)
+
     # Create both access and refresh tokens
-    access_token, refresh_token = create_token_pair(user.id)
+    access_token, refresh_token = create_token_pair(user_id)
 
     # Set cookies for easier frontend handling
     response.set_cookie(
@@ -71,42 +103,57 @@ def login(
 
 
 @router.post("/signup", response_model=TokenPair)
-def create_user(
+async def create_user(
     response: Response, user_in: UserCreate, db: Session = Depends(get_db)
 ) -> Any:
     """
     Create new user with email and password
     """
-    # Check if user exists
-    user = db.query(User).filter(User.email == user_in.email).first()
-    if user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
-        )
 
-    if user_in.username:
-        username_exists = (
-            db.query(User).filter(User.username == user_in.username).first()
-        )
-        if username_exists:
+    def check_available() -> None:
+        # Check if user exists
+        user = db.query(User).filter(User.email == user_in.email).first()
+        if user:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST, detail="Username already taken"
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already registered",
             )
 
+        if user_in.username:
+            username_exists = (
+                db.query(User).filter(User.username == user_in.username).first()
+            )
+            if username_exists:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Username already taken",
+                )
+
+    await run_in_threadpool(check_available)
+
+    try:
+        hashed_password = await password_hasher.hash(user_in.password)
+    except PasswordHasherBusy:
+        raise _hashing_busy()
+
     # Create new user
     user = User(
         email=user_in.email,
         username=user_in.username or user_in.email.split("@")[0],
-        hashed_password=get_password_hash(user_in.password),
+        hashed_password=hashed_password,
         first_name=user_in.first_name,
         last_name=user_in.last_name,
         profile_picture=user_in.profile_picture,
         is_oauth_account=False,
         is_teacher=user_in.is_teacher,  # Add is_teacher field
     )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
+
+    def save() -> None:
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+
+    await run_in_threadpool(save)
 
     # Create both access and refresh tokens
     access_token, refresh_token = create_token_pair(user.id)
@@ -227,7 +274,6 @@ async def google_callback(
         )
 
     # Exchange code for token
-    token_url = "https://oauth2.googleapis.com/token"
     data = {
         "code": code,
         "client_id": settings.GOOGLE_CLIENT_ID,
@@ -236,8 +282,15 @@ async def google_callback(
         "grant_type": "authorization_code",
     }
 
-    token_response = requests.post(token_url, data=data)
-    if not token_response.ok:
+    try:
+        token_response = await http_client.post(settings.GOOGLE_TOKEN_URL, data=data)
+    except httpx.HTTPError as e:
+        logger.warning(f"Google token exchange failed: {e!r}")
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Could not reach Google",
+        )
+    if not token_response.is_success:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Failed to retrieve Google token",
@@ -247,11 +300,19 @@ async def google_callback(
     google_token = token_data.get("access_token")
 
     # Get user info
-    userinfo_url = "https://www.googleapis.com/oauth2/v3/userinfo"
     headers = {"Authorization": f"Bearer {google_token}"}
-    userinfo_response = requests.get(userinfo_url, headers=headers)
+    try:
+        userinfo_response = await http_client.get(
+            settings.GOOGLE_USERINFO_URL, headers=headers
+        )
+    except httpx.HTTPError as e:
+        logger.warning(f"Google userinfo request failed: {e!r}")
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Could not reach Google",
+        )
 
-    if not userinfo_response.ok:
+    if not userinfo_response.is_success:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Failed to retrieve Google user info",
@@ -300,28 +361,14 @@ async def google_callback(
         db.commit()
         db.refresh(user)
 
-    # Cache the profile picture if it exists
-    if remote_profile_picture:
-        try:
-            # Download and cache the profile picture
-            cached_path = file_storage_service.download_profile_image(
-                remote_profile_picture, user.id
-            )
-
-            if cached_path:
-                # Update user with local cached profile picture URL
-                base_url = f"{request.url.scheme}://{request.url.netloc}"
-                local_profile_url = f"{base_url}/static/{cached_path}"
-
-                # Only update if different to avoid unnecessary DB updates
-                if local_profile_url != user.profile_picture:
-                    user.profile_picture = local_profile_url
-                    db.commit()
-                    db.refresh(user)
-        except Exception as e:
-            # Log the error but continue - this is not a critical error
-            print(f"Error caching profile picture: {str(e)}")
-            # If this fails, we'll still have the remote URL stored
+    # Cache the profile picture in the background; until then the user
+    # keeps the remote URL
+    if is_remote_image(user.profile_picture):
+        profile_image_jobs.schedule(
+            user.id,
+            user.profile_picture,
+            f"{request.url.scheme}://{request.url.netloc}",
+        )
 
     # Create token pair
     access_token, refresh_token = create_token_pair(user.id)
@@ -357,35 +404,20 @@ async def google_callback(
 
 
 @router.get("/me", response_model=UserResponse)
-def get_me(request: Request, current_user: User = Depends(get_current_user)) -> Any:
+async def get_me(
+    request: Request, current_user: User = Depends(get_current_user)
+) -> Any:
     """
     Get current user information
     """
-    # Check if we need to cache the profile picture
-    if (
-        current_user.profile_picture
-        and "googleusercontent.com" in current_user.profile_picture
-    ):
-        try:
-            # Try to download and cache the profile image if it's a Google URL
-            cached_path = file_storage_service.download_profile_image(
-                current_user.profile_picture, current_user.id
-            )
-
-            if cached_path:
-                # Update user with local cached profile picture URL
-                base_url = f"{request.url.scheme}://{request.url.netloc}"
-                local_profile_url = f"{base_url}/static/{cached_path}"
-
-                # Only update if different to avoid unnecessary DB updates
-                if local_profile_url != current_user.profile_picture:
-                    db = next(get_db())
-                    current_user.profile_picture = local_profile_url
-                    db.commit()
-                    db.refresh(current_user)
-        except Exception as e:
-            # Log error but continue
-            print(f"Error caching profile picture in /me endpoint: {str(e)}")
+    # A Google profile picture not cached yet (e.g. the job was lost to a
+    # restart): queue it, without waiting for the download
+    if is_remote_image(current_user.profile_picture):
+        profile_image_jobs.schedule(
+            current_user.id,
+            current_user.profile_picture,
+            f"{request.url.scheme}://{request.url.netloc}",
+        )
 
     return current_user
 
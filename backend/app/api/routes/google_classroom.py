@@ -1,14 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Response
 from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 import json
 import logging
 
 from app.core.config import settings
-from app.db.database import get_db
+from app.db.database import get_async_db
 from app.models.skill_tree import SkillTree
 from app.schemas.skill_tree import SkillTreeClassroomLink, SkillTreeResponse
-from app.api.dependencies import get_current_user
+from app.api.dependencies import get_current_user_async
 from app.models.user import User
 from app.services.google_classroom import GoogleClassroomService
 
@@ -19,8 +21,8 @@ logger = logging.getLogger(__name__)
 @router.get("/list")
 async def list_google_classrooms(
     response: Response,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     List all Google Classrooms accessible to the authenticated user
@@ -31,14 +33,12 @@ async def list_google_classrooms(
     response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
 
     # Check if user has google_token attribute and it's not None
-    has_token = False
+    google_token = None
     try:
-        has_token = (
-            hasattr(current_user, "google_token")
-            and current_user.google_token is not None
-        )
+        google_token = await _google_token(db, current_user)
     except:
         logger.warning("Failed to check google_token attribute on user")
+    has_token = google_token is not None
 
     if not has_token:
         # Use mock data since user doesn't have a Google token
@@ -49,11 +49,14 @@ async def list_google_classrooms(
 
     try:
         # Parse the stored token
-        token = json.loads(current_user.google_token)
+        token = json.loads(google_token)
         logger.info(f"Attempting to list classrooms for user {current_user.id}")
 
-        # Use the Google Classroom service to list classrooms
-        classrooms = GoogleClassroomService.list_classrooms(token)
+        # Use the Google Classroom service to list classrooms (the Google
+        # client blocks, so it runs in the threadpool)
+        classrooms = await run_in_threadpool(
+            GoogleClassroomService.list_classrooms, token
+        )
         logger.info(f"Successfully retrieved {len(classrooms)} classrooms")
         return classrooms
     except Exception as e:
@@ -67,14 +70,15 @@ async def list_google_classrooms(
 @router.get("/{classroom_id}")
 async def get_google_classroom(
     classroom_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Get details for a specific Google Classroom
     """
     # Get the user's Google OAuth token from the database
-    if not current_user.google_token:
+    google_token = await _google_token(db, current_user)
+    if not google_token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Google account not connected. Please sign in with Google.",
@@ -82,9 +86,11 @@ async def get_google_classroom(
 
     try:
         # Parse the stored token
-        token = json.loads(current_user.google_token)
+        token = json.loads(google_token)
         # Use the Google Classroom service to get classroom details
-        classroom = GoogleClassroomService.get_classroom(token, classroom_id)
+        classroom = await run_in_threadpool(
+            GoogleClassroomService.get_classroom, token, classroom_id
+        )
 
         if not classroom:
             raise HTTPException(
@@ -103,16 +109,14 @@ async def get_google_classroom(
 @router.post("/link")
 async def link_skill_tree_to_classroom(
     link_data: SkillTreeClassroomLink,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Link a skill tree to a Google Classroom
     """
     # Get the skill tree
-    skill_tree = (
-        db.query(SkillTree).filter(SkillTree.id == link_data.skill_tree_id).first()
-    )
+    skill_tree = await db.get(SkillTree, link_data.skill_tree_id)
     if not skill_tree:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -120,7 +124,8 @@ async def link_skill_tree_to_classroom(
         )
 
     # Get the user's Google OAuth token from the database
-    if not current_user.google_token:
+    google_token = await _google_token(db, current_user)
+    if not google_token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Google account not connected. Please sign in with Google.",
@@ -128,9 +133,11 @@ async def link_skill_tree_to_classroom(
 
     try:
         # Parse the stored token
-        token = json.loads(current_user.google_token)
+        token = json.loads(google_token)
         # Verify the classroom exists
-        classroom = GoogleClassroomService.get_classroom(token, link_data.classroom_id)
+        classroom = await run_in_threadpool(
+            GoogleClassroomService.get_classroom, token, link_data.classroom_id
+        )
 
         if not classroom:
             raise HTTPException(
@@ -143,8 +150,8 @@ async def link_skill_tree_to_classroom(
         skill_tree.classroom_name = classroom["name"]
         skill_tree.classroom_url = classroom["url"]
 
-        db.commit()
-        db.refresh(skill_tree)
+        await db.commit()
+        await db.refresh(skill_tree)
 
         return {
             "message": "Skill tree linked to classroom successfully",
@@ -162,13 +169,13 @@ async def link_skill_tree_to_classroom(
 @router.get("/skill-tree/{skill_tree_id}")
 async def get_classroom_for_skill_tree(
     skill_tree_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Get the Google Classroom associated with a skill tree
     """
-    skill_tree = db.query(SkillTree).filter(SkillTree.id == skill_tree_id).first()
+    skill_tree = await db.get(SkillTree, skill_tree_id)
     if not skill_tree:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -193,13 +200,13 @@ async def get_classroom_for_skill_tree(
 @router.delete("/skill-tree/{skill_tree_id}/link")
 async def unlink_skill_tree_from_classroom(
     skill_tree_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Remove the Google Classroom association from a skill tree
     """
-    skill_tree = db.query(SkillTree).filter(SkillTree.id == skill_tree_id).first()
+    skill_tree = await db.get(SkillTree, skill_tree_id)
     if not skill_tree:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -218,7 +225,7 @@ async def unlink_skill_tree_from_classroom(
     skill_tree.classroom_name = None
     skill_tree.classroom_url = None
 
-    db.commit()
+    await db.commit()
 
     return {
         "message": f"Skill tree unlinked from classroom successfully",
@@ -228,7 +235,10 @@ async def unlink_skill_tree_from_classroom(
 
 
 @router.get("/auth")
-async def get_google_classroom_auth_url(current_user: User = Depends(get_current_user)):
+async def get_google_classroom_auth_url(
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     Get Google Classroom OAuth URL for authorization
     """
@@ -239,5 +249,19 @@ async def get_google_classroom_auth_url(current_user: User = Depends(get_current
     # Return a message to the user about using their existing credentials
     return {
         "message": "Your existing Google account credentials will be used to access Google Classroom.",
-        "status": "authenticated" if current_user.google_token else "not_authenticated",
+        "status": (
+            "authenticated"
+            if await _google_token(db, current_user)
+            else "not_authenticated"
+        ),
     }
+
+
+async def _google_token(db: AsyncSession, user: User) -> Optional[str]:
+    """
+    The user's stored Google token. Users from the user cache come without
+    it, so it is loaded here, asynchronously, when needed.
+    """
+    if "google_token" not in inspect(user).unloaded:
+        return user.google_token
+    return await db.scalar(select(User.google_token).where(User.id == user.id))
@@ -1,18 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from app.api.dependencies import get_current_user, get_db
+import asyncio
+import json
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, load_only
+from starlette.concurrency import run_in_threadpool
+from typing import List, Literal, Optional
+from app.api.dependencies import get_current_user, get_db, get_stream_user
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.db.pagination import InvalidCursor, keyset_page
 from app.models.user import User
-from app.models.problem import Problem, TestCase, Submission
+from app.models.problem import Problem, TestCase, Submission, RejudgeBatch
+from app.services.block_compiler import BlockCompileError, block_compiler
+from app.services.problem_refs import problem_refs
+from app.services.problem_stats import problem_stats
+from app.services.rejudge import rejudge_service
+from app.services.submission_events import submission_events
+from app.services.submission_queue import submission_queue
+from app.services.test_case_transfer import (
+    TestCaseImportError,
+    next_position,
+    test_case_transfer,
+)
+from app.services.test_data_store import test_data_store
+from app.services.verdict_cache import verdict_cache
 from app.schemas.problem import (
+    LeaderboardEntry,
     ProblemCreate, 
+    ProblemPage,
     ProblemResponse, 
+    ProblemStatsResponse,
+    ProblemSummary,
     ProblemUpdate,
+    RejudgeBatchResponse,
+    RejudgeCreate,
     TestCaseCreate,
     TestCaseResponse,
     TestCaseUpdate,
     SubmissionCreate,
-    SubmissionResponse
+    SubmissionPage,
+    SubmissionResponse,
+    SubmissionSummary
 )
 
 router = APIRouter(
@@ -21,6 +50,42 @@ router = APIRouter(
 )
 
 
+# Problem fields that change verdicts without changing the test cases
+JUDGE_SETTINGS = {"time_limit", "memory_limit", "judge_mode", "compare_mode", "float_tolerance"}
+
+# Columns loaded for the problem browser
+PROBLEM_SUMMARY_COLUMNS = (
+    Problem.id,
+    Problem.problem_ref_id,
+    Problem.title,
+    Problem.difficulty,
+    Problem.created_at,
+)
+
+# Columns loaded for the submission list's summary view
+SUBMISSION_SUMMARY_COLUMNS = (
+    Submission.id,
+    Submission.problem_id,
+    Submission.user_id,
+    Submission.language,
+    Submission.status,
+    Submission.score,
+    Submission.execution_time,
+    Submission.memory_used,
+    Submission.from_verdict_cache,
+    Submission.created_at,
+)
+
+
+def bump_test_set_version(db: Session, problem_id: str) -> None:
+    """Invalidate cached test sets and verdicts for a problem; commits with the caller's change."""
+    db.query(Problem).filter(Problem.id == problem_id).update(
+        {Problem.test_set_version: Problem.test_set_version + 1},
+        synchronize_session=False,
+    )
+    verdict_cache.invalidate(db, problem_id)
+
+
 @router.post("/", response_model=ProblemResponse, status_code=status.HTTP_201_CREATED)
 def create_problem(
     problem: ProblemCreate,
@@ -36,11 +101,18 @@ def create_problem(
         
     # Create a problem reference ID if not provided
     if not problem.problem_ref_id:
-        problem.problem_ref_id = f"P{Problem.count() + 1}"
+        problem.problem_ref_id = problem_refs.allocate(db)
         
     db_problem = Problem(**problem.dict(), created_by=current_user.id)
     db.add(db_problem)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Problem reference ID {problem.problem_ref_id} is already in use"
+        )
     db.refresh(db_problem)
     return db_problem
 
@@ -52,11 +124,67 @@ def get_problems(
     db: Session = Depends(get_db),
     current_user: Optional[User] = Depends(get_current_user)
 ):
-    """Get all problems."""
+    """Get all problems with their full statements (the browser uses /summaries)."""
     problems = db.query(Problem).offset(skip).limit(limit).all()
     return problems
 
 
+@router.get("/summaries", response_model=ProblemPage)
+def get_problem_summaries(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    difficulty: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_user)
+):
+    """
+    Browse problems, newest first, one page at a time: id, reference ID,
+    title and difficulty only. Pass the returned ``next_cursor`` as
+    ``cursor`` for the next page; full problems come from ``GET /{problem_id}``.
+    """
+    query = db.query(Problem).options(load_only(*PROBLEM_SUMMARY_COLUMNS))
+    if difficulty:
+        query = query.filter(Problem.difficulty == difficulty)
+    
+    try:
+        problems, next_cursor = keyset_page(
+            query, Problem.created_at, Problem.id, cursor, limit
+        )
+    except InvalidCursor as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return ProblemPage(
+        items=[ProblemSummary.model_validate(problem) for problem in problems],
+        next_cursor=next_cursor,
+    )
+
+
+@router.get("/by-ref", response_model=List[ProblemResponse])
+def get_problems_by_ref(
+    ref: List[str] = Query(..., max_length=200),
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_user)
+):
+    """
+    Resolve many problem reference IDs (e.g. every problem step of a skill
+    tree) in one query. Unknown IDs are left out.
+    """
+    return problem_refs.resolve(db, ref)
+
+
+@router.get("/stats", response_model=List[ProblemStatsResponse])
+def get_problems_stats(
+    problem_id: List[str] = Query(..., max_length=200),
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_user)
+):
+    """Submission statistics of several problems (e.g. a page of the problem list)."""
+    return problem_stats.summaries(db, problem_id)
+
+
 @router.get("/{problem_id}", response_model=ProblemResponse)
 def get_problem(
     problem_id: str,
@@ -95,8 +223,14 @@ def update_problem(
         )
     
     # Update problem fields
-    for key, value in problem.dict(exclude_unset=True).items():
+    changes = problem.dict(exclude_unset=True)
+    judge_settings_changed = any(
+        getattr(db_problem, key) != changes[key] for key in JUDGE_SETTINGS & changes.keys()
+    )
+    for key, value in changes.items():
         setattr(db_problem, key, value)
+    if judge_settings_changed:
+        bump_test_set_version(db, problem_id)
     
     db.commit()
     db.refresh(db_problem)
@@ -150,8 +284,12 @@ def create_test_case(
             detail="Problem not found"
         )
     
-    db_test_case = TestCase(**test_case.dict())
+    db_test_case = TestCase(
+        **test_data_store.offload(test_case.dict()),
+        position=next_position(db, test_case.problem_id),
+    )
     db.add(db_test_case)
+    bump_test_set_version(db, test_case.problem_id)
     db.commit()
     db.refresh(db_test_case)
     return db_test_case
@@ -170,16 +308,130 @@ def get_test_cases(
         test_cases = db.query(TestCase).filter(
             TestCase.problem_id == problem_id,
             TestCase.is_sample == True
-        ).all()
+        ).order_by(TestCase.position, TestCase.created_at, TestCase.id).all()
     else:
         # Teachers/admins can see all test cases
         test_cases = db.query(TestCase).filter(
             TestCase.problem_id == problem_id
-        ).all()
+        ).order_by(TestCase.position, TestCase.created_at, TestCase.id).all()
     
     return test_cases
 
 
+@router.post("/{problem_id}/test-cases/import")
+def import_test_cases(
+    problem_id: str,
+    file: UploadFile = File(...),
+    file_format: Optional[Literal["ndjson", "zip"]] = Query(None, alias="format"),
+    replace: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Import test cases from an NDJSON or zip upload in one transaction
+    (teachers/admin only). The format defaults to the file's extension;
+    ``replace`` deletes the problem's existing test cases first.
+    """
+    if not current_user.is_teacher and not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to create test cases"
+        )
+    
+    problem = db.query(Problem).filter(Problem.id == problem_id).first()
+    if not problem:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Problem not found"
+        )
+    
+    if file_format is None:
+        file_format = "zip" if (file.filename or "").lower().endswith(".zip") else "ndjson"
+    
+    try:
+        imported, deleted = test_case_transfer.import_cases(
+            db, problem_id, file.file, file_format, replace=replace
+        )
+    except TestCaseImportError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": e.message, "location": e.location}
+        )
+    
+    bump_test_set_version(db, problem_id)
+    db.commit()
+    return {"imported": imported, "deleted": deleted}
+
+
+@router.get("/{problem_id}/test-cases/export")
+def export_test_cases(
+    problem_id: str,
+    file_format: Literal["ndjson", "zip"] = Query("ndjson", alias="format"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Download all of a problem's test cases as NDJSON or zip (teachers/admin only)."""
+    if not current_user.is_teacher and not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to export test cases"
+        )
+    
+    problem = db.query(Problem).filter(Problem.id == problem_id).first()
+    if not problem:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Problem not found"
+        )
+    
+    if file_format == "zip":
+        content, media_type = test_case_transfer.export_zip(problem_id), "application/zip"
+    else:
+        content, media_type = test_case_transfer.export_ndjson(problem_id), "application/x-ndjson"
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="test-cases-{problem_id}.{file_format}"'
+        },
+    )
+
+
+@router.put("/test-cases/{test_case_id}", response_model=TestCaseResponse)
+def update_test_case(
+    test_case_id: str,
+    test_case: TestCaseUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Update a test case (teachers/admin only)."""
+    if not current_user.is_teacher and not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to update test cases"
+        )
+    
+    db_test_case = db.query(TestCase).filter(TestCase.id == test_case_id).first()
+    if not db_test_case:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Test case not found"
+        )
+    
+    values = test_case.dict(exclude_unset=True)
+    values.setdefault("is_sample", db_test_case.is_sample)
+    if values["is_sample"]:
+        # Students see samples, so their data is kept in the row
+        test_data_store.inline(db_test_case)
+    for key, value in test_data_store.offload(values).items():
+        setattr(db_test_case, key, value)
+    bump_test_set_version(db, db_test_case.problem_id)
+    db.commit()
+    db.refresh(db_test_case)
+    return db_test_case
+
+
 @router.delete("/test-cases/{test_case_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_test_case(
     test_case_id: str,
@@ -201,6 +453,7 @@ def delete_test_case(
         )
     
     db.delete(db_test_case)
+    bump_test_set_version(db, db_test_case.problem_id)
     db.commit()
     return None
 
@@ -221,22 +474,120 @@ def create_submission(
             detail="Problem not found"
         )
     
+    # Block-editor submissions are compiled to Python on the server
+    if submission.block_structure and (
+        submission.language.lower() == "blocks" or not submission.code.strip()
+    ):
+        try:
+            program = block_compiler.compile(submission.block_structure)
+        except BlockCompileError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={"message": e.message, "block_id": e.block_id}
+            )
+        submission.code = program.source
+        submission.language = "blocks"
+    
     # Create the submission object
     db_submission = Submission(
         **submission.dict(),
         user_id=current_user.id,
         status="pending"
     )
+    
+    # Identical code already judged against the same tests: reuse the verdict
+    cached = verdict_cache.lookup(db, problem, submission.language, submission.code)
+    if cached:
+        verdict_cache.apply(cached, db_submission)
+    
     db.add(db_submission)
+    db.flush()
+    
+    # Queue the submission for the judge engine in the same transaction
+    if cached:
+        problem_stats.record_verdict(db, problem.id, current_user.id)
+    else:
+        submission_queue.enqueue(db, db_submission.id)
     db.commit()
     db.refresh(db_submission)
     
-    # Here you would typically queue the code for execution/testing
-    # For now, we'll just return the created submission
-    
     return db_submission
 
 
+@router.get("/submissions/cache-stats")
+def get_verdict_cache_stats(
+    problem_id: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Share of submissions served from the verdict cache (teachers/admin only)."""
+    if not current_user.is_teacher and not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to view judge statistics"
+        )
+    
+    return verdict_cache.stats(db, problem_id)
+
+
+@router.get("/submissions/events")
+async def stream_submission_events(
+    submission_id: List[str] = Query([]),
+    current_user: User = Depends(get_stream_user)
+):
+    """
+    Server-Sent Events stream of the current user's submission status changes.
+
+    Pass ``submission_id`` (repeatable) to receive only those submissions;
+    their current state is sent first, so a verdict that landed before the
+    stream opened is not missed.
+    """
+    user_id = current_user.id
+    watched = set(submission_id)
+
+    async def events():
+        queue = submission_events.subscribe(user_id)
+        try:
+            yield "retry: 3000\n\n"
+            snapshot = await run_in_threadpool(
+                _submission_snapshot, user_id, submission_id
+            )
+            for event in snapshot:
+                yield _sse(event)
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(), timeout=settings.SUBMISSION_EVENTS_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing an idle connection
+                    yield ": keep-alive\n\n"
+                    continue
+                if watched and event["submission_id"] not in watched:
+                    continue
+                yield _sse(event)
+        finally:
+            submission_events.unsubscribe(user_id, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _submission_snapshot(user_id: str, submission_ids: List[str]) -> List[dict]:
+    db = SessionLocal()
+    try:
+        return submission_events.snapshot(db, user_id, submission_ids)
+    finally:
+        db.close()
+
+
+def _sse(event: dict) -> str:
+    return f"event: submission\ndata: {json.dumps(event, default=str)}\n\n"
+
+
 @router.get("/submissions/{submission_id}", response_model=SubmissionResponse)
 def get_submission(
     submission_id: str,
@@ -261,23 +612,199 @@ def get_submission(
     return submission
 
 
-@router.get("/{problem_id}/submissions", response_model=List[SubmissionResponse])
+@router.get("/{problem_id}/submissions", response_model=SubmissionPage)
 def get_problem_submissions(
     problem_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    user_id: Optional[str] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    view: Literal["summary", "full"] = "summary",
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get submissions for a problem."""
+    """
+    Get submissions for a problem, newest first, one page at a time.
+
+    Pass the returned ``next_cursor`` as ``cursor`` for the next page. The
+    default ``summary`` view leaves out code, block structure and test
+    results; ``full`` includes them.
+    """
+    query = db.query(Submission).filter(Submission.problem_id == problem_id)
+    
     # Regular users can only see their own submissions
     if not current_user.is_teacher and not current_user.is_admin:
-        submissions = db.query(Submission).filter(
-            Submission.problem_id == problem_id,
-            Submission.user_id == current_user.id
-        ).all()
-    else:
+        query = query.filter(Submission.user_id == current_user.id)
+    elif user_id:
         # Teachers/admins can see all submissions for a problem
-        submissions = db.query(Submission).filter(
-            Submission.problem_id == problem_id
-        ).all()
+        query = query.filter(Submission.user_id == user_id)
+    
+    if status_filter:
+        query = query.filter(Submission.status == status_filter)
+    if view == "summary":
+        query = query.options(load_only(*SUBMISSION_SUMMARY_COLUMNS))
+    
+    try:
+        submissions, next_cursor = keyset_page(
+            query, Submission.created_at, Submission.id, cursor, limit
+        )
+    except InvalidCursor as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    item_schema = SubmissionSummary if view == "summary" else SubmissionResponse
+    return SubmissionPage(
+        items=[item_schema.model_validate(submission) for submission in submissions],
+        next_cursor=next_cursor,
+    )
+
+
+# Statistics endpoints
+@router.get("/{problem_id}/stats", response_model=ProblemStatsResponse)
+def get_problem_stats(
+    problem_id: str,
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_user)
+):
+    """Submission statistics of a problem: attempts, acceptance rate, fastest time."""
+    return problem_stats.summaries(db, [problem_id])[0]
+
+
+@router.get("/{problem_id}/leaderboard", response_model=List[LeaderboardEntry])
+def get_problem_leaderboard(
+    problem_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_user)
+):
+    """Users who solved a problem, fastest accepted submission first."""
+    return [
+        LeaderboardEntry(
+            rank=rank,
+            user_id=row.user_id,
+            username=username,
+            profile_thumbnail=profile_thumbnail,
+            best_submission_id=row.best_submission_id,
+            best_time=row.best_time,
+            best_memory=row.best_memory,
+            attempts=row.attempts,
+            first_solved_at=row.first_solved_at,
+        )
+        for rank, (row, username, profile_thumbnail) in enumerate(
+            problem_stats.leaderboard(db, problem_id, limit), start=1
+        )
+    ]
+
+
+@router.post("/{problem_id}/stats/rebuild", response_model=ProblemStatsResponse)
+def rebuild_problem_stats(
+    problem_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Recompute a problem's statistics from its submissions (teachers/admin only)."""
+    if not current_user.is_teacher and not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to rebuild statistics"
+        )
+    
+    problem = db.query(Problem).filter(Problem.id == problem_id).first()
+    if not problem:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Problem not found"
+        )
     
-    return submissions
\ No newline at end of file
+    problem_stats.rebuild(db, problem_id)
+    return problem_stats.summaries(db, [problem_id])[0]
+
+
+# Re-judge endpoints
+@router.post("/{problem_id}/rejudge", response_model=RejudgeBatchResponse, status_code=status.HTTP_202_ACCEPTED)
+def rejudge_submissions(
+    problem_id: str,
+    rejudge: RejudgeCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Re-judge a problem's submissions against its current test cases, in the
+    background at low priority (teachers/admin only).
+    """
+    if not current_user.is_teacher and not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to re-judge submissions"
+        )
+    
+    problem = db.query(Problem).filter(Problem.id == problem_id).first()
+    if not problem:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Problem not found"
+        )
+    
+    batch = rejudge_service.start(
+        db,
+        problem_id,
+        current_user.id,
+        statuses=rejudge.statuses,
+        user_id=rejudge.user_id,
+    )
+    return _rejudge_response(db, batch)
+
+
+@router.get("/rejudges/{batch_id}", response_model=RejudgeBatchResponse)
+def get_rejudge(
+    batch_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get a re-judge batch and its progress (teachers/admin only)."""
+    return _rejudge_response(db, _get_rejudge_batch(db, batch_id, current_user))
+
+
+@router.post("/rejudges/{batch_id}/cancel", response_model=RejudgeBatchResponse)
+def cancel_rejudge(
+    batch_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Cancel the not yet started part of a re-judge (teachers/admin only)."""
+    batch = _get_rejudge_batch(db, batch_id, current_user)
+    rejudge_service.cancel(db, batch)
+    return _rejudge_response(db, batch)
+
+
+def _get_rejudge_batch(db: Session, batch_id: str, current_user: User) -> RejudgeBatch:
+    if not current_user.is_teacher and not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to view re-judges"
+        )
+    
+    batch = db.query(RejudgeBatch).filter(RejudgeBatch.id == batch_id).first()
+    if not batch:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Re-judge not found"
+        )
+    return batch
+
+
+def _rejudge_response(db: Session, batch: RejudgeBatch) -> RejudgeBatchResponse:
+    progress = rejudge_service.progress(db, batch)
+    return RejudgeBatchResponse(
+        id=batch.id,
+        problem_id=batch.problem_id,
+        requested_by=batch.requested_by,
+        status=batch.status,
+        filters=batch.filters,
+        total=batch.total,
+        progress=progress,
+        created_at=batch.created_at,
+        finished_at=batch.finished_at,
+    )
@@ -1,13 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Response
 from typing import List
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
 
 from app.core.config import settings
-from app.db.database import get_db
+from app.db.database import get_async_db
 from app.models.skill_tree import SkillTree
 from app.schemas.skill_tree import SkillTreeCreate, SkillTreeResponse
-from app.api.dependencies import get_current_user
+from app.api.dependencies import get_current_user_async
 from app.models.user import User
 
 router = APIRouter()
@@ -15,20 +16,21 @@ router = APIRouter()
 
 @router.get("/", response_model=List[SkillTreeResponse])
 async def list_skill_trees(
-    current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     List all skill trees
     """
-    skill_trees = db.query(SkillTree).all()
+    skill_trees = (await db.execute(select(SkillTree))).scalars().all()
     return skill_trees
 
 
 @router.post("/", response_model=SkillTreeResponse)
 async def create_skill_tree(
     skill_tree_in: SkillTreeCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Create a new skill tree
@@ -50,8 +52,8 @@ async def create_skill_tree(
     )
 
     db.add(skill_tree)
-    db.commit()
-    db.refresh(skill_tree)
+    await db.commit()
+    await db.refresh(skill_tree)
 
     return skill_tree
 
@@ -59,13 +61,13 @@ async def create_skill_tree(
 @router.get("/{skill_tree_id}", response_model=SkillTreeResponse)
 async def get_skill_tree(
     skill_tree_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Get a specific skill tree by ID
     """
-    skill_tree = db.query(SkillTree).filter(SkillTree.id == skill_tree_id).first()
+    skill_tree = await db.get(SkillTree, skill_tree_id)
     if not skill_tree:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -79,8 +81,8 @@ async def get_skill_tree(
 async def update_skill_tree(
     skill_tree_id: str,
     skill_tree_in: SkillTreeCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Update a skill tree
@@ -92,7 +94,7 @@ async def update_skill_tree(
             detail="Only teachers can update skill trees"
         )
         
-    skill_tree = db.query(SkillTree).filter(SkillTree.id == skill_tree_id).first()
+    skill_tree = await db.get(SkillTree, skill_tree_id)
     if not skill_tree:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -109,8 +111,8 @@ async def update_skill_tree(
     if skill_tree_in.nodes is not None:
         skill_tree.nodes = skill_tree_in.nodes
 
-    db.commit()
-    db.refresh(skill_tree)
+    await db.commit()
+    await db.refresh(skill_tree)
 
     return skill_tree
 
@@ -118,8 +120,8 @@ async def update_skill_tree(
 @router.delete("/{skill_tree_id}")
 async def delete_skill_tree(
     skill_tree_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Delete a skill tree
@@ -131,14 +133,14 @@ async def delete_skill_tree(
             detail="Only teachers can delete skill trees"
         )
         
-    skill_tree = db.query(SkillTree).filter(SkillTree.id == skill_tree_id).first()
+    skill_tree = await db.get(SkillTree, skill_tree_id)
     if not skill_tree:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Skill tree with ID {skill_tree_id} not found",
         )
 
-    db.delete(skill_tree)
-    db.commit()
+    await db.delete(skill_tree)
+    await db.commit()
 
     return {"message": f"Skill tree {skill_tree_id} deleted successfully"}
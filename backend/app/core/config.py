@@ -21,6 +21,9 @@ class Settings(BaseSettings):
     DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 5))
     DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", 10))
     DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", 30))
+    # Async routes connect through asyncpg/aiosqlite; derived from
+    # DATABASE_URL unless set
+    ASYNC_DATABASE_URL: Optional[str] = os.getenv("ASYNC_DATABASE_URL")
 
     # Security
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key")
@@ -39,6 +42,33 @@ class Settings(BaseSettings):
     GOOGLE_REDIRECT_URI: str = os.getenv(
         "GOOGLE_REDIRECT_URI", "http://localhost:8000/api/v1/auth/google/callback"
     )
+    # Overridable so the OAuth flow can run against a local mock server
+    GOOGLE_TOKEN_URL: str = os.getenv(
+        "GOOGLE_TOKEN_URL", "https://oauth2.googleapis.com/token"
+    )
+    GOOGLE_USERINFO_URL: str = os.getenv(
+        "GOOGLE_USERINFO_URL", "https://www.googleapis.com/oauth2/v3/userinfo"
+    )
+
+    # Outgoing HTTP (Google OAuth, profile images): one pooled client per process
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = float(
+        os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", 5)
+    )
+    HTTP_TIMEOUT_SECONDS: float = float(os.getenv("HTTP_TIMEOUT_SECONDS", 10))
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(
+        os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20)
+    )
+    HTTP_RETRIES: int = int(os.getenv("HTTP_RETRIES", 2))
+
+    # Background caching of remote (Google) profile pictures
+    PROFILE_IMAGE_WORKERS: int = int(os.getenv("PROFILE_IMAGE_WORKERS", 2))
+    PROFILE_IMAGE_QUEUE_SIZE: int = int(os.getenv("PROFILE_IMAGE_QUEUE_SIZE", 1000))
+    PROFILE_IMAGE_MAX_BYTES: int = int(
+        os.getenv("PROFILE_IMAGE_MAX_BYTES", 5 * 1024 * 1024)
+    )
+    # Longest side of profile thumbnails, in pixels
+    PROFILE_THUMBNAIL_SIZE: int = int(os.getenv("PROFILE_THUMBNAIL_SIZE", 64))
 
     # CORS
     CORS_ORIGINS: List[str] = [
@@ -59,6 +89,68 @@ class Settings(BaseSettings):
     RATE_LIMIT_REQUESTS: int = int(os.getenv("RATE_LIMIT_REQUESTS", 300))
     RATE_LIMIT_PERIOD_SECONDS: int = int(os.getenv("RATE_LIMIT_PERIOD_SECONDS", 60))
 
+    # Active users cached by get_current_user; changes made in another
+    # process are seen within the TTL (0 disables the cache)
+    USER_CACHE_TTL_SECONDS: float = float(os.getenv("USER_CACHE_TTL_SECONDS", 30))
+    USER_CACHE_MAX_ENTRIES: int = int(os.getenv("USER_CACHE_MAX_ENTRIES", 10000))
+    # bcrypt cost factor; stored hashes with another cost are re-hashed at login
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", 12))
+    # Threads dedicated to password hashing, and logins/signups allowed to
+    # wait for one before the API answers 503
+    PASSWORD_HASH_WORKERS: int = int(
+        os.getenv("PASSWORD_HASH_WORKERS", max(1, (os.cpu_count() or 2) // 2))
+    )
+    PASSWORD_HASH_MAX_QUEUE: int = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 32))
+    # Verified JWTs remembered until they expire (0 verifies every request)
+    TOKEN_CACHE_MAX_ENTRIES: int = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", 10000))
+
+    # Judge
+    JUDGE_WORKERS: int = int(os.getenv("JUDGE_WORKERS", os.cpu_count() or 1))
+    # Upper bound on how many cores one submission's tests may fan out to
+    JUDGE_MAX_FANOUT: int = int(os.getenv("JUDGE_MAX_FANOUT", os.cpu_count() or 1))
+    JUDGE_POLL_INTERVAL_SECONDS: float = float(
+        os.getenv("JUDGE_POLL_INTERVAL_SECONDS", 0.5)
+    )
+    JUDGE_WORK_DIR: Optional[str] = os.getenv("JUDGE_WORK_DIR")
+    # Submissions run as this user, with the backend and the test data hidden
+    # from them; the judge then has to run as root. Empty runs them as the
+    # judge's own user with everything visible (development only).
+    JUDGE_SANDBOX_USER: str = os.getenv("JUDGE_SANDBOX_USER", "nobody")
+    JUDGE_MAX_OUTPUT_BYTES: int = int(os.getenv("JUDGE_MAX_OUTPUT_BYTES", 16 * 1024 * 1024))
+    JUDGE_TEST_CACHE_MAX_BYTES: int = int(
+        os.getenv("JUDGE_TEST_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+    )
+    # Content-addressed store for large test data (unset: keep it in the
+    # database). Must be shared by the API and the judge.
+    TEST_DATA_DIR: Optional[str] = os.getenv("TEST_DATA_DIR")
+    TEST_DATA_MIN_BYTES: int = int(os.getenv("TEST_DATA_MIN_BYTES", 64 * 1024))
+    # Largest input or expected output accepted by bulk test-case imports
+    TEST_CASE_MAX_BYTES: int = int(os.getenv("TEST_CASE_MAX_BYTES", 64 * 1024 * 1024))
+    JUDGE_LEASE_SECONDS: int = int(os.getenv("JUDGE_LEASE_SECONDS", 60))
+    JUDGE_MAX_ATTEMPTS: int = int(os.getenv("JUDGE_MAX_ATTEMPTS", 3))
+    JUDGE_RETRY_DELAY_SECONDS: int = int(os.getenv("JUDGE_RETRY_DELAY_SECONDS", 5))
+    # Re-judge jobs leased at once across all judges, so re-judges never
+    # crowd out live submissions
+    JUDGE_REJUDGE_MAX_LEASES: int = int(os.getenv("JUDGE_REJUDGE_MAX_LEASES", 1))
+    JUDGE_WARM_RUNNERS: bool = os.getenv("JUDGE_WARM_RUNNERS", "True").lower() in (
+        "true",
+        "1",
+        "t",
+    )
+    JUDGE_RUNNER_MAX_JOBS: int = int(os.getenv("JUDGE_RUNNER_MAX_JOBS", 500))
+    JUDGE_RUNNER_MAX_RSS_MB: int = int(os.getenv("JUDGE_RUNNER_MAX_RSS_MB", 128))
+    # Block programs run in the judge's VM; instructions allowed per ms of time
+    # limit (the VM runs roughly 2M instructions/s on one core)
+    JUDGE_BLOCK_VM_STEPS_PER_MS: int = int(os.getenv("JUDGE_BLOCK_VM_STEPS_PER_MS", 2000))
+
+    # Submission event stream (replaces client polling of submission status)
+    SUBMISSION_EVENTS_POLL_SECONDS: float = float(
+        os.getenv("SUBMISSION_EVENTS_POLL_SECONDS", 0.5)
+    )
+    SUBMISSION_EVENTS_HEARTBEAT_SECONDS: int = int(
+        os.getenv("SUBMISSION_EVENTS_HEARTBEAT_SECONDS", 15)
+    )
+
     class Config:
         case_sensitive = True
         env_file = ".env"
@@ -1,3 +1,7 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Any, Optional, Union, Dict, Tuple
 
@@ -7,7 +11,59 @@ from passlib.context import CryptContext
 from app.core.config import settings
 
 # Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
+
+
+class TokenCache:
+    """
+    LRU of verified token claims, keyed by a digest of the token and the key
+    it was verified with. An entry lives until the token's ``exp``, so a
+    cached token is never accepted after it would have failed verification.
+    Tokens are stateless (there is no revocation), so skipping the signature
+    check for a token already verified changes nothing else.
+    """
+
+    def __init__(self, max_entries: int = settings.TOKEN_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, Tuple[Dict[str, Any], float]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(token: str, secret_key: str) -> bytes:
+        return hashlib.sha256(f"{secret_key}\0{token}".encode()).digest()
+
+    def get(self, key: bytes) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        # Callers may modify the claims
+        return dict(entry[0])
+
+    def put(self, key: bytes, claims: Dict[str, Any]) -> None:
+        expires = claims.get("exp")
+        if self.max_entries <= 0 or not isinstance(expires, (int, float)):
+            return
+        with self._lock:
+            self._entries[key] = (dict(claims), expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache()
 
 
 def create_access_token(
@@ -50,13 +106,18 @@ def create_refresh_token(
 
 def decode_token(token: str, secret_key: str) -> Dict[str, Any]:
     """
-    Decode JWT token
+    Decode JWT token, verifying each distinct token only once
     """
+    key = token_cache.key(token, secret_key)
+    decoded_token = token_cache.get(key)
+    if decoded_token is not None:
+        return decoded_token
     try:
         decoded_token = jwt.decode(token, secret_key, algorithms=[settings.ALGORITHM])
-        return decoded_token
     except jwt.PyJWTError:
         return None
+    token_cache.put(key, decoded_token)
+    return decoded_token
 
 
 def create_token_pair(user_id: int) -> Tuple[str, str]:
@@ -85,6 +146,16 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(
+    plain_password: str, hashed_password: Optional[str]
+) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password; if the stored hash uses an outdated cost factor, also
+    return a replacement hash
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
 def get_password_hash(password: str) -> str:
     """
     Hash a password
@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_swagger_ui_html
@@ -10,6 +11,9 @@ from app.core.config import settings
 from app.api.routes import auth, google_classroom, skill_tree, problem
 from app.db.database import Base, engine
 from app.middleware.rate_limiter import rate_limit_middleware
+from app.services.http_client import http_client
+from app.services.password_hasher import password_hasher
+from app.services.profile_images import profile_image_jobs
 
 # Configure logging
 logging.basicConfig(
@@ -21,12 +25,22 @@ logger = logging.getLogger(__name__)
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await profile_image_jobs.stop()
+    # Close pooled outgoing connections
+    await http_client.close()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.PROJECT_VERSION,
     description="API for LeapCode learning platform",
     docs_url=None,  # Disable default docs URL
     redoc_url=None,  # Disable default redoc URL
+    lifespan=lifespan,
 )
 
 # Setup CORS
@@ -116,6 +130,8 @@ def health_check():
         "status": "healthy",
         "version": settings.PROJECT_VERSION,
         "environment": settings.ENVIRONMENT,
+        "password_hashing": password_hasher.stats(),
+        "profile_images": profile_image_jobs.stats(),
     }
 
 
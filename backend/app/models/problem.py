@@ -1,9 +1,13 @@
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Integer, JSON, Boolean
-from sqlalchemy.sql import func
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Integer, JSON, Boolean, Index, Float, Sequence, UniqueConstraint
+from sqlalchemy.sql import func, text
 from app.db.database import Base
 import uuid
 
 
+# Numbers of generated problem reference ids ("P1", "P2", ...); PostgreSQL only
+problem_ref_id_seq = Sequence("problem_ref_id_seq", metadata=Base.metadata)
+
+
 class Problem(Base):
     __tablename__ = "problems"
     
@@ -14,7 +18,19 @@ class Problem(Base):
     time_limit = Column(Integer, default=1000)  # milliseconds
     memory_limit = Column(Integer, default=256)  # MB
     
-    # Reference ID used in skill tree nodes
+    # How test cases are evaluated: "full" runs every test and sums weights,
+    # "fail_fast" stops at the first failing test and skips the rest
+    judge_mode = Column(String, nullable=False, default="full", server_default="full")
+    
+    # How output is compared with expected output: "exact", "lines", "whitespace",
+    # "tokens" or "float" (see app/services/comparator.py)
+    compare_mode = Column(String, nullable=False, default="lines", server_default="lines")
+    float_tolerance = Column(Float, nullable=True)  # "float" mode only; default 1e-6
+    
+    # Bumped with every test-case change; keys the judge's test-set cache
+    test_set_version = Column(Integer, nullable=False, default=1, server_default="1")
+    
+    # Reference ID used in skill tree nodes (app/services/problem_refs.py)
     problem_ref_id = Column(String, nullable=True, unique=True)
     
     # Problem structure
@@ -29,6 +45,12 @@ class Problem(Base):
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     created_by = Column(String, ForeignKey("users.id"), nullable=True)
+    
+    __table_args__ = (
+        # Problem browser pages, newest first, optionally by difficulty
+        Index("ix_problems_created", "created_at", "id"),
+        Index("ix_problems_difficulty_created", "difficulty", "created_at", "id"),
+    )
 
 
 class TestCase(Base):
@@ -37,16 +59,27 @@ class TestCase(Base):
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     problem_id = Column(String, ForeignKey("problems.id", ondelete="CASCADE"), nullable=False)
     
-    # Test data
-    input_data = Column(Text, nullable=False)
-    expected_output = Column(Text, nullable=False)
+    # Test data; NULL when it lives in the test data store under the hash
+    input_data = Column(Text, nullable=True)
+    expected_output = Column(Text, nullable=True)
+    input_hash = Column(String(64), nullable=True)  # sha256 of stored input
+    expected_output_hash = Column(String(64), nullable=True)  # sha256 of stored output
     
     # Visibility and scoring
     is_sample = Column(Boolean, default=False)  # Visible to users
     weight = Column(Integer, default=1)  # For weighted scoring
+    # Judging order within the problem, in the order cases were authored
+    position = Column(Integer, nullable=False, default=0)
     
     # Metadata
     created_at = Column(DateTime, server_default=func.now())
+    
+    __table_args__ = (
+        # Test-case listings: all of a problem's cases, or only its samples
+        Index("ix_test_cases_problem_sample", "problem_id", "is_sample"),
+        # The judge's test set, in judging order
+        Index("ix_test_cases_problem_position", "problem_id", "position"),
+    )
 
 
 class Submission(Base):
@@ -70,5 +103,166 @@ class Submission(Base):
     # Detailed test results
     test_results = Column(JSON, nullable=True)
     
+    # Verdict copied from the verdict cache instead of being judged
+    from_verdict_cache = Column(Boolean, nullable=False, default=False, server_default=text("false"))
+    
     # Metadata
-    created_at = Column(DateTime, server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime, server_default=func.now())
+    
+    __table_args__ = (
+        # Keyset pagination of a problem's submissions, optionally per user
+        Index("ix_submissions_problem_created", "problem_id", "created_at", "id"),
+        Index("ix_submissions_problem_user_created", "problem_id", "user_id", "created_at", "id"),
+        # Listings filtered by status, and re-judge selection by verdict
+        Index("ix_submissions_problem_status_created", "problem_id", "status", "created_at", "id"),
+    )
+
+
+class SubmissionJob(Base):
+    """
+    Durable judge queue entry for a submission.
+
+    Lifecycle: queued -> leased -> done, or back to queued on failure/lease
+    expiry until max_attempts is reached, after which the job is dead.
+    Queued re-judge jobs become cancelled when their batch is cancelled.
+    """
+    __tablename__ = "submission_jobs"
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    submission_id = Column(String, ForeignKey("submissions.id", ondelete="CASCADE"), nullable=False, index=True)
+    
+    # Queue state
+    status = Column(String, nullable=False, default="queued")  # queued, leased, done, dead, cancelled
+    priority = Column(Integer, nullable=False, default=0)  # Higher is claimed first
+    available_at = Column(DateTime, nullable=False, server_default=func.now())
+    
+    # Set for re-judge jobs; live submissions have no batch
+    batch_id = Column(String, ForeignKey("rejudge_batches.id", ondelete="SET NULL"), nullable=True, index=True)
+    
+    # Leasing and retries
+    leased_by = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    last_error = Column(Text, nullable=True)
+    
+    # Metadata
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        # Claim scans only touch queued rows, in claim order
+        Index(
+            "ix_submission_jobs_claim",
+            text("priority DESC"),
+            "available_at",
+            postgresql_where=text("status = 'queued'"),
+            sqlite_where=text("status = 'queued'"),
+        ),
+        # Reaper scans only touch leased rows
+        Index(
+            "ix_submission_jobs_lease",
+            "lease_expires_at",
+            postgresql_where=text("status = 'leased'"),
+            sqlite_where=text("status = 'leased'"),
+        ),
+        # Change feed read by the submission event stream
+        Index("ix_submission_jobs_updated_at", "updated_at"),
+    )
+
+
+class RejudgeBatch(Base):
+    """
+    Re-judge of a problem's existing submissions (e.g. after fixing a test case).
+    Its jobs are queued at low priority and only a few run at a time.
+    """
+    __tablename__ = "rejudge_batches"
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    problem_id = Column(String, ForeignKey("problems.id", ondelete="CASCADE"), nullable=False, index=True)
+    requested_by = Column(String, ForeignKey("users.id"), nullable=True)
+    
+    status = Column(String, nullable=False, default="running")  # running, completed, cancelled
+    filters = Column(JSON, nullable=True)  # Submission filters the batch was created with
+    total = Column(Integer, nullable=False, default=0)  # Jobs enqueued
+    
+    # Metadata
+    created_at = Column(DateTime, server_default=func.now())
+    finished_at = Column(DateTime, nullable=True)
+
+
+class VerdictCacheEntry(Base):
+    """
+    Judged verdict reusable by later submissions of the same (normalized) code
+    """
+    __tablename__ = "verdict_cache"
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    problem_id = Column(String, ForeignKey("problems.id", ondelete="CASCADE"), nullable=False)
+    test_set_version = Column(Integer, nullable=False)
+    language = Column(String, nullable=False)
+    code_hash = Column(String(64), nullable=False)  # sha256 of the code with LF line endings
+    
+    # Cached verdict, in the same shape as on Submission
+    status = Column(String, nullable=False)
+    score = Column(Integer, default=0)
+    execution_time = Column(Integer, nullable=True)
+    memory_used = Column(Integer, nullable=True)
+    test_results = Column(JSON, nullable=True)
+    
+    hits = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime, server_default=func.now())
+    last_hit_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        UniqueConstraint(
+            "problem_id", "test_set_version", "language", "code_hash",
+            name="uq_verdict_cache_key",
+        ),
+    )
+
+
+class ProblemStats(Base):
+    """
+    Per-problem submission aggregates, kept up to date by the judge
+    (app/services/problem_stats.py)
+    """
+    __tablename__ = "problem_stats"
+    
+    problem_id = Column(String, ForeignKey("problems.id", ondelete="CASCADE"), primary_key=True)
+    
+    submissions = Column(Integer, nullable=False, default=0)  # Judged submissions
+    accepted = Column(Integer, nullable=False, default=0)  # Accepted submissions
+    attempted_users = Column(Integer, nullable=False, default=0)
+    solved_users = Column(Integer, nullable=False, default=0)
+    fastest_time = Column(Integer, nullable=True)  # Fastest accepted execution_time (ms)
+    
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class ProblemUserStats(Base):
+    """
+    One user's results on one problem: their attempt counts and best accepted
+    submission. Backs the problem leaderboard.
+    """
+    __tablename__ = "problem_user_stats"
+    
+    problem_id = Column(String, ForeignKey("problems.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    
+    attempts = Column(Integer, nullable=False, default=0)  # Judged submissions
+    accepted = Column(Integer, nullable=False, default=0)  # Accepted submissions
+    solved = Column(Boolean, nullable=False, default=False)
+    
+    # Best accepted submission: fastest, then least memory, then earliest
+    best_submission_id = Column(String, ForeignKey("submissions.id", ondelete="SET NULL"), nullable=True)
+    best_time = Column(Integer, nullable=True)  # milliseconds
+    best_memory = Column(Integer, nullable=True)  # KB
+    first_solved_at = Column(DateTime, nullable=True)
+    
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        # Leaderboard order, and the fastest time of a problem
+        Index("ix_problem_user_stats_leaderboard", "problem_id", "solved", "best_time"),
+    )
@@ -16,6 +16,8 @@ class User(Base):
     first_name = Column(String, nullable=True)
     last_name = Column(String, nullable=True)
     profile_picture = Column(String, nullable=True)
+    # Small copy of the cached profile picture, for list views
+    profile_thumbnail = Column(String, nullable=True)
 
     is_oauth_account = Column(Boolean, default=False)
     oauth_provider = Column(String, nullable=True)
@@ -1,4 +1,4 @@
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal, Union
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -10,6 +10,11 @@ class ProblemBase(BaseModel):
     difficulty: Optional[str] = None
     time_limit: Optional[int] = 1000
     memory_limit: Optional[int] = 256
+    judge_mode: Optional[Literal["full", "fail_fast"]] = "full"
+    compare_mode: Optional[
+        Literal["exact", "lines", "whitespace", "tokens", "float"]
+    ] = "lines"
+    float_tolerance: Optional[float] = None
     input_format: Optional[str] = None
     output_format: Optional[str] = None
     constraints: Optional[str] = None
@@ -36,6 +41,23 @@ class ProblemResponse(ProblemBase):
         from_attributes = True
 
 
+class ProblemSummary(BaseModel):
+    """Problem without its statement, formats, limits or starter code"""
+    id: str
+    problem_ref_id: Optional[str] = None
+    title: str
+    difficulty: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ProblemPage(BaseModel):
+    items: List[ProblemSummary]
+    next_cursor: Optional[str] = None  # None on the last page
+
+
 # TestCase Schemas
 class TestCaseBase(BaseModel):
     input_data: str
@@ -56,7 +78,13 @@ class TestCaseUpdate(TestCaseBase):
 class TestCaseResponse(TestCaseBase):
     id: str
     problem_id: str
+    position: int
     created_at: datetime
+    # Large data held in the test data store is returned as its hash only
+    input_data: Optional[str] = None
+    expected_output: Optional[str] = None
+    input_hash: Optional[str] = None
+    expected_output_hash: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -85,4 +113,70 @@ class SubmissionResponse(SubmissionBase):
     created_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class SubmissionSummary(BaseModel):
+    """Submission without code, block structure or test results"""
+    id: str
+    problem_id: str
+    user_id: str
+    language: str
+    status: str
+    score: int
+    execution_time: Optional[int] = None
+    memory_used: Optional[int] = None
+    from_verdict_cache: bool = False
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class SubmissionPage(BaseModel):
+    items: List[Union[SubmissionSummary, SubmissionResponse]]
+    next_cursor: Optional[str] = None  # None on the last page
+
+
+# Re-judge Schemas
+class RejudgeCreate(BaseModel):
+    statuses: Optional[List[str]] = None  # Only submissions with these verdicts
+    user_id: Optional[str] = None  # Only this user's submissions
+
+
+class RejudgeBatchResponse(BaseModel):
+    id: str
+    problem_id: str
+    requested_by: Optional[str] = None
+    status: str
+    filters: Optional[Dict[str, Any]] = None
+    total: int
+    progress: Dict[str, int]  # queued, running, done, failed, cancelled
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+# Statistics Schemas
+class ProblemStatsResponse(BaseModel):
+    problem_id: str
+    submissions: int  # Judged submissions
+    accepted: int
+    attempted_users: int
+    solved_users: int
+    acceptance_rate: float  # accepted / submissions
+    fastest_time: Optional[int] = None  # milliseconds
+
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: str
+    username: Optional[str] = None
+    profile_thumbnail: Optional[str] = None
+    best_submission_id: Optional[str] = None
+    best_time: Optional[int] = None  # milliseconds
+    best_memory: Optional[int] = None  # KB
+    attempts: int
+    first_solved_at: Optional[datetime] = None
@@ -43,6 +43,7 @@ class TokenData(BaseModel):
 
 class UserResponse(UserBase):
     id: str
+    profile_thumbnail: Optional[str] = None
     is_oauth_account: bool
     oauth_provider: Optional[str] = None
     is_teacher: bool = False
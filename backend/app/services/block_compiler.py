@@ -0,0 +1,325 @@
+"""
+Compiler from the block editor's arrangement (Submission.block_structure) to
+Python source.
+
+The editor stores a list of top-level blocks. Top-level blocks are chained
+into a sequence through ``parentId`` (the block above) and ``childId`` (the
+block below); container blocks (if/elif/else, loops, functions) hold their
+body, in order, in ``nestedBlocks``.
+
+Each block subtree (a block and its nested body, not the blocks after it)
+compiles to a fragment of lines at indentation zero plus the id of the block
+that produced each line. Fragments are memoized by a content hash of the
+subtree, so a resubmission after editing one block only recompiles the path
+from that block up to the top level.
+"""
+
+import ast
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+INDENT = "    "
+
+# Fields that affect the generated code; layout fields (x, y, color, label,
+# positioning) are deliberately left out of the content hash
+SEMANTIC_FIELDS = (
+    "id",
+    "type",
+    "name",
+    "value",
+    "condition",
+    "left",
+    "right",
+    "variable",
+    "params",
+    "args",
+)
+
+ARITHMETIC_OPERATORS = {"add": "+", "subtract": "-", "multiply": "*", "divide": "/"}
+CONTAINER_TYPES = {"if", "elif", "else", "forLoop", "whileLoop", "createFunc"}
+
+# (lines, block id of each line)
+Fragment = Tuple[Tuple[str, ...], Tuple[str, ...]]
+
+
+class BlockCompileError(Exception):
+    """A block cannot be compiled; ``block_id`` points the editor at it"""
+
+    def __init__(self, message: str, block_id: Optional[str] = None):
+        super().__init__(message)
+        self.message = message
+        self.block_id = block_id
+
+
+class CompiledProgram:
+    """
+    Generated source and its source map (1-based line -> block id)
+    """
+
+    def __init__(self, lines: List[str], block_ids: List[str]):
+        self.source = "\n".join(lines) + "\n" if lines else ""
+        self.source_map: Dict[int, str] = {
+            lineno: block_id for lineno, block_id in enumerate(block_ids, start=1)
+        }
+
+    def block_for_line(self, lineno: int) -> Optional[str]:
+        return self.source_map.get(lineno)
+
+    def block_for_traceback(self, stderr: str, filename: str) -> Optional[str]:
+        """The block behind the innermost frame of ``filename`` in a traceback"""
+        frames = re.findall(
+            rf'File "(?:[^"]*/)?{re.escape(filename)}", line (\d+)', stderr
+        )
+        return self.block_for_line(int(frames[-1])) if frames else None
+
+
+def top_level_blocks(
+    structure: Union[Dict[str, Any], List[Dict[str, Any]]],
+) -> List[Dict[str, Any]]:
+    """Unwrap ``{"blocks": [...]}`` or accept the bare list"""
+    blocks = structure.get("blocks", []) if isinstance(structure, dict) else structure
+    if not isinstance(blocks, list):
+        raise BlockCompileError("Block structure must be a list of blocks")
+    return blocks
+
+
+def program_order(blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Top-level blocks in execution order: the chain from the Start block,
+    or, without one, every chain head from top to bottom of the canvas
+    """
+    by_id = {block.get("id"): block for block in blocks}
+    start = next((b for b in blocks if b.get("type") == "start"), None)
+    if start is not None:
+        heads = [start]
+    else:
+        heads = sorted(
+            (b for b in blocks if b.get("parentId") not in by_id),
+            key=lambda b: (b.get("y") or 0, b.get("x") or 0),
+        )
+
+    ordered = []
+    seen = set()
+    for head in heads:
+        block = head
+        while block is not None and block.get("id") not in seen:
+            seen.add(block.get("id"))
+            if block.get("type") == "end":
+                break
+            ordered.append(block)
+            block = by_id.get(block.get("childId"))
+    return ordered
+
+
+class BlockCompiler:
+    """
+    Compiles block structures to Python, memoizing subtree fragments
+    """
+
+    def __init__(self, max_fragments: int = 10000):
+        self.max_fragments = max_fragments
+        self.hits = 0
+        self.misses = 0
+        self._fragments: "OrderedDict[str, Fragment]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def compile(
+        self, structure: Union[Dict[str, Any], List[Dict[str, Any]]]
+    ) -> CompiledProgram:
+        """
+        Compile a block structure (``{"blocks": [...]}`` or the bare list)
+        """
+        lines: List[str] = []
+        block_ids: List[str] = []
+        for block in program_order(top_level_blocks(structure)):
+            fragment_lines, fragment_ids = self._fragment(block)
+            lines.extend(fragment_lines)
+            block_ids.extend(fragment_ids)
+        return CompiledProgram(lines, block_ids)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "fragments": len(self._fragments),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _fragment(self, block: Dict[str, Any]) -> Fragment:
+        digests: Dict[int, str] = {}
+        self._subtree_hash(block, digests)
+        return self._compile_subtree(block, digests)
+
+    def _subtree_hash(self, block: Dict[str, Any], digests: Dict[int, str]) -> str:
+        """Merkle hash of a subtree; every node's digest is recorded in ``digests``"""
+        fields = tuple(block.get(key) for key in SEMANTIC_FIELDS)
+        nested = tuple(
+            self._subtree_hash(nested, digests)
+            for nested in block.get("nestedBlocks") or []
+        )
+        encoded = repr((fields, nested)).encode("utf-8")
+        digest = hashlib.sha256(encoded).hexdigest()
+        digests[id(block)] = digest
+        return digest
+
+    def _compile_subtree(
+        self, block: Dict[str, Any], digests: Dict[int, str]
+    ) -> Fragment:
+        digest = digests[id(block)]
+        with self._lock:
+            fragment = self._fragments.get(digest)
+            if fragment is not None:
+                self._fragments.move_to_end(digest)
+                self.hits += 1
+                return fragment
+            self.misses += 1
+
+        lines: List[str] = []
+        block_ids: List[str] = []
+        block_id = str(block.get("id"))
+        for line in self._header(block):
+            lines.append(line)
+            block_ids.append(block_id)
+
+        if block.get("type") in CONTAINER_TYPES:
+            body = block.get("nestedBlocks") or []
+            if not body:
+                lines.append(INDENT + "pass")
+                block_ids.append(block_id)
+            for nested in body:
+                nested_lines, nested_ids = self._compile_subtree(nested, digests)
+                lines.extend(INDENT + line for line in nested_lines)
+                block_ids.extend(nested_ids)
+
+        fragment = (tuple(lines), tuple(block_ids))
+        with self._lock:
+            self._fragments[digest] = fragment
+            while len(self._fragments) > self.max_fragments:
+                self._fragments.popitem(last=False)
+        return fragment
+
+    def _header(self, block: Dict[str, Any]) -> List[str]:
+        """
+        Code for the block itself (without its nested body)
+        """
+        block_type = block.get("type")
+        if block_type == "start":
+            return []
+        if block_type == "setVariable":
+            return [f"{block_name(block, 'name')} = {_expression(block, 'value')}"]
+        if block_type == "changeVariable":
+            return [f"{block_name(block, 'name')} += {_expression(block, 'value')}"]
+        if block_type == "useVariable":
+            return [f"print({block_name(block, 'variable')})"]
+        if block_type in ARITHMETIC_OPERATORS:
+            expression = (
+                f"{_expression(block, 'left')} {ARITHMETIC_OPERATORS[block_type]} "
+                f"{_expression(block, 'right')}"
+            )
+            if block.get("name"):
+                return [f"{block_name(block, 'name')} = {expression}"]
+            return [f"print({expression})"]
+        if block_type == "if":
+            return [f"if {_expression(block, 'condition')}:"]
+        if block_type == "elif":
+            return [f"elif {_expression(block, 'condition')}:"]
+        if block_type == "else":
+            return ["else:"]
+        if block_type == "whileLoop":
+            return [f"while {_expression(block, 'condition')}:"]
+        if block_type == "forLoop":
+            return [f"for {_loop_header(block)}:"]
+        if block_type == "createFunc":
+            return [f"def {block_name(block, 'name')}({_parameters(block)}):"]
+        if block_type == "callFunc":
+            return [f"{block_name(block, 'name')}({_arguments(block)})"]
+        raise BlockCompileError(f"Unknown block type: {block_type}", block.get("id"))
+
+
+def block_text(block: Dict[str, Any], field: str) -> str:
+    value = block.get(field)
+    text = "" if value is None else str(value).strip()
+    if not text:
+        raise BlockCompileError(
+            f"{block.get('label') or block.get('type')} block is missing its {field}",
+            block.get("id"),
+        )
+    if "\n" in text or "\r" in text:
+        raise BlockCompileError(f"The {field} must be on one line", block.get("id"))
+    return text
+
+
+def block_name(block: Dict[str, Any], field: str) -> str:
+    name = block_text(block, field)
+    if not name.isidentifier():
+        raise BlockCompileError(f"'{name}' is not a valid name", block.get("id"))
+    return name
+
+
+def _expression(block: Dict[str, Any], field: str) -> str:
+    expression = block_text(block, field)
+    try:
+        ast.parse(expression, mode="eval")
+    except SyntaxError:
+        raise BlockCompileError(
+            f"'{expression}' is not a valid expression", block.get("id")
+        )
+    return expression
+
+
+def _loop_header(block: Dict[str, Any]) -> str:
+    """
+    A bare count repeats the body that many times; otherwise the condition is
+    a ``target in iterable`` clause, e.g. ``i in range(10)``
+    """
+    condition = block_text(block, "condition")
+    try:
+        tree = ast.parse(condition, mode="eval").body
+    except SyntaxError:
+        tree = None
+    if tree is not None and not isinstance(tree, ast.Compare):
+        return f"_ in range({condition})"
+    try:
+        ast.parse(f"for {condition}:\n    pass")
+    except SyntaxError:
+        raise BlockCompileError(
+            f"'{condition}' is not a valid loop clause (try 'i in range(10)')",
+            block.get("id"),
+        )
+    return condition
+
+
+def _parameters(block: Dict[str, Any]) -> str:
+    params = block.get("params") or []
+    if isinstance(params, str):
+        params = [p.strip() for p in params.split(",") if p.strip()]
+    for param in params:
+        if not str(param).isidentifier():
+            raise BlockCompileError(
+                f"'{param}' is not a valid parameter", block.get("id")
+            )
+    return ", ".join(str(param) for param in params)
+
+
+def _arguments(block: Dict[str, Any]) -> str:
+    args = block.get("args") or []
+    if isinstance(args, str):
+        args = [a.strip() for a in args.split(",") if a.strip()]
+    for arg in args:
+        try:
+            ast.parse(str(arg), mode="eval")
+        except SyntaxError:
+            raise BlockCompileError(f"'{arg}' is not a valid argument", block.get("id"))
+    return ", ".join(str(arg) for arg in args)
+
+
+# Create a singleton instance
+block_compiler = BlockCompiler()
@@ -0,0 +1,708 @@
+"""
+In-process interpreter for block-editor programs.
+
+Programs built only from the editor's core blocks (variables, arithmetic,
+if/elif/else, for and while loops) are compiled from Submission.block_structure
+to a flat instruction array for a small stack machine and run directly in the
+judge worker, without a sandboxed subprocess.
+
+Expressions are restricted to literals, variables, arithmetic, comparisons,
+boolean logic and a few whitelisted builtins (input, int, float, str, ...), so
+a program can only touch its own variables, stdin and stdout. Time is
+budgeted as an instruction count (Problem.time_limit x
+JUDGE_BLOCK_VM_STEPS_PER_MS), with instructions that do more than constant
+work (max over a range, big-integer arithmetic) charged for that work, and as
+a wall-clock deadline of Problem.time_limit. Memory is budgeted as the size
+of the program's variables and output (Problem.memory_limit), and an
+operation whose result could not fit (a huge power, repeat or format width)
+fails before it allocates anything. Anything outside that subset, such as
+function blocks, raises UnsupportedProgram and the judge falls back to
+running the compiled Python (app/services/block_compiler.py) in the sandbox.
+"""
+
+import ast
+import operator
+import re
+import signal
+import sys
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from app.core.config import settings
+from app.services.block_compiler import (
+    BlockCompileError,
+    block_name,
+    block_text,
+    program_order,
+    top_level_blocks,
+)
+
+# Opcodes
+PUSH = 0
+LOAD = 1
+STORE = 2
+BINARY = 3
+UNARY = 4
+COMPARE = 5
+CALL = 6
+PRINT = 7
+POP = 8
+JUMP = 9
+JUMP_IF_FALSE = 10  # pops the condition
+JUMP_IF_FALSE_OR_POP = 11  # keeps it on the stack when jumping (and/or)
+JUMP_IF_TRUE_OR_POP = 12
+GET_ITER = 13
+FOR_ITER = 14  # pushes the next item, or pops the iterator and jumps when done
+
+BINARY_OPERATORS: Dict[type, Callable[[Any, Any], Any]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+UNARY_OPERATORS: Dict[type, Callable[[Any], Any]] = {
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+    ast.Not: operator.not_,
+}
+
+
+def _contains(a: Any, b: Any) -> bool:
+    return a in b
+
+
+def _not_contains(a: Any, b: Any) -> bool:
+    return a not in b
+
+
+COMPARE_OPERATORS: Dict[type, Callable[[Any, Any], Any]] = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.In: _contains,
+    ast.NotIn: _not_contains,
+}
+BLOCK_OPERATORS: Dict[str, Callable[[Any, Any], Any]] = {
+    "add": operator.add,
+    "subtract": operator.sub,
+    "multiply": operator.mul,
+    "divide": operator.truediv,
+}
+
+# input() is provided by the VM itself; it reads the test's stdin
+BUILTINS = {
+    "int",
+    "float",
+    "str",
+    "abs",
+    "min",
+    "max",
+    "round",
+    "len",
+    "range",
+    "input",
+}
+CONSTANT_TYPES = (int, float, str, bool, type(None))
+
+# The wall clock is read once per this many steps
+CLOCK_CHECK_STEPS = 1024
+# Big-integer arithmetic is charged one step per machine word of its operands
+INT_WORD_BITS = 64
+# A %-format conversion: flags, width, precision, length modifier and type
+FORMAT_CONVERSION = re.compile(r"%[-#0 +]*(\d*)(?:\.(\d*))?[hlL]?(.)", re.DOTALL)
+# Wider than this is beyond any budget; also keeps int() off huge digit runs
+MAX_FORMAT_DIGITS = 18
+
+Instruction = Tuple[int, Any]
+
+
+class UnsupportedProgram(Exception):
+    """The program uses blocks or expressions the VM does not implement"""
+
+
+class BudgetExceeded(Exception):
+    """The program ran out of steps, time, memory or output"""
+
+    def __init__(self, kind: str):
+        super().__init__(kind)
+        self.kind = kind
+
+
+class BlockProgram:
+    """
+    A compiled block program: instructions plus the block id behind each one
+    """
+
+    def __init__(self, code: List[Instruction], block_ids: List[Optional[str]]):
+        self.code = code
+        self.block_ids = block_ids
+
+    def run(
+        self,
+        stdin: str,
+        max_steps: int,
+        memory_bytes: int,
+        max_output_bytes: int,
+        time_limit_ms: int,
+    ) -> Dict[str, Any]:
+        """
+        Run once against ``stdin``. The result has the same shape as a sandbox
+        run (app/services/sandbox.py), with the output inline under "stdout".
+        """
+        start = time.perf_counter()
+        machine = _Machine(
+            self,
+            stdin,
+            max_steps,
+            start + time_limit_ms / 1000.0,
+            memory_bytes,
+            max_output_bytes,
+        )
+        exit_code = 0
+        timed_out = False
+        stderr = ""
+        block_id = None
+        try:
+            machine.execute()
+        except BudgetExceeded as e:
+            if e.kind in ("steps", "time"):
+                timed_out = True
+            elif e.kind == "output":
+                exit_code = -signal.SIGXFSZ
+            else:
+                # Reported as over the limit so classify_run calls it MLE
+                machine.memory = max(machine.memory, memory_bytes + 1024)
+        except Exception as e:
+            exit_code = 1
+            block_id = (
+                self.block_ids[machine.pc] if machine.pc < len(self.code) else None
+            )
+            stderr = f"{type(e).__name__}: {str(e)}"
+            if block_id:
+                stderr += f" (block {block_id})"
+
+        elapsed_ms = int((time.perf_counter() - start) * 1000)
+        return {
+            "exit_code": exit_code,
+            "timed_out": timed_out,
+            "wall_ms": elapsed_ms,
+            "cpu_ms": elapsed_ms,
+            "memory_kb": machine.memory // 1024,
+            "stdout": "".join(machine.output),
+            "stderr": stderr,
+            "block_id": block_id,
+            "steps": machine.steps,
+        }
+
+
+class _Machine:
+    """Execution state for one run"""
+
+    def __init__(
+        self,
+        program: BlockProgram,
+        stdin: str,
+        max_steps: int,
+        deadline: float,
+        memory_bytes: int,
+        max_output_bytes: int,
+    ):
+        self.program = program
+        self.lines: Iterator[str] = iter(stdin.splitlines())
+        self.max_steps = max_steps
+        self.deadline = deadline  # time.perf_counter() value
+        self.memory_bytes = memory_bytes
+        self.max_output_bytes = max_output_bytes
+        self.variables: Dict[str, Any] = {}
+        self.sizes: Dict[str, int] = {}
+        self.output: List[str] = []
+        self.output_bytes = 0
+        self.memory = 0
+        self.steps = 0
+        self.pc = 0
+
+    def execute(self) -> None:
+        code = self.program.code
+        stack: List[Any] = []
+        variables = self.variables
+        end = len(code)
+        pc = 0
+        steps = 0
+        max_steps = self.max_steps
+        next_clock_check = CLOCK_CHECK_STEPS
+        try:
+            while pc < end:
+                steps += 1
+                if steps > max_steps:
+                    raise BudgetExceeded("steps")
+                if steps >= next_clock_check:
+                    if time.perf_counter() > self.deadline:
+                        raise BudgetExceeded("time")
+                    next_clock_check = steps + CLOCK_CHECK_STEPS
+                op, arg = code[pc]
+                pc += 1
+                if op == LOAD:
+                    try:
+                        stack.append(variables[arg])
+                    except KeyError:
+                        raise NameError(f"name '{arg}' is not defined")
+                elif op == PUSH:
+                    stack.append(arg)
+                elif op == BINARY:
+                    right = stack.pop()
+                    left = stack.pop()
+                    self._check_growth(arg, left, right)
+                    steps += _arithmetic_steps(arg, left, right)
+                    if steps > max_steps:
+                        raise BudgetExceeded("steps")
+                    stack.append(arg(left, right))
+                elif op == COMPARE:
+                    right = stack.pop()
+                    left = stack.pop()
+                    steps += _compare_steps(arg, left, right)
+                    if steps > max_steps:
+                        raise BudgetExceeded("steps")
+                    stack.append(arg(left, right))
+                elif op == JUMP_IF_FALSE:
+                    if not stack.pop():
+                        pc = arg
+                elif op == JUMP:
+                    pc = arg
+                elif op == STORE:
+                    self._store(arg, stack.pop())
+                elif op == FOR_ITER:
+                    try:
+                        stack.append(next(stack[-1]))
+                    except StopIteration:
+                        stack.pop()
+                        pc = arg
+                elif op == PRINT:
+                    self._print(stack.pop())
+                elif op == UNARY:
+                    stack.append(arg(stack.pop()))
+                elif op == JUMP_IF_FALSE_OR_POP:
+                    if not stack[-1]:
+                        pc = arg
+                    else:
+                        stack.pop()
+                elif op == JUMP_IF_TRUE_OR_POP:
+                    if stack[-1]:
+                        pc = arg
+                    else:
+                        stack.pop()
+                elif op == CALL:
+                    name, count = arg
+                    args = stack[len(stack) - count :]
+                    del stack[len(stack) - count :]
+                    steps += _call_steps(name, args)
+                    if steps > max_steps:
+                        raise BudgetExceeded("steps")
+                    stack.append(self._call(name, args))
+                elif op == GET_ITER:
+                    stack.append(iter(stack.pop()))
+                elif op == POP:
+                    stack.pop()
+        finally:
+            # Leave pc on the failing instruction for error reporting
+            self.pc = pc - 1 if pc else 0
+            self.steps = steps
+
+    def _store(self, name: str, value: Any) -> None:
+        size = sys.getsizeof(value)
+        self.memory += size - self.sizes.get(name, 0)
+        if self.memory > self.memory_bytes:
+            raise BudgetExceeded("memory")
+        self.sizes[name] = size
+        self.variables[name] = value
+
+    def _print(self, value: Any) -> None:
+        text = f"{value}\n"
+        self.output_bytes += len(text)
+        if self.output_bytes > self.max_output_bytes:
+            raise BudgetExceeded("output")
+        self.memory += sys.getsizeof(text)
+        if self.memory > self.memory_bytes:
+            raise BudgetExceeded("memory")
+        self.output.append(text)
+
+    def _check_growth(self, op: Callable, left: Any, right: Any) -> None:
+        """
+        Refuse operations whose result alone would exceed the memory budget,
+        before Python tries to allocate it
+        """
+        if _result_bytes(op, left, right) > self.memory_bytes - self.memory:
+            raise BudgetExceeded("memory")
+
+    def _call(self, name: str, args: List[Any]) -> Any:
+        if name == "input":
+            if args:
+                self._print_prompt(args[0])
+            try:
+                return next(self.lines)
+            except StopIteration:
+                raise EOFError("EOF when reading a line")
+        if name == "range" and len(args) > 3:
+            raise TypeError("range expected at most 3 arguments")
+        return _BUILTIN_FUNCTIONS[name](*args)
+
+    def _print_prompt(self, prompt: Any) -> None:
+        text = str(prompt)
+        self.output_bytes += len(text)
+        if self.output_bytes > self.max_output_bytes:
+            raise BudgetExceeded("output")
+        self.output.append(text)
+
+
+def _size(value: Any) -> int:
+    """Items a builtin walks when it iterates ``value``"""
+    try:
+        return len(value)
+    except OverflowError:
+        # A range too long for len() is also too long to walk
+        return sys.maxsize
+    except TypeError:
+        return 0
+
+
+def _result_bytes(op: Callable, left: Any, right: Any) -> int:
+    """
+    Upper bound on the size of ``op(left, right)`` for the operations whose
+    result can outgrow their operands; 0 for the rest
+    """
+    if op is operator.pow:
+        if isinstance(left, int) and isinstance(right, int):
+            if right > 0 and abs(left) > 1:
+                return left.bit_length() * right // 8
+    elif op is operator.mul:
+        for sequence, count in ((left, right), (right, left)):
+            if isinstance(sequence, str) and isinstance(count, int):
+                return _text_bytes(len(sequence) * count, sequence)
+        if isinstance(left, int) and isinstance(right, int):
+            return (left.bit_length() + right.bit_length()) // 8
+    elif op is operator.add:
+        if isinstance(left, str) and isinstance(right, str):
+            return _text_bytes(len(left) + len(right), left, right)
+    elif op is operator.mod and isinstance(left, str):
+        return _format_bytes(left, right)
+    return 0
+
+
+def _format_bytes(template: str, value: Any) -> int:
+    """
+    Upper bound on the size of ``template % value``: the template plus the
+    width, precision and text of each conversion. Block programs have no
+    tuples or dicts, so every conversion formats the same single value.
+    """
+    length = len(template)
+    for width, precision, kind in FORMAT_CONVERSION.findall(template):
+        for digits in (width, precision):
+            if len(digits) > MAX_FORMAT_DIGITS:
+                return sys.maxsize
+            length += int(digits or 0)
+        if kind != "%":
+            length += _text_length(value, kind)
+    if isinstance(value, str):
+        return _text_bytes(length, template, value)
+    return _text_bytes(length, template)
+
+
+def _text_length(value: Any, kind: str) -> int:
+    """Longest text one %-conversion of ``value`` produces before padding"""
+    if isinstance(value, str):
+        # repr() spells a character in at most 10 ("\U0001f600")
+        return len(value) * (10 if kind in "ra" else 1)
+    if isinstance(value, int):
+        # Octal digits, sign and prefix
+        return value.bit_length() // 3 + 3
+    if isinstance(value, float):
+        # Integer digits of %f on the largest float
+        return 320
+    return len(str(value))
+
+
+def _text_bytes(length: int, *parts: str) -> int:
+    """Bytes for a string of ``length`` characters built from ``parts``"""
+    return length if all(part.isascii() for part in parts) else length * 4
+
+
+def _call_steps(name: str, args: List[Any]) -> int:
+    """
+    Extra steps for a builtin call beyond its own instruction. min and max
+    over one iterable walk all of it; the others take constant time (range
+    is lazy, and its len is computed, not counted).
+    """
+    if name in ("min", "max") and len(args) == 1:
+        return _size(args[0])
+    return 0
+
+
+def _compare_steps(op: Callable, left: Any, right: Any) -> int:
+    """``x in range(...)`` is a lookup for integers but a scan for anything else"""
+    if (
+        op in (_contains, _not_contains)
+        and isinstance(right, range)
+        and type(left) not in (int, bool)
+    ):
+        return _size(right)
+    return 0
+
+
+def _arithmetic_steps(op: Callable, left: Any, right: Any) -> int:
+    """Extra steps for arithmetic on integers wider than a machine word"""
+    if not isinstance(left, int) or not isinstance(right, int):
+        return 0
+    if op is operator.pow:
+        if right <= 0 or abs(left) <= 1:
+            return 0
+        bits = left.bit_length() * right
+    else:
+        bits = left.bit_length() + right.bit_length()
+    return bits // INT_WORD_BITS
+
+
+_BUILTIN_FUNCTIONS: Dict[str, Callable] = {
+    "int": int,
+    "float": float,
+    "str": str,
+    "abs": abs,
+    "min": min,
+    "max": max,
+    "round": round,
+    "len": len,
+    "range": range,
+}
+
+
+class _Assembler:
+    """Emits instructions for statements and expressions"""
+
+    def __init__(self):
+        self.code: List[Instruction] = []
+        self.block_ids: List[Optional[str]] = []
+        self.block_id: Optional[str] = None
+
+    def emit(self, op: int, arg: Any = None) -> int:
+        self.code.append((op, arg))
+        self.block_ids.append(self.block_id)
+        return len(self.code) - 1
+
+    def patch(self, index: int, target: Optional[int] = None) -> None:
+        op, _ = self.code[index]
+        self.code[index] = (op, len(self.code) if target is None else target)
+
+    def sequence(self, blocks: List[Dict[str, Any]]) -> None:
+        index = 0
+        while index < len(blocks):
+            block = blocks[index]
+            if block.get("type") == "if":
+                chain = [block]
+                index += 1
+                while index < len(blocks) and blocks[index].get("type") == "elif":
+                    chain.append(blocks[index])
+                    index += 1
+                if index < len(blocks) and blocks[index].get("type") == "else":
+                    chain.append(blocks[index])
+                    index += 1
+                self.conditional(chain)
+                continue
+            self.statement(block)
+            index += 1
+
+    def body(self, block: Dict[str, Any]) -> None:
+        self.sequence(block.get("nestedBlocks") or [])
+
+    def statement(self, block: Dict[str, Any]) -> None:
+        self.block_id = block.get("id")
+        block_type = block.get("type")
+        if block_type == "start":
+            return
+        if block_type == "setVariable":
+            self.expression(block, "value")
+            self.emit(STORE, block_name(block, "name"))
+        elif block_type == "changeVariable":
+            name = block_name(block, "name")
+            self.emit(LOAD, name)
+            self.expression(block, "value")
+            self.emit(BINARY, operator.add)
+            self.emit(STORE, name)
+        elif block_type == "useVariable":
+            self.emit(LOAD, block_name(block, "variable"))
+            self.emit(PRINT)
+        elif block_type in BLOCK_OPERATORS:
+            self.expression(block, "left")
+            self.expression(block, "right")
+            self.emit(BINARY, BLOCK_OPERATORS[block_type])
+            if block.get("name"):
+                self.emit(STORE, block_name(block, "name"))
+            else:
+                self.emit(PRINT)
+        elif block_type == "whileLoop":
+            top = len(self.code)
+            self.expression(block, "condition")
+            exit_jump = self.emit(JUMP_IF_FALSE)
+            self.body(block)
+            self.block_id = block.get("id")
+            self.emit(JUMP, top)
+            self.patch(exit_jump)
+        elif block_type == "forLoop":
+            self.for_loop(block)
+        elif block_type in ("elif", "else"):
+            raise BlockCompileError(
+                f"{block_type} block must follow an if block", block.get("id")
+            )
+        else:
+            raise UnsupportedProgram(f"{block_type} blocks run in the sandbox")
+
+    def conditional(self, chain: List[Dict[str, Any]]) -> None:
+        end_jumps = []
+        for block in chain:
+            self.block_id = block.get("id")
+            next_jump = None
+            if block.get("type") != "else":
+                self.expression(block, "condition")
+                next_jump = self.emit(JUMP_IF_FALSE)
+            self.body(block)
+            if next_jump is not None:
+                self.block_id = block.get("id")
+                end_jumps.append(self.emit(JUMP))
+                self.patch(next_jump)
+        for jump in end_jumps:
+            self.patch(jump)
+
+    def for_loop(self, block: Dict[str, Any]) -> None:
+        """``for N`` repeats N times; ``for target in iterable`` iterates"""
+        condition = block_text(block, "condition")
+        tree = _parse(condition, block)
+        if isinstance(tree, ast.Compare):
+            if (
+                len(tree.ops) != 1
+                or not isinstance(tree.ops[0], ast.In)
+                or not isinstance(tree.left, ast.Name)
+            ):
+                raise BlockCompileError(
+                    f"'{condition}' is not a valid loop clause (try 'i in range(10)')",
+                    block.get("id"),
+                )
+            target = tree.left.id
+            self.node(tree.comparators[0])
+        else:
+            target = None
+            self.node(tree)
+            self.emit(CALL, ("range", 1))
+        self.emit(GET_ITER)
+        top = self.emit(FOR_ITER)
+        if target:
+            self.emit(STORE, target)
+        else:
+            self.emit(POP)
+        self.body(block)
+        self.block_id = block.get("id")
+        self.emit(JUMP, top)
+        self.patch(top)
+
+    def expression(self, block: Dict[str, Any], field: str) -> None:
+        self.block_id = block.get("id")
+        self.node(_parse(block_text(block, field), block))
+
+    def node(self, node: ast.AST) -> None:
+        if isinstance(node, ast.Constant):
+            if not isinstance(node.value, CONSTANT_TYPES):
+                raise UnsupportedProgram(f"Unsupported literal: {node.value!r}")
+            self.emit(PUSH, node.value)
+        elif isinstance(node, ast.Name):
+            self.emit(LOAD, node.id)
+        elif isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+            self.node(node.left)
+            self.node(node.right)
+            self.emit(BINARY, BINARY_OPERATORS[type(node.op)])
+        elif isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+            self.node(node.operand)
+            self.emit(UNARY, UNARY_OPERATORS[type(node.op)])
+        elif isinstance(node, ast.BoolOp):
+            jump_op = (
+                JUMP_IF_FALSE_OR_POP
+                if isinstance(node.op, ast.And)
+                else JUMP_IF_TRUE_OR_POP
+            )
+            jumps = []
+            for value in node.values[:-1]:
+                self.node(value)
+                jumps.append(self.emit(jump_op))
+            self.node(node.values[-1])
+            for jump in jumps:
+                self.patch(jump)
+        elif isinstance(node, ast.Compare):
+            self.compare(node)
+        elif isinstance(node, ast.IfExp):
+            self.node(node.test)
+            else_jump = self.emit(JUMP_IF_FALSE)
+            self.node(node.body)
+            end_jump = self.emit(JUMP)
+            self.patch(else_jump)
+            self.node(node.orelse)
+            self.patch(end_jump)
+        elif (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and node.func.id in BUILTINS
+            and not node.keywords
+            and not any(isinstance(arg, ast.Starred) for arg in node.args)
+        ):
+            for arg in node.args:
+                self.node(arg)
+            self.emit(CALL, (node.func.id, len(node.args)))
+        else:
+            raise UnsupportedProgram(f"Unsupported expression: {ast.dump(node)}")
+
+    def compare(self, node: ast.Compare) -> None:
+        if any(type(op) not in COMPARE_OPERATORS for op in node.ops):
+            raise UnsupportedProgram("Unsupported comparison")
+        if len(node.ops) > 1:
+            # a < b < c  ->  (a < b) and (b < c); operands must be side-effect free
+            operands = [node.left] + node.comparators
+            if any(isinstance(n, ast.Call) for o in operands for n in ast.walk(o)):
+                raise UnsupportedProgram("Chained comparison with calls")
+            pairs = [
+                ast.Compare(left=left, ops=[op], comparators=[right])
+                for left, op, right in zip(operands, node.ops, operands[1:])
+            ]
+            self.node(ast.BoolOp(op=ast.And(), values=pairs))
+            return
+        self.node(node.left)
+        self.node(node.comparators[0])
+        self.emit(COMPARE, COMPARE_OPERATORS[type(node.ops[0])])
+
+
+def _parse(expression: str, block: Dict[str, Any]) -> ast.AST:
+    try:
+        return ast.parse(expression, mode="eval").body
+    except SyntaxError:
+        raise BlockCompileError(
+            f"'{expression}' is not a valid expression", block.get("id")
+        )
+
+
+def compile_blocks(
+    structure: Union[Dict[str, Any], List[Dict[str, Any]]],
+) -> BlockProgram:
+    """
+    Compile a block structure for the VM
+
+    Raises:
+        BlockCompileError: the program is invalid
+        UnsupportedProgram: valid, but must run as Python in the sandbox
+    """
+    assembler = _Assembler()
+    assembler.sequence(program_order(top_level_blocks(structure)))
+    return BlockProgram(assembler.code, assembler.block_ids)
+
+
+def step_budget(time_limit_ms: int) -> int:
+    """Instructions a block program may execute within a problem's time limit"""
+    return max(1, time_limit_ms) * settings.JUDGE_BLOCK_VM_STEPS_PER_MS
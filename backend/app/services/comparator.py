@@ -0,0 +1,407 @@
+"""
+Streaming output comparator for the judge.
+
+The program's stdout (a file) and the expected output (a string held by the
+test-case cache, or a file in the test data store) are both consumed in
+fixed-size chunks, normalized according to the problem's compare mode, and
+compared in lockstep. Comparison stops at the first difference and reports
+its line and column. Memory use is bounded by the chunk size, not by the
+size of either output.
+
+Compare modes:
+    exact       character-for-character (line endings are normalized)
+    lines       ignore trailing whitespace on each line and trailing blank
+                lines (the judge's historical behaviour, and the default)
+    whitespace  ignore all whitespace
+    tokens      compare whitespace-separated tokens
+    float       tokens, with numeric tokens equal within a tolerance
+"""
+
+import math
+import re
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO, Tuple, Union
+
+COMPARE_MODES = ("exact", "lines", "whitespace", "tokens", "float")
+DEFAULT_COMPARE_MODE = "lines"
+DEFAULT_FLOAT_TOLERANCE = 1e-6
+
+CHUNK_CHARS = 64 * 1024
+# Float-mode tokens are carried across chunks whole up to this length
+MAX_TOKEN_CHARS = 1024
+SNIPPET_CHARS = 32
+
+_WORD = re.compile(r"\S+")
+_TRAILING_SPACE = re.compile(r"[^\S\n]+(?=\n)")
+
+Position = Tuple[int, int]
+Source = Union[str, TextIO]
+
+
+def _advance(text: str, at: Position, offset: int) -> Position:
+    """Position of ``text[offset]`` given that ``text`` starts at ``at``"""
+    newlines = text.count("\n", 0, offset)
+    if not newlines:
+        return at[0], at[1] + offset
+    return at[0] + newlines, offset - text.rfind("\n", 0, offset)
+
+
+class _ChunkReader:
+    """
+    Yields (chunk, position) from a text stream or a string, with line
+    endings normalized to "\\n"
+    """
+
+    def __init__(self, source: Source):
+        self.source = source
+        self.position: Position = (1, 1)
+
+    def _raw_chunks(self) -> Iterator[str]:
+        if isinstance(self.source, str):
+            # Slice rather than wrap in StringIO, which would copy the string
+            for start in range(0, len(self.source), CHUNK_CHARS):
+                yield self.source[start : start + CHUNK_CHARS]
+        else:
+            while True:
+                chunk = self.source.read(CHUNK_CHARS)
+                if not chunk:
+                    return
+                yield chunk
+
+    def __iter__(self) -> Iterator[Tuple[str, Position]]:
+        held = ""
+        for chunk in self._raw_chunks():
+            chunk = held + chunk
+            # A "\r" at the end may be the first half of a "\r\n"
+            held = "\r" if chunk.endswith("\r") else ""
+            if held:
+                chunk = chunk[:-1]
+            if "\r" in chunk:
+                chunk = chunk.replace("\r\n", "\n").replace("\r", "\n")
+            if chunk:
+                yield from self._emit(chunk)
+        if held:
+            yield from self._emit("\n")
+
+    def _emit(self, chunk: str) -> Iterator[Tuple[str, Position]]:
+        at = self.position
+        self.position = _advance(chunk, at, len(chunk))
+        yield chunk, at
+
+
+# A normalized segment of one output: its text and a function mapping an
+# offset in that text back to a (line, column) in the output
+Segment = Tuple[str, Callable[[int], Position]]
+
+
+def _exact_segments(reader: _ChunkReader) -> Iterator[Segment]:
+    for chunk, at in reader:
+        yield chunk, lambda offset, chunk=chunk, at=at: _advance(chunk, at, offset)
+
+
+def _line_segments(reader: _ChunkReader) -> Iterator[Segment]:
+    # Trailing whitespace (newlines included) at the end of a chunk is held
+    # back until something visible follows it, so trailing blank lines at the
+    # end of the output are never emitted
+    tail = ""
+    tail_at: Position = (1, 1)
+    for chunk, at in reader:
+        if tail:
+            text, text_at = tail + chunk, tail_at
+        else:
+            text, text_at = chunk, at
+        body = text.rstrip()
+        tail = text[len(body) :]
+        if tail:
+            tail_at = _advance(text, text_at, len(body))
+            # Keep only the newlines of whitespace-only runs
+            tail = _TRAILING_SPACE.sub("", tail)
+        if body:
+            normalized = _TRAILING_SPACE.sub("", body)
+            yield normalized, lambda offset, normalized=normalized, at=text_at: (
+                _advance(normalized, at, offset)
+            )
+
+
+def _word_locator(
+    chunk: str, at: Position, separator: str, gap_at: Optional[Position]
+) -> Callable[[int], Position]:
+    """Map an offset in (separator +) ``separator.join(chunk.split())`` back to ``chunk``"""
+
+    def locate(offset: int) -> Position:
+        if gap_at is not None:
+            if offset < len(separator):
+                return gap_at
+            offset -= len(separator)
+        position = 0
+        end = 0
+        for match in _WORD.finditer(chunk):
+            length = match.end() - match.start()
+            if offset < position + length:
+                return _advance(chunk, at, match.start() + offset - position)
+            position += length + len(separator)
+            end = match.end()
+            if offset < position:
+                break
+        return _advance(chunk, at, end)
+
+    return locate
+
+
+def _word_segments(reader: _ChunkReader, separator: str) -> Iterator[Segment]:
+    # ``separator`` is emitted once between words that had any whitespace
+    # between them; a word split across two chunks is rejoined simply by
+    # its halves being adjacent in the normalized stream
+    seen_word = False
+    gap_at: Optional[Position] = None
+    for chunk, at in reader:
+        words = chunk.split()
+        if not words:
+            gap_at = gap_at or at
+            continue
+        if chunk[0].isspace():
+            gap_at = gap_at or at
+        prefix_gap = gap_at if separator and seen_word and gap_at else None
+        text = separator.join(words)
+        if prefix_gap is not None:
+            text = separator + text
+        yield text, _word_locator(chunk, at, separator, prefix_gap)
+
+        seen_word = True
+        gap_at = None
+        if chunk[-1].isspace():
+            gap_at = _advance(chunk, at, len(chunk.rstrip()))
+
+
+def _segments(reader: _ChunkReader, mode: str) -> Iterator[Segment]:
+    if mode == "exact":
+        return _exact_segments(reader)
+    if mode == "whitespace":
+        return _word_segments(reader, "")
+    if mode == "tokens":
+        return _word_segments(reader, " ")
+    return _line_segments(reader)
+
+
+def _describe(snippet: str) -> str:
+    return repr(snippet) if snippet else "end of output"
+
+
+def _mismatch(
+    actual_at: Position, expected_at: Position, actual: str, expected: str
+) -> Dict[str, Any]:
+    actual = actual[:SNIPPET_CHARS]
+    expected = expected[:SNIPPET_CHARS]
+    return {
+        "line": actual_at[0],
+        "column": actual_at[1],
+        "expected_line": expected_at[0],
+        "expected_column": expected_at[1],
+        "actual": actual,
+        "expected": expected,
+        "message": (
+            f"Line {actual_at[0]}, column {actual_at[1]}: "
+            f"expected {_describe(expected)}, got {_describe(actual)}"
+        ),
+    }
+
+
+def _compare_text(
+    actual_reader: _ChunkReader, expected_reader: _ChunkReader, mode: str
+) -> Optional[Dict[str, Any]]:
+    actual_segments = _segments(actual_reader, mode)
+    expected_segments = _segments(expected_reader, mode)
+    actual = next(actual_segments, None)
+    expected = next(expected_segments, None)
+    actual_offset = expected_offset = 0
+
+    while actual is not None and expected is not None:
+        actual_text, expected_text = actual[0], expected[0]
+        count = min(
+            len(actual_text) - actual_offset, len(expected_text) - expected_offset
+        )
+        actual_part = actual_text[actual_offset : actual_offset + count]
+        expected_part = expected_text[expected_offset : expected_offset + count]
+        if actual_part != expected_part:
+            index = next(
+                i for i, (a, b) in enumerate(zip(actual_part, expected_part)) if a != b
+            )
+            return _mismatch(
+                actual[1](actual_offset + index),
+                expected[1](expected_offset + index),
+                actual_text[actual_offset + index :],
+                expected_text[expected_offset + index :],
+            )
+
+        actual_offset += count
+        expected_offset += count
+        if actual_offset == len(actual_text):
+            actual, actual_offset = next(actual_segments, None), 0
+        if expected_offset == len(expected_text):
+            expected, expected_offset = next(expected_segments, None), 0
+
+    if actual is None and expected is None:
+        return None
+    if actual is None:
+        return _mismatch(
+            actual_reader.position,
+            expected[1](expected_offset),
+            "",
+            expected[0][expected_offset:],
+        )
+    return _mismatch(
+        actual[1](actual_offset),
+        expected_reader.position,
+        actual[0][actual_offset:],
+        "",
+    )
+
+
+# A batch of whole tokens and a function mapping a token's index to its position
+TokenBatch = Tuple[List[str], Callable[[int], Position]]
+
+
+def _token_batches(reader: _ChunkReader) -> Iterator[TokenBatch]:
+    partial = ""
+    partial_at: Position = (1, 1)
+    for chunk, at in reader:
+        tokens = chunk.split()
+        if not tokens:
+            if partial:
+                yield [partial], lambda index, at=partial_at: at
+                partial = ""
+            continue
+
+        carried = None
+        if partial:
+            if chunk[0].isspace():
+                yield [partial], lambda index, at=partial_at: at
+            else:
+                tokens[0] = partial + tokens[0]
+                carried = partial_at
+            partial = ""
+
+        if not chunk[-1].isspace():
+            last = tokens.pop()
+            if len(last) < MAX_TOKEN_CHARS:
+                partial = last
+                if carried and not tokens:
+                    partial_at = carried
+                else:
+                    partial_at = _advance(chunk, at, len(chunk) - len(last))
+            else:
+                tokens.append(last)
+
+        if tokens:
+            yield tokens, _token_locator(chunk, at, carried)
+    if partial:
+        yield [partial], lambda index, at=partial_at: at
+
+
+def _token_locator(
+    chunk: str, at: Position, carried: Optional[Position]
+) -> Callable[[int], Position]:
+    def locate(index: int) -> Position:
+        if index == 0 and carried is not None:
+            return carried
+        match = next(islice(_WORD.finditer(chunk), index, None))
+        return _advance(chunk, at, match.start())
+
+    return locate
+
+
+def _numbers_close(actual: str, expected: str, tolerance: float) -> bool:
+    try:
+        a = float(actual)
+        b = float(expected)
+    except ValueError:
+        return False
+    if math.isnan(a) or math.isnan(b):
+        return math.isnan(a) and math.isnan(b)
+    # Absolute tolerance for small values, relative for large ones
+    return abs(a - b) <= tolerance * max(1.0, abs(b))
+
+
+def _compare_tokens(
+    actual_reader: _ChunkReader, expected_reader: _ChunkReader, tolerance: float
+) -> Optional[Dict[str, Any]]:
+    actual_batches = _token_batches(actual_reader)
+    expected_batches = _token_batches(expected_reader)
+    actual = next(actual_batches, None)
+    expected = next(expected_batches, None)
+    actual_index = expected_index = 0
+
+    while actual is not None and expected is not None:
+        actual_tokens, expected_tokens = actual[0], expected[0]
+        count = min(
+            len(actual_tokens) - actual_index, len(expected_tokens) - expected_index
+        )
+        actual_part = actual_tokens[actual_index : actual_index + count]
+        expected_part = expected_tokens[expected_index : expected_index + count]
+        if actual_part != expected_part:
+            for i, (a, b) in enumerate(zip(actual_part, expected_part)):
+                if a != b and not _numbers_close(a, b, tolerance):
+                    return _mismatch(
+                        actual[1](actual_index + i),
+                        expected[1](expected_index + i),
+                        a,
+                        b,
+                    )
+
+        actual_index += count
+        expected_index += count
+        if actual_index == len(actual_tokens):
+            actual, actual_index = next(actual_batches, None), 0
+        if expected_index == len(expected_tokens):
+            expected, expected_index = next(expected_batches, None), 0
+
+    if actual is None and expected is None:
+        return None
+    if actual is None:
+        return _mismatch(
+            actual_reader.position,
+            expected[1](expected_index),
+            "",
+            expected[0][expected_index],
+        )
+    return _mismatch(
+        actual[1](actual_index),
+        expected_reader.position,
+        actual[0][actual_index],
+        "",
+    )
+
+
+def compare_streams(
+    actual: Source,
+    expected: Source,
+    mode: str = DEFAULT_COMPARE_MODE,
+    tolerance: Optional[float] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Compare two outputs (text streams or strings), stopping at the first difference
+
+    Returns:
+        None if they match, otherwise the first mismatch: its line and column
+        in each output, short snippets from both sides and a readable message
+    """
+    actual_reader = _ChunkReader(actual)
+    expected_reader = _ChunkReader(expected)
+    if mode == "float":
+        if tolerance is None:
+            tolerance = DEFAULT_FLOAT_TOLERANCE
+        return _compare_tokens(actual_reader, expected_reader, tolerance)
+    return _compare_text(actual_reader, expected_reader, mode)
+
+
+def compare_output(
+    actual_path: str,
+    expected: Source,
+    mode: str = DEFAULT_COMPARE_MODE,
+    tolerance: Optional[float] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Compare a program's stdout file against a test case's expected output
+    """
+    with open(actual_path, "r", encoding="utf-8", errors="replace") as actual:
+        return compare_streams(actual, expected, mode, tolerance)
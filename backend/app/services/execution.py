@@ -0,0 +1,906 @@
+"""
+Judge engine: leases submissions from the durable judge queue
+(app/services/submission_queue.py) and runs them against their test cases on a
+pool of worker processes (one per core by default).
+
+Run it as a standalone process next to the API:
+
+    python -m app.services.execution
+"""
+
+import logging
+import os
+import pwd
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import lru_cache, partial
+from typing import Any, Callable, ContextManager, Dict, List, Optional, TextIO, Union
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.models.problem import Problem, Submission, TestCase
+from app.services.block_compiler import (
+    BlockCompileError,
+    CompiledProgram,
+    block_compiler,
+)
+from app.services.block_vm import UnsupportedProgram, compile_blocks, step_budget
+from app.services.comparator import (
+    DEFAULT_COMPARE_MODE,
+    compare_output,
+    compare_streams,
+)
+from app.services.problem_stats import problem_stats
+from app.services.runner_pool import RUNNER_COMMANDS, RunnerError, runner_pool
+from app.services.sandbox import check_isolation, run_process
+from app.services.submission_queue import SubmissionQueue, submission_queue
+from app.services.test_case_cache import TestSet, test_case_cache
+from app.services.test_data_store import test_data_store
+from app.services.verdict_cache import verdict_cache
+
+logger = logging.getLogger(__name__)
+
+
+# Per-language build and run recipes. ``{memory}`` is replaced with the
+# problem's memory limit in MB. Runtimes that reserve large virtual address
+# ranges up front (the JVM, V8) are limited through their own flags instead of
+# RLIMIT_AS, and get a time multiplier to absorb their startup cost.
+LANGUAGES: Dict[str, Dict[str, Any]] = {
+    "python": {
+        "source": "main.py",
+        "compile": None,
+        "run": [sys.executable, "-I", "main.py"],
+        "limit_address_space": True,
+        "time_multiplier": 1.0,
+    },
+    "java": {
+        "source": "Main.java",
+        "compile": ["javac", "-encoding", "UTF-8", "Main.java"],
+        "run": ["java", "-Xmx{memory}m", "-Xss64m", "-XX:+UseSerialGC", "Main"],
+        "limit_address_space": False,
+        "time_multiplier": 2.0,
+    },
+    "c": {
+        "source": "main.c",
+        "compile": ["gcc", "-O2", "-std=c11", "-o", "main", "main.c", "-lm"],
+        "run": ["./main"],
+        "limit_address_space": True,
+        "time_multiplier": 1.0,
+    },
+    "cpp": {
+        "source": "main.cpp",
+        "compile": ["g++", "-O2", "-std=c++17", "-o", "main", "main.cpp"],
+        "run": ["./main"],
+        "limit_address_space": True,
+        "time_multiplier": 1.0,
+    },
+    "javascript": {
+        "source": "main.js",
+        "compile": None,
+        "run": ["node", "--max-old-space-size={memory}", "main.js"],
+        "limit_address_space": False,
+        "time_multiplier": 1.5,
+    },
+}
+
+LANGUAGE_ALIASES = {
+    "python3": "python",
+    "py": "python",
+    # Block programs are compiled to Python on submission (block_compiler.py)
+    "blocks": "python",
+    "c++": "cpp",
+    "js": "javascript",
+    "node": "javascript",
+}
+
+COMPILE_TIME_LIMIT_MS = 10000
+SAMPLE_OUTPUT_PREVIEW_BYTES = 1024
+
+# The checkout the judge runs from: settings, .env and the application code
+BACKEND_ROOT = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+
+def resolve_language(language: str) -> Optional[str]:
+    """
+    Map a submission's language name onto a key of LANGUAGES
+    """
+    name = (language or "").strip().lower()
+    name = LANGUAGE_ALIASES.get(name, name)
+    return name if name in LANGUAGES else None
+
+
+def classify_run(
+    run: Dict[str, Any],
+    time_limit_ms: int,
+    memory_limit_mb: Optional[int],
+    max_output_bytes: int = settings.JUDGE_MAX_OUTPUT_BYTES,
+) -> Optional[str]:
+    """
+    Return a failure verdict for a finished run, or None if it exited cleanly
+    """
+    if run["timed_out"] or run["cpu_ms"] > time_limit_ms:
+        return "time_limit_exceeded"
+    if memory_limit_mb and run["memory_kb"] > memory_limit_mb * 1024:
+        return "memory_limit_exceeded"
+    # CPython ignores SIGXFSZ, so a Python program over RLIMIT_FSIZE gets
+    # EFBIG and a traceback instead; a full stdout file gives it away
+    if (
+        run["exit_code"] == -signal.SIGXFSZ
+        or run.get("stdout_bytes", 0) >= max_output_bytes
+    ):
+        return "output_limit_exceeded"
+    if run["exit_code"] != 0:
+        if "MemoryError" in run["stderr"] or "OutOfMemoryError" in run["stderr"]:
+            return "memory_limit_exceeded"
+        return "runtime_error"
+    return None
+
+
+@lru_cache(maxsize=1)
+def sandbox_isolation() -> Optional[Dict[str, Any]]:
+    """
+    How submissions are cut off from the judge (see sandbox.isolate), or None
+    when JUDGE_SANDBOX_USER is empty
+    """
+    if not settings.JUDGE_SANDBOX_USER:
+        return None
+    user = pwd.getpwnam(settings.JUDGE_SANDBOX_USER)
+    return {"uid": user.pw_uid, "gid": user.pw_gid, "hide": _hidden_paths()}
+
+
+def _hidden_paths() -> List[str]:
+    hidden = [settings.TEST_DATA_DIR] if settings.TEST_DATA_DIR else []
+    prefix = os.path.realpath(sys.prefix)
+    if not _inside(prefix, BACKEND_ROOT):
+        return hidden + [BACKEND_ROOT]
+    # A virtualenv inside the checkout has to stay visible for the interpreter
+    # to start; everything next to it is hidden
+    for name in os.listdir(BACKEND_ROOT):
+        path = os.path.join(BACKEND_ROOT, name)
+        if not _inside(prefix, path):
+            hidden.append(path)
+    return hidden
+
+
+def _inside(path: str, directory: str) -> bool:
+    directory = os.path.realpath(directory)
+    return os.path.commonpath([path, directory]) == directory
+
+
+class JudgeAbort(Exception):
+    """Stops judging early with a final result (compile error, missing runtime)"""
+
+    def __init__(self, result: Dict[str, Any]):
+        super().__init__(result["status"])
+        self.result = result
+
+
+class SubmissionJudge:
+    """
+    Judges one submission inside a pool worker process.
+
+    Only touches the payload and the filesystem - never the database.
+    Languages with a warm runner use it; everything else (or a runner that
+    breaks) falls back to a cold spawn per test. In fail-fast mode judging
+    stops at the first test that is not accepted and the rest are skipped.
+
+    ``payload["parallelism"]`` lanes run tests concurrently. Each lane pulls
+    the next test index from a shared counter (so slow tests do not hold up a
+    fixed share of the work) and, on the warm path, drives its own runner.
+    Results are merged back by index.
+    """
+
+    def __init__(self, payload: Dict[str, Any]):
+        self.payload = payload
+        self.language = resolve_language(payload["language"])
+        self.tests = payload["tests"]
+        self.fail_fast = payload.get("judge_mode") == "fail_fast"
+        self.parallelism = max(1, min(payload.get("parallelism", 1), len(self.tests)))
+        self.memory_limit = payload["memory_limit"]
+        self.results: Dict[int, Dict[str, Any]] = {}
+        self.files: List[Dict[str, str]] = []
+        self.work_dir = ""
+        self.run_dir = ""
+        self.isolation = sandbox_isolation()
+        self.block_program: Optional[CompiledProgram] = None
+        self._lock = threading.Lock()
+        self._next_index = 0
+        self._stop_at: Optional[int] = None
+        self._compile_error: Optional[str] = None
+        if self.language:
+            self.spec = LANGUAGES[self.language]
+            self.time_limit = int(payload["time_limit"] * self.spec["time_multiplier"])
+            self.run_memory_limit = (
+                self.memory_limit if self.spec["limit_address_space"] else None
+            )
+
+    def judge(self) -> Dict[str, Any]:
+        if self.language is None:
+            return _compilation_error(
+                f"Unsupported language: {self.payload['language']}"
+            )
+
+        if self.payload.get("block_structure") is not None:
+            result = self._judge_in_vm()
+            if result is not None:
+                return result
+            # Runs as the generated Python; its tracebacks map back to blocks
+            self.block_program = block_compiler.compile(self.payload["block_structure"])
+
+        # Test files stay in the judge's own directory; the submission runs in
+        # an empty one of its own
+        self.work_dir = tempfile.mkdtemp(prefix="judge-", dir=settings.JUDGE_WORK_DIR)
+        self.run_dir = tempfile.mkdtemp(prefix="run-", dir=settings.JUDGE_WORK_DIR)
+        try:
+            if self.isolation:
+                os.chown(self.run_dir, self.isolation["uid"], self.isolation["gid"])
+            self._write_inputs()
+            judged = False
+            if runner_pool.supports(self.language):
+                try:
+                    self._fan_out(self._warm_lane)
+                    judged = True
+                except RunnerError as e:
+                    logger.warning(
+                        f"Warm {self.language} runner failed, "
+                        f"falling back to cold spawn: {str(e)}"
+                    )
+                    self._reset()
+            if not judged:
+                self._prepare_cold()
+                self._fan_out(self._cold_lane)
+
+            if self._compile_error is not None:
+                return _compilation_error(self._compile_error)
+            return summarize_results(self._ordered_results(), self.tests)
+        except JudgeAbort as e:
+            return e.result
+        finally:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+            shutil.rmtree(self.run_dir, ignore_errors=True)
+
+    def _judge_in_vm(self) -> Optional[Dict[str, Any]]:
+        """
+        Run a block program in the in-process VM (app/services/block_vm.py)
+
+        Returns:
+            The verdict, or None if the program needs the sandbox
+        """
+        try:
+            program = compile_blocks(self.payload["block_structure"])
+        except UnsupportedProgram:
+            return None
+        except BlockCompileError as e:
+            return _compilation_error(e.message, e.block_id)
+
+        max_steps = step_budget(self.payload["time_limit"])
+        memory_bytes = self.memory_limit * 1024 * 1024
+        self.time_limit = self.payload["time_limit"]
+        while True:
+            taken = self._take(1)
+            if not taken:
+                break
+            run = program.run(
+                _test_input(self.tests[taken[0]]),
+                max_steps,
+                memory_bytes,
+                settings.JUDGE_MAX_OUTPUT_BYTES,
+                self.payload["time_limit"],
+            )
+            self._record(taken[0], run)
+        return summarize_results(self._ordered_results(), self.tests)
+
+    def _write_inputs(self) -> None:
+        for index, test in enumerate(self.tests):
+            # Stored inputs are used in place rather than copied. Like the files
+            # written here they are opened on the judge's side, before the
+            # child is isolated, and reach the submission only as its stdin.
+            stdin_path = test.get("input_path")
+            if stdin_path is None:
+                stdin_path = os.path.join(self.work_dir, f".stdin-{index}")
+                with open(stdin_path, "w", encoding="utf-8") as f:
+                    f.write(test["input"])
+            self.files.append(
+                {
+                    "stdin": stdin_path,
+                    "stdout": os.path.join(self.work_dir, f".stdout-{index}"),
+                    "stderr": os.path.join(self.work_dir, f".stderr-{index}"),
+                }
+            )
+
+    def _reset(self) -> None:
+        self.results.clear()
+        self._next_index = 0
+        self._stop_at = None
+        self._compile_error = None
+
+    def _take(self, count: int) -> List[int]:
+        """
+        Claim the next ``count`` test indices, stopping after a fail-fast failure
+        """
+        with self._lock:
+            end = len(self.tests)
+            if self._stop_at is not None:
+                end = min(end, self._stop_at)
+            if self._compile_error is not None:
+                end = 0
+            taken = list(range(self._next_index, min(end, self._next_index + count)))
+            self._next_index += len(taken)
+            return taken
+
+    def _record(self, index: int, run: Dict[str, Any]) -> None:
+        if self.block_program is not None and run["exit_code"]:
+            run["block_id"] = self.block_program.block_for_traceback(
+                run["stderr"], self.spec["source"]
+            )
+        result = evaluate_run(
+            self.tests[index],
+            run,
+            self.time_limit,
+            self.memory_limit,
+            self.payload.get("compare_mode", DEFAULT_COMPARE_MODE),
+            self.payload.get("float_tolerance"),
+        )
+        with self._lock:
+            self.results[index] = result
+            if self.fail_fast and result["status"] != "accepted":
+                if self._stop_at is None or index < self._stop_at:
+                    self._stop_at = index
+
+    def _ordered_results(self) -> List[Dict[str, Any]]:
+        """
+        One entry per test in test order. In fail-fast mode everything after
+        the first failure is skipped, even if a parallel lane already ran it.
+        """
+        ordered = []
+        for index, test in enumerate(self.tests):
+            result = self.results.get(index)
+            if result is None or (self._stop_at is not None and index > self._stop_at):
+                result = {
+                    "test_case_id": test["id"],
+                    "status": "skipped",
+                    "is_sample": test["is_sample"],
+                }
+            ordered.append(result)
+        return ordered
+
+    def _fan_out(self, lane: Callable[[], None]) -> None:
+        """
+        Run ``lane`` on ``parallelism`` threads. The threads only wait on
+        runner/child processes, which do the actual work on other cores.
+        """
+        if self.parallelism == 1:
+            lane()
+            return
+        with ThreadPoolExecutor(max_workers=self.parallelism) as lanes:
+            futures = [lanes.submit(lane) for _ in range(self.parallelism)]
+            for future in futures:
+                future.result()
+
+    def _batch_size(self) -> int:
+        # A lone full-scoring lane sends the whole batch in one round trip;
+        # fail-fast and parallel lanes take one test at a time.
+        if self.fail_fast or self.parallelism > 1:
+            return 1
+        return max(1, len(self.tests))
+
+    def _warm_lane(self) -> None:
+        with runner_pool.runner(self.language) as runner:
+            error = runner.load(self.payload["code"], self.spec["source"])
+            if error is not None:
+                with self._lock:
+                    self._compile_error = error
+                return
+
+            indices = self._take(self._batch_size())
+            while indices:
+                runs = runner.run(
+                    self.run_dir,
+                    [self.files[index] for index in indices],
+                    self.time_limit,
+                    self.run_memory_limit,
+                    settings.JUDGE_MAX_OUTPUT_BYTES,
+                    self.isolation,
+                )
+                for index, run in zip(indices, runs):
+                    self._record(index, run)
+                indices = self._take(self._batch_size())
+
+    def _prepare_cold(self) -> None:
+        source_path = os.path.join(self.run_dir, self.spec["source"])
+        with open(source_path, "w", encoding="utf-8") as f:
+            f.write(self.payload["code"])
+
+        if self.spec["compile"]:
+            try:
+                compiled = run_process(
+                    self.spec["compile"],
+                    self.run_dir,
+                    None,
+                    COMPILE_TIME_LIMIT_MS,
+                    None,
+                    settings.JUDGE_MAX_OUTPUT_BYTES,
+                    stdout_path=os.path.join(self.work_dir, ".compile-stdout"),
+                    stderr_path=os.path.join(self.work_dir, ".compile-stderr"),
+                    isolation=self.isolation,
+                )
+            except FileNotFoundError:
+                raise JudgeAbort(
+                    _internal_error(f"Compiler for {self.language} is not installed")
+                )
+            except PermissionError:
+                raise JudgeAbort(
+                    _internal_error(
+                        f"Compiler for {self.language} is not executable by "
+                        f"{settings.JUDGE_SANDBOX_USER}"
+                    )
+                )
+            if compiled["timed_out"] or compiled["exit_code"] != 0:
+                raise JudgeAbort(_compilation_error(compiled["stderr"]))
+
+    def _cold_lane(self) -> None:
+        command = [part.format(memory=self.memory_limit) for part in self.spec["run"]]
+        indices = self._take(1)
+        while indices:
+            index = indices[0]
+            try:
+                run = run_process(
+                    command,
+                    self.run_dir,
+                    self.files[index]["stdin"],
+                    self.time_limit,
+                    self.run_memory_limit,
+                    settings.JUDGE_MAX_OUTPUT_BYTES,
+                    stdout_path=self.files[index]["stdout"],
+                    stderr_path=self.files[index]["stderr"],
+                    isolation=self.isolation,
+                )
+            except FileNotFoundError:
+                raise JudgeAbort(
+                    _internal_error(f"Runtime for {self.language} is not installed")
+                )
+            except PermissionError:
+                raise JudgeAbort(
+                    _internal_error(
+                        f"Runtime for {self.language} is not executable by "
+                        f"{settings.JUDGE_SANDBOX_USER}"
+                    )
+                )
+            self._record(index, run)
+            indices = self._take(1)
+
+
+def judge_submission(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Pool entry point: judge one submission payload
+    """
+    return SubmissionJudge(payload).judge()
+
+
+def _test_input(test: Dict[str, Any]) -> str:
+    if "input_path" in test:
+        with open(test["input_path"], "r", encoding="utf-8", newline="") as f:
+            return f.read()
+    return test["input"]
+
+
+def _expected_output(test: Dict[str, Any]) -> ContextManager[Union[str, TextIO]]:
+    """
+    The expected output as a string, or for stored data an open file the
+    comparator reads in chunks
+    """
+    if "expected_path" in test:
+        return open(test["expected_path"], "r", encoding="utf-8", newline="")
+    return nullcontext(test["expected"])
+
+
+def evaluate_run(
+    test: Dict[str, Any],
+    run: Dict[str, Any],
+    time_limit: int,
+    memory_limit: int,
+    compare_mode: str = DEFAULT_COMPARE_MODE,
+    float_tolerance: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Turn one finished run into its entry in Submission.test_results
+    """
+    verdict = classify_run(run, time_limit, memory_limit)
+    mismatch = None
+    if verdict is None:
+        with _expected_output(test) as expected:
+            if "stdout" in run:
+                mismatch = compare_streams(
+                    run["stdout"], expected, compare_mode, float_tolerance
+                )
+            else:
+                mismatch = compare_output(
+                    run["stdout_path"], expected, compare_mode, float_tolerance
+                )
+        verdict = "wrong_answer" if mismatch else "accepted"
+
+    result = {
+        "test_case_id": test["id"],
+        "status": verdict,
+        "wall_time": run["wall_ms"],
+        "cpu_time": run["cpu_ms"],
+        "memory": run["memory_kb"],
+        "is_sample": test["is_sample"],
+    }
+    if verdict == "runtime_error" and run.get("block_id"):
+        # The block editor highlights the failing block
+        result["block_id"] = run["block_id"]
+    if test["is_sample"]:
+        if "stdout" in run:
+            result["output"] = run["stdout"][:SAMPLE_OUTPUT_PREVIEW_BYTES]
+        else:
+            with open(run["stdout_path"], "r", encoding="utf-8", errors="replace") as f:
+                result["output"] = f.read(SAMPLE_OUTPUT_PREVIEW_BYTES)
+        if verdict == "runtime_error":
+            result["message"] = run["stderr"]
+        elif mismatch:
+            result["message"] = mismatch["message"]
+    return result
+
+
+def summarize_results(
+    test_results: List[Dict[str, Any]], tests: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Fold per-test results into the submission's status, score and usage
+    """
+    weights = {test["id"]: test["weight"] or 1 for test in tests}
+    total_weight = sum(weights.values())
+    passed_weight = sum(
+        weights[r["test_case_id"]] for r in test_results if r["status"] == "accepted"
+    )
+    failed = next((r for r in test_results if r["status"] != "accepted"), None)
+
+    return {
+        "status": failed["status"] if failed else "accepted",
+        "score": round(100 * passed_weight / total_weight) if total_weight else 0,
+        "execution_time": max(
+            (r["wall_time"] for r in test_results if "wall_time" in r), default=None
+        ),
+        "memory_used": max(
+            (r["memory"] for r in test_results if "memory" in r), default=None
+        ),
+        "test_results": test_results,
+    }
+
+
+def _compilation_error(message: str, block_id: Optional[str] = None) -> Dict[str, Any]:
+    error = {"status": "compilation_error", "message": message}
+    if block_id:
+        error["block_id"] = block_id
+    return {"status": "compilation_error", "score": 0, "test_results": [error]}
+
+
+def _internal_error(message: str) -> Dict[str, Any]:
+    return {
+        "status": "internal_error",
+        "score": 0,
+        "test_results": [{"status": "internal_error", "message": message}],
+    }
+
+
+def _init_worker() -> None:
+    """Pool worker start-up: bring up warm runners before the first job"""
+    if settings.JUDGE_WARM_RUNNERS:
+        runner_pool.prewarm(list(RUNNER_COMMANDS))
+
+
+class JudgeEngine:
+    """
+    Drains the submission queue onto a process pool and writes verdicts back.
+
+    The dispatcher never leases more jobs than there are idle worker slots, so
+    claimed work starts immediately and the rest stays queued for other judge
+    processes. When the queue runs dry before the idle slots are filled, the
+    spare slots are shared out among the claimed jobs as per-submission
+    test fan-out; under a burst every job gets a single slot. A finished job
+    wakes the dispatcher straight away rather than waiting for the next poll.
+    Leases on in-flight jobs are renewed while they run; leases left behind by
+    crashed judges are returned to the queue.
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.JUDGE_WORKERS,
+        poll_interval: float = settings.JUDGE_POLL_INTERVAL_SECONDS,
+        queue: SubmissionQueue = submission_queue,
+    ):
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval
+        self.queue = queue
+        self.worker_id = queue.worker_id()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[str, Future] = {}  # job id -> future
+        self._slots: Dict[str, int] = {}  # job id -> cores it may use
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_maintenance = 0.0
+
+    def start(self) -> None:
+        """Run the dispatcher on a background thread"""
+        self._thread = threading.Thread(
+            target=self.run_forever, name="judge-dispatcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop claiming new work; in-flight jobs finish and are recorded"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def notify(self) -> None:
+        """Wake the dispatcher, e.g. right after a submission was created"""
+        self._wakeup.set()
+
+    def run_forever(self) -> None:
+        isolation = sandbox_isolation()
+        if isolation is None:
+            logger.warning(
+                "JUDGE_SANDBOX_USER is empty: submissions run as the judge's user"
+            )
+        else:
+            error = check_isolation(isolation)
+            if error is not None:
+                raise RuntimeError(f"Cannot isolate submissions: {error}")
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker
+        )
+        logger.info(
+            f"Judge engine {self.worker_id} started with {self.workers} workers"
+        )
+
+        try:
+            while not self._stop.is_set():
+                try:
+                    self._maintain_leases()
+                    with self._lock:
+                        idle = self.workers - sum(self._slots.values())
+                    if idle > 0:
+                        payloads = self._claim_jobs(idle)
+                        for index, payload in enumerate(payloads):
+                            # Block programs run in-process and need one slot
+                            tests = (
+                                1
+                                if payload.get("block_structure") is not None
+                                else len(payload["tests"])
+                            )
+                            payload["parallelism"] = self._fan_out_degree(
+                                idle, len(payloads), index, tests
+                            )
+                            self._dispatch(payload)
+                except Exception as e:
+                    logger.error(f"Judge dispatcher error: {str(e)}")
+
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+        finally:
+            self._executor.shutdown(wait=True)
+            logger.info("Judge engine stopped")
+
+    def _maintain_leases(self) -> None:
+        """
+        Renew our leases and reap expired ones, a few times per lease period
+        """
+        now = time.monotonic()
+        if now - self._last_maintenance < self.queue.lease_seconds / 3:
+            return
+        self._last_maintenance = now
+
+        with self._lock:
+            job_ids = list(self._inflight)
+        db = SessionLocal()
+        try:
+            self.queue.extend_leases(db, job_ids, self.worker_id)
+            reaped = self.queue.requeue_expired(db)
+            if reaped:
+                logger.warning(f"Requeued {reaped} jobs with expired leases")
+            logger.debug(f"Test-case cache: {test_case_cache.stats()}")
+        finally:
+            db.close()
+
+    @staticmethod
+    def _fan_out_degree(idle: int, claimed: int, index: int, tests: int) -> int:
+        """
+        Share ``idle`` slots among ``claimed`` jobs, capped by each job's test count
+        """
+        share = idle // claimed + (1 if index < idle % claimed else 0)
+        return max(1, min(share, tests, settings.JUDGE_MAX_FANOUT))
+
+    def _dispatch(self, payload: Dict[str, Any]) -> None:
+        job_id = payload["job_id"]
+        with self._lock:
+            self._slots[job_id] = payload["parallelism"]
+        future = self._executor.submit(judge_submission, payload)
+        with self._lock:
+            self._inflight[job_id] = future
+        future.add_done_callback(partial(self._on_done, payload))
+
+    def _claim_jobs(self, limit: int) -> List[Dict[str, Any]]:
+        """
+        Lease up to ``limit`` queued jobs and build their payloads
+        """
+        db = SessionLocal()
+        try:
+            payloads = []
+            for job in self.queue.claim(db, self.worker_id, limit):
+                submission = (
+                    db.query(Submission)
+                    .filter(Submission.id == job.submission_id)
+                    .first()
+                )
+                payload = self._build_payload(db, submission)
+                payload["job_id"] = job.id
+                if job.batch_id and self._settle_from_cache(db, payload):
+                    continue
+                payloads.append(payload)
+            return payloads
+        finally:
+            db.close()
+
+    @staticmethod
+    def _build_payload(db: Session, submission: Submission) -> Dict[str, Any]:
+        problem = db.query(Problem).filter(Problem.id == submission.problem_id).first()
+        tests = test_case_cache.get_or_load(
+            problem.id,
+            problem.test_set_version,
+            partial(JudgeEngine._load_tests, db, problem.id),
+        )
+        return {
+            "submission_id": submission.id,
+            "problem_id": problem.id,
+            "user_id": submission.user_id,
+            "test_set_version": problem.test_set_version,
+            "language": submission.language,
+            "code": submission.code,
+            "time_limit": problem.time_limit or 1000,
+            "memory_limit": problem.memory_limit or 256,
+            "judge_mode": problem.judge_mode or "full",
+            "compare_mode": problem.compare_mode or DEFAULT_COMPARE_MODE,
+            "float_tolerance": problem.float_tolerance,
+            # Lets the judge run block programs in its VM instead of the sandbox
+            "block_structure": (
+                submission.block_structure
+                if submission.language.lower() == "blocks"
+                else None
+            ),
+            "tests": list(tests),
+        }
+
+    @staticmethod
+    def _load_tests(db: Session, problem_id: str) -> TestSet:
+        test_cases = (
+            db.query(TestCase)
+            .filter(TestCase.problem_id == problem_id)
+            .order_by(TestCase.position, TestCase.created_at, TestCase.id)
+            .all()
+        )
+        return tuple(JudgeEngine._test_entry(tc) for tc in test_cases)
+
+    @staticmethod
+    def _test_entry(tc: TestCase) -> Dict[str, Any]:
+        # Data in the test data store travels as a path, not as text
+        test = {"id": tc.id, "weight": tc.weight, "is_sample": bool(tc.is_sample)}
+        if tc.input_hash:
+            test["input_path"] = test_data_store.path(tc.input_hash)
+        else:
+            test["input"] = tc.input_data
+        if tc.expected_output_hash:
+            test["expected_path"] = test_data_store.path(tc.expected_output_hash)
+        else:
+            test["expected"] = tc.expected_output
+        return test
+
+    def _on_done(self, payload: Dict[str, Any], future: Future) -> None:
+        job_id = payload["job_id"]
+        submission_id = payload["submission_id"]
+        with self._lock:
+            self._inflight.pop(job_id, None)
+            self._slots.pop(job_id, None)
+
+        db = SessionLocal()
+        try:
+            if future.cancelled():
+                self.queue.fail(db, job_id, "Judge shut down")
+                return
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"Judging submission {submission_id} failed: {str(e)}")
+                self.queue.fail(db, job_id, f"Judge failure: {str(e)}")
+                return
+
+            if not result["test_results"] and result["status"] == "accepted":
+                result = _internal_error("Problem has no test cases")
+            self._record_result(db, payload, result)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to record verdict for {submission_id}: {str(e)}")
+        finally:
+            db.close()
+            self._wakeup.set()
+
+    def _settle_from_cache(self, db: Session, payload: Dict[str, Any]) -> bool:
+        """
+        Finish a re-judge job without running it when the same code was
+        already judged in this batch (classmates often submit identical
+        solutions). Starting the batch cleared older cached verdicts.
+        """
+        problem = db.get(Problem, payload["problem_id"])
+        entry = verdict_cache.lookup(db, problem, payload["language"], payload["code"])
+        if entry is None:
+            return False
+        self._record_result(
+            db,
+            payload,
+            {
+                "status": entry.status,
+                "score": entry.score,
+                "execution_time": entry.execution_time,
+                "memory_used": entry.memory_used,
+                "test_results": entry.test_results,
+                "from_verdict_cache": True,
+            },
+        )
+        return True
+
+    def _record_result(
+        self, db: Session, payload: Dict[str, Any], result: Dict[str, Any]
+    ) -> None:
+        """
+        Write the verdict, cache it, update the problem statistics and close
+        the job in one transaction
+        """
+        job_id = payload["job_id"]
+        submission_id = payload["submission_id"]
+        if not self.queue.complete(db, job_id, self.worker_id):
+            # Our lease expired and another judge owns the job now
+            db.rollback()
+            logger.warning(f"Lost lease on job {job_id}; discarding verdict")
+            return
+
+        db.query(Submission).filter(Submission.id == submission_id).update(
+            {
+                "status": result["status"],
+                "score": result["score"],
+                "execution_time": result.get("execution_time"),
+                "memory_used": result.get("memory_used"),
+                "test_results": result["test_results"],
+                "from_verdict_cache": result.get("from_verdict_cache", False),
+            },
+            synchronize_session=False,
+        )
+        if not result.get("from_verdict_cache"):
+            verdict_cache.store(db, payload, result)
+        problem_stats.record_verdict(db, payload["problem_id"], payload["user_id"])
+        db.commit()
+        logger.info(f"Submission {submission_id} judged: {result['status']}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    engine = JudgeEngine()
+    signal.signal(signal.SIGTERM, lambda *_: engine.stop())
+    signal.signal(signal.SIGINT, lambda *_: engine.stop())
+    engine.run_forever()
@@ -1,65 +1,139 @@
+import io
+import json
 import os
-import requests
 import logging
-import uuid
-import shutil
-from pathlib import Path
-from typing import Optional
+import tempfile
+from typing import Any, Dict, Optional
+
+import httpx
+from PIL import Image, UnidentifiedImageError
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.services.http_client import http_client
 
 logger = logging.getLogger(__name__)
 
+# Leading bytes of the image formats we keep -> file extension
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+)
+IMAGE_EXTENSIONS = ("jpg", "png", "gif", "webp")
+
+# Pillow format for each thumbnail extension (GIFs become still PNGs)
+THUMBNAIL_FORMATS = {"jpg": ("JPEG", "jpg"), "webp": ("WEBP", "webp")}
+
+
+def detect_image_type(data: bytes) -> Optional[str]:
+    """File extension for the image in ``data``, or None if it is not one we keep"""
+    for signature, extension in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return extension
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    return None
+
 
 class FileStorageService:
     """
     Service for handling file storage operations, particularly profile images
     """
 
-    def __init__(self, base_dir: str = "app/static"):
+    def __init__(
+        self,
+        base_dir: str = "app/static",
+        metadata_dir: str = "app/profile_image_meta",
+        max_image_bytes: int = settings.PROFILE_IMAGE_MAX_BYTES,
+        thumbnail_size: int = settings.PROFILE_THUMBNAIL_SIZE,
+    ):
         self.base_dir = base_dir
         self.profile_images_dir = os.path.join(self.base_dir, "profile_images")
+        self.thumbnails_dir = os.path.join(self.profile_images_dir, "thumbnails")
+        # Source URLs and HTTP validators; kept out of base_dir, which is
+        # served publicly at /static
+        self.metadata_dir = metadata_dir
+        self.max_image_bytes = max_image_bytes
+        self.thumbnail_size = thumbnail_size
 
         # Ensure directories exist
-        os.makedirs(self.profile_images_dir, exist_ok=True)
+        os.makedirs(self.thumbnails_dir, exist_ok=True)
+        os.makedirs(self.metadata_dir, exist_ok=True)
 
         logger.info(
             f"FileStorageService initialized with base directory: {self.base_dir}"
         )
 
-    def download_profile_image(self, image_url: str, user_id: str) -> Optional[str]:
+    async def download_profile_image(
+        self, image_url: str, user_id: str
+    ) -> Optional[Dict[str, Optional[str]]]:
         """
-        Download a profile image from the given URL and save it to the local filesystem
+        Download a profile image from the given URL and save it, with a
+        thumbnail, to the local filesystem. The ETag and Last-Modified of the
+        last download are kept, so an unchanged image is not fetched again.
 
         Args:
             image_url: URL of the image to download
             user_id: User ID to associate with the image
 
         Returns:
-            The local path to the saved image, or None if download failed
+            The relative paths of the saved image and its thumbnail
+            (``{"image": ..., "thumbnail": ...}``; the thumbnail may be None),
+            or None if download failed
         """
         if not image_url:
             logger.warning(f"No image URL provided for user {user_id}")
             return None
 
         try:
-            # Generate a filename based on user_id to ensure uniqueness
-            # Use .jpg extension as most profile pics are JPEGs, but this could be improved
-            # with content-type detection
-            filename = f"{user_id}.jpg"
-            filepath = os.path.join(self.profile_images_dir, filename)
+            stored = self._read_metadata(user_id)
+            headers = {}
+            if stored and stored.get("source_url") == image_url:
+                if stored.get("etag"):
+                    headers["If-None-Match"] = stored["etag"]
+                if stored.get("last_modified"):
+                    headers["If-Modified-Since"] = stored["last_modified"]
 
             # Make the request to download the image
-            response = requests.get(image_url, stream=True, timeout=10)
+            response = await http_client.get(
+                image_url, headers=headers, follow_redirects=True
+            )
+            if response.status_code == httpx.codes.NOT_MODIFIED and headers:
+                logger.info(f"Profile image of user {user_id} is unchanged")
+                return {"image": stored["image"], "thumbnail": stored["thumbnail"]}
             response.raise_for_status()  # Raise an exception for HTTP errors
 
-            # Save the image to disk
-            with open(filepath, "wb") as f:
-                response.raw.decode_content = True
-                shutil.copyfileobj(response.raw, f)
+            data = response.content
+            if len(data) > self.max_image_bytes:
+                logger.warning(
+                    f"Profile image of user {user_id} is too large ({len(data)} bytes)"
+                )
+                return None
+            # Decide the type from the bytes themselves, not the URL or headers
+            extension = detect_image_type(data)
+            if extension is None:
+                logger.warning(
+                    f"Profile image of user {user_id} is not a supported image "
+                    f"({response.headers.get('content-type')})"
+                )
+                return None
+
+            # Writing and thumbnailing are blocking, so run in the threadpool
+            paths = await run_in_threadpool(self._store, user_id, extension, data)
+            self._write_metadata(
+                user_id,
+                {
+                    "source_url": image_url,
+                    "etag": response.headers.get("etag"),
+                    "last_modified": response.headers.get("last-modified"),
+                    **paths,
+                },
+            )
 
             logger.info(f"Successfully downloaded profile image for user {user_id}")
-
-            # Return the relative path for URL construction
-            return f"profile_images/{filename}"
+            return paths
 
         except Exception as e:
             logger.error(
@@ -77,14 +151,86 @@ class FileStorageService:
         Returns:
             The relative path to the profile image, or None if it doesn't exist
         """
-        filename = f"{user_id}.jpg"
-        filepath = os.path.join(self.profile_images_dir, filename)
-
-        if os.path.exists(filepath):
-            return f"profile_images/{filename}"
+        for extension in IMAGE_EXTENSIONS:
+            filename = f"{user_id}.{extension}"
+            if os.path.exists(os.path.join(self.profile_images_dir, filename)):
+                return f"profile_images/{filename}"
 
         return None
 
+    def _store(
+        self, user_id: str, extension: str, data: bytes
+    ) -> Dict[str, Optional[str]]:
+        # A new picture may be of another type than the old one
+        for old_extension in IMAGE_EXTENSIONS:
+            if old_extension != extension:
+                for directory in (self.profile_images_dir, self.thumbnails_dir):
+                    path = os.path.join(directory, f"{user_id}.{old_extension}")
+                    if os.path.exists(path):
+                        os.unlink(path)
+
+        filename = f"{user_id}.{extension}"
+        self._write_file(os.path.join(self.profile_images_dir, filename), data)
+        return {
+            "image": f"profile_images/{filename}",
+            "thumbnail": self._make_thumbnail(user_id, extension, data),
+        }
+
+    def _make_thumbnail(
+        self, user_id: str, extension: str, data: bytes
+    ) -> Optional[str]:
+        image_format, thumbnail_extension = THUMBNAIL_FORMATS.get(
+            extension, ("PNG", "png")
+        )
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image.thumbnail((self.thumbnail_size, self.thumbnail_size))
+                if image_format == "JPEG" and image.mode != "RGB":
+                    image = image.convert("RGB")
+                output = io.BytesIO()
+                image.save(output, format=image_format)
+        except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+            logger.warning(f"Could not make a thumbnail for user {user_id}: {str(e)}")
+            return None
+
+        filename = f"{user_id}.{thumbnail_extension}"
+        self._write_file(os.path.join(self.thumbnails_dir, filename), output.getvalue())
+        return f"profile_images/thumbnails/{filename}"
+
+    @staticmethod
+    def _write_file(path: str, data: bytes) -> None:
+        # Write then rename, so a reader never sees half an image
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+    def _metadata_path(self, user_id: str) -> str:
+        return os.path.join(self.metadata_dir, f"{user_id}.json")
+
+    def _read_metadata(self, user_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._metadata_path(user_id)) as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Only trust validators if the files they describe are still there
+        if not os.path.exists(os.path.join(self.base_dir, stored.get("image") or "")):
+            return None
+        return stored
+
+    def _write_metadata(self, user_id: str, metadata: Dict[str, Any]) -> None:
+        self._write_file(self._metadata_path(user_id), json.dumps(metadata).encode())
+        # Earlier versions kept this file next to the public image
+        legacy_path = os.path.join(self.profile_images_dir, f"{user_id}.json")
+        if os.path.exists(legacy_path):
+            os.unlink(legacy_path)
+
 
 # Create a singleton instance
 file_storage_service = FileStorageService()
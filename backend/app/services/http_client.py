@@ -0,0 +1,104 @@
+"""
+Shared async HTTP client for outgoing calls (Google OAuth, profile images).
+
+One httpx.AsyncClient per process keeps connections to Google alive between
+requests instead of paying a TCP/TLS handshake per call, bounds the pool
+(HTTP_MAX_CONNECTIONS) and applies the same timeouts everywhere. Failed
+connection attempts are retried for every method, since nothing was sent.
+Idempotent requests are also retried, with backoff, on timeouts, dropped
+connections and 429/502/503/504. A POST such as the OAuth code exchange is
+not retried once sent: the authorization code is single-use.
+
+The client is created on first use and closed by the application's
+lifespan. It is tied to the event loop that created it; a request made from
+another loop gets a fresh client.
+"""
+
+import asyncio
+import itertools
+import logging
+from typing import Any, Optional
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+RETRY_STATUSES = (429, 502, 503, 504)
+BACKOFF_SECONDS = 0.2
+
+
+class HttpClient:
+    """
+    Lazily created, pooled httpx.AsyncClient with a retry policy
+    """
+
+    def __init__(
+        self,
+        retries: int = settings.HTTP_RETRIES,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.retries = retries
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(
+                    settings.HTTP_TIMEOUT_SECONDS,
+                    connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS,
+                ),
+                transport=self._transport
+                or httpx.AsyncHTTPTransport(
+                    retries=self.retries,
+                    limits=httpx.Limits(
+                        max_connections=settings.HTTP_MAX_CONNECTIONS,
+                        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    ),
+                ),
+            )
+            self._loop = loop
+        return self._client
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Send a request, retrying idempotent ones on transient failures"""
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        for attempt in itertools.count():
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except (httpx.TimeoutException, httpx.NetworkError) as e:
+                if not idempotent or attempt >= self.retries:
+                    raise
+                logger.warning(f"{method} {url} failed ({e!r}), retrying")
+            else:
+                if (
+                    not idempotent
+                    or response.status_code not in RETRY_STATUSES
+                    or attempt >= self.retries
+                ):
+                    return response
+                logger.warning(
+                    f"{method} {url} returned {response.status_code}, retrying"
+                )
+            await asyncio.sleep(BACKOFF_SECONDS * 2**attempt)
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Create a singleton instance
+http_client = HttpClient()
@@ -0,0 +1,116 @@
+"""
+Dedicated thread pool for bcrypt.
+
+A bcrypt hash takes a few hundred milliseconds of CPU by design. Run in the
+request threadpool, a burst of logins (a class signing in at once) would
+occupy every thread that sync routes, health checks included, need. Login
+and signup instead await hashes run on PASSWORD_HASH_WORKERS threads of
+their own (bcrypt releases the GIL, so they use separate cores), and at most
+PASSWORD_HASH_MAX_QUEUE further requests wait for one. Past that, callers
+get PasswordHasherBusy straight away - the API answers 503 with Retry-After
+- rather than queueing for longer than a client would wait.
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.security import get_password_hash, verify_and_update_password
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasherBusy(Exception):
+    """Every hashing thread is busy and the wait queue is full"""
+
+
+class PasswordHasher:
+    """
+    Bounded executor for password hashing with queue-depth counters
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.PASSWORD_HASH_WORKERS,
+        max_queue: int = settings.PASSWORD_HASH_MAX_QUEUE,
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.completed = 0
+        self.rejected = 0
+        self._pending = 0
+        self._running = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hash"
+        )
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify_and_update(
+        self, password: str, hashed_password: Optional[str]
+    ) -> Tuple[bool, Optional[str]]:
+        """(valid, replacement hash if the stored one uses an old cost factor)"""
+        if not hashed_password:
+            # OAuth-only accounts have no password; nothing to hash
+            return False, None
+        return await self._run(verify_and_update_password, password, hashed_password)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, function: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                self.rejected += 1
+                rejected = self.rejected
+                busy = True
+            else:
+                self._pending += 1
+                busy = False
+        if busy:
+            if rejected % 100 == 1:
+                logger.warning(
+                    f"Password hashing saturated; {rejected} requests rejected so far"
+                )
+            raise PasswordHasherBusy()
+
+        future = self._executor.submit(self._call, function, *args)
+        # Count the slot free when the hash finishes, not when the caller
+        # stops waiting (a disconnected client does not cancel the thread)
+        future.add_done_callback(self._finished)
+        return await asyncio.wrap_future(future)
+
+    def _call(self, function: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            self._running += 1
+        try:
+            return function(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def _finished(self, future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+            if not future.cancelled():
+                self.completed += 1
+
+
+# Create a singleton instance
+password_hasher = PasswordHasher()
@@ -0,0 +1,66 @@
+"""
+Problem reference ids - the "P12" / "PP1" ids skill tree steps use - and
+lookup of problems by them.
+
+Generated ids are "P" followed by a number from the ``problem_ref_id_seq``
+sequence on PostgreSQL, so concurrent creates never collide and nothing
+counts the problems table. SQLite has no sequences; there the number follows
+the highest generated id (SQLite serializes writers, and the unique
+constraint catches the rare overlap). Numbers already taken by an id a
+teacher typed in are skipped.
+"""
+
+import logging
+from typing import List
+
+from sqlalchemy import Integer, cast, exists, func, select
+from sqlalchemy.orm import Session
+
+from app.models.problem import Problem, problem_ref_id_seq
+
+logger = logging.getLogger(__name__)
+
+REF_PREFIX = "P"
+
+
+class ProblemRefs:
+    """
+    Allocate problem reference ids and resolve them in bulk
+    """
+
+    def allocate(self, db: Session) -> str:
+        """The next free generated reference id"""
+        while True:
+            ref_id = f"{REF_PREFIX}{self._next_number(db)}"
+            taken = db.query(exists().where(Problem.problem_ref_id == ref_id)).scalar()
+            if not taken:
+                return ref_id
+            logger.info(f"Problem reference id {ref_id} is taken; skipping it")
+
+    @staticmethod
+    def resolve(db: Session, ref_ids: List[str]) -> List[Problem]:
+        """
+        Problems with the given reference ids in one query, in the order
+        asked for; unknown ids are left out
+        """
+        wanted = list(dict.fromkeys(ref_ids))
+        found = {
+            problem.problem_ref_id: problem
+            for problem in db.query(Problem).filter(Problem.problem_ref_id.in_(wanted))
+        }
+        return [found[ref_id] for ref_id in wanted if ref_id in found]
+
+    @staticmethod
+    def _next_number(db: Session) -> int:
+        if db.get_bind().dialect.name == "postgresql":
+            return db.scalar(select(problem_ref_id_seq.next_value()))
+        highest = (
+            db.query(func.max(cast(func.substr(Problem.problem_ref_id, 2), Integer)))
+            .filter(Problem.problem_ref_id.op("GLOB")(f"{REF_PREFIX}[0-9]*"))
+            .scalar()
+        )
+        return (highest or 0) + 1
+
+
+# Create a singleton instance
+problem_refs = ProblemRefs()
@@ -0,0 +1,341 @@
+"""
+Per-problem statistics and leaderboard, maintained as verdicts land.
+
+problem_user_stats holds each user's attempt counts and best accepted
+submission on a problem; problem_stats holds the problem's totals (judged and
+accepted submissions, users who attempted and solved it, fastest accepted
+time). When a verdict is final, record_verdict recomputes the submitting
+user's row from that user's own submissions on the problem - a handful of
+rows, read through ix_submissions_problem_user_created - and applies the
+difference to the problem's totals. A re-judge that changes an earlier
+verdict therefore keeps the numbers exact, and reading them never scans
+``submissions``.
+
+Only the user's own row is locked while it is recomputed (SELECT ... FOR
+UPDATE), so verdicts from different users on one problem do not queue behind
+each other. The totals are changed by a single relative UPDATE (``submissions
+= submissions + 1``) issued last, just before the caller commits. rebuild,
+which recomputes a problem from scratch (scripts/rebuild_problem_stats.py),
+takes the same locks in the same order: the user rows, then the totals.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import ScalarSelect, case, func, insert, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.problem import Problem, ProblemStats, ProblemUserStats, Submission
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# Verdicts that do not count as an attempt
+UNJUDGED_STATUSES = ("pending", "running", "internal_error")
+
+# Best accepted submission first: fastest, then least memory, then earliest
+BEST_ORDER = (
+    Submission.execution_time.asc().nulls_last(),
+    Submission.memory_used.asc().nulls_last(),
+    Submission.created_at,
+    Submission.id,
+)
+
+LEADERBOARD_ORDER = (
+    ProblemUserStats.best_time.asc().nulls_last(),
+    ProblemUserStats.best_memory.asc().nulls_last(),
+    ProblemUserStats.first_solved_at,
+    ProblemUserStats.user_id,
+)
+
+
+class ProblemStatsService:
+    """
+    Keep problem_stats and problem_user_stats in step with submission verdicts
+    """
+
+    def __init__(self, chunk_size: int = 1000):
+        self.chunk_size = chunk_size
+
+    def record_verdict(self, db: Session, problem_id: str, user_id: str) -> None:
+        """
+        Fold a user's latest verdict on a problem into the statistics. Does
+        not commit, so it lands with the verdict.
+        """
+        row = self._lock_user_row(db, problem_id, user_id)
+        before = (row.attempts, row.accepted, row.solved, row.best_time)
+        self._refresh_user(db, row)
+        db.flush()
+
+        attempts, accepted, solved, best_time = before
+        values = {}
+        for column, delta in (
+            (ProblemStats.submissions, row.attempts - attempts),
+            (ProblemStats.accepted, row.accepted - accepted),
+            (
+                ProblemStats.attempted_users,
+                int(row.attempts > 0) - int(attempts > 0),
+            ),
+            (ProblemStats.solved_users, int(row.solved) - int(solved)),
+        ):
+            if delta:
+                values[column] = column + delta
+        if row.best_time is not None and (
+            best_time is None or row.best_time < best_time
+        ):
+            values[ProblemStats.fastest_time] = case(
+                (
+                    or_(
+                        ProblemStats.fastest_time.is_(None),
+                        ProblemStats.fastest_time > row.best_time,
+                    ),
+                    row.best_time,
+                ),
+                else_=ProblemStats.fastest_time,
+            )
+        elif best_time is not None and row.best_time != best_time:
+            # This user may have held the record and lost it
+            values[ProblemStats.fastest_time] = self._fastest_time_query(problem_id)
+        if values:
+            self._ensure_totals(db, problem_id)
+            db.query(ProblemStats).filter(ProblemStats.problem_id == problem_id).update(
+                values, synchronize_session=False
+            )
+
+    def rebuild(self, db: Session, problem_id: str) -> ProblemStats:
+        """
+        Recompute a problem's statistics from its submissions. Commits.
+        """
+        # Deleting the user rows locks them before the totals, in the order
+        # record_verdict takes the same locks
+        db.query(ProblemUserStats).filter(
+            ProblemUserStats.problem_id == problem_id
+        ).delete(synchronize_session=False)
+        totals = self._lock_totals(db, problem_id)
+
+        accepted = Submission.status == "accepted"
+        counts = (
+            db.query(
+                Submission.user_id,
+                func.count(Submission.id),
+                func.count(Submission.id).filter(accepted),
+                func.min(Submission.created_at).filter(accepted),
+            )
+            .filter(
+                Submission.problem_id == problem_id,
+                Submission.status.notin_(UNJUDGED_STATUSES),
+            )
+            .group_by(Submission.user_id)
+            .all()
+        )
+        ranked = (
+            db.query(
+                Submission.user_id,
+                Submission.id,
+                Submission.execution_time,
+                Submission.memory_used,
+                func.row_number()
+                .over(partition_by=Submission.user_id, order_by=BEST_ORDER)
+                .label("rank"),
+            )
+            .filter(Submission.problem_id == problem_id, accepted)
+            .subquery()
+        )
+        best = {row.user_id: row for row in db.query(ranked).filter(ranked.c.rank == 1)}
+
+        rows = []
+        for user_id, user_attempts, user_accepted, first_solved_at in counts:
+            best_row = best.get(user_id)
+            rows.append(
+                {
+                    "problem_id": problem_id,
+                    "user_id": user_id,
+                    "attempts": user_attempts,
+                    "accepted": user_accepted,
+                    "solved": best_row is not None,
+                    "best_submission_id": best_row.id if best_row else None,
+                    "best_time": best_row.execution_time if best_row else None,
+                    "best_memory": best_row.memory_used if best_row else None,
+                    "first_solved_at": first_solved_at,
+                }
+            )
+        for start in range(0, len(rows), self.chunk_size):
+            db.execute(insert(ProblemUserStats), rows[start : start + self.chunk_size])
+
+        totals.submissions = sum(row["attempts"] for row in rows)
+        totals.accepted = sum(row["accepted"] for row in rows)
+        totals.attempted_users = len(rows)
+        totals.solved_users = sum(row["solved"] for row in rows)
+        totals.fastest_time = min(
+            (row["best_time"] for row in rows if row["best_time"] is not None),
+            default=None,
+        )
+        db.commit()
+        return totals
+
+    def rebuild_all(self, db: Session) -> int:
+        """
+        Recompute every problem, one transaction each
+
+        Returns:
+            Number of problems rebuilt
+        """
+        problem_ids = [row.id for row in db.query(Problem.id)]
+        for problem_id in problem_ids:
+            self.rebuild(db, problem_id)
+        logger.info(f"Rebuilt statistics of {len(problem_ids)} problems")
+        return len(problem_ids)
+
+    @staticmethod
+    def summaries(db: Session, problem_ids: List[str]) -> List[Dict[str, Any]]:
+        """Totals of each problem, in the order given; zeros if none yet"""
+        found = {
+            totals.problem_id: totals
+            for totals in db.query(ProblemStats).filter(
+                ProblemStats.problem_id.in_(problem_ids)
+            )
+        }
+        summaries = []
+        for problem_id in problem_ids:
+            totals = found.get(problem_id)
+            submissions = totals.submissions if totals else 0
+            accepted = totals.accepted if totals else 0
+            summaries.append(
+                {
+                    "problem_id": problem_id,
+                    "submissions": submissions,
+                    "accepted": accepted,
+                    "attempted_users": totals.attempted_users if totals else 0,
+                    "solved_users": totals.solved_users if totals else 0,
+                    "acceptance_rate": accepted / submissions if submissions else 0.0,
+                    "fastest_time": totals.fastest_time if totals else None,
+                }
+            )
+        return summaries
+
+    @staticmethod
+    def leaderboard(
+        db: Session, problem_id: str, limit: int
+    ) -> List[Tuple[ProblemUserStats, str, Optional[str]]]:
+        """
+        Users who solved the problem, best first, with their usernames and
+        profile thumbnails
+        """
+        return (
+            db.query(ProblemUserStats, User.username, User.profile_thumbnail)
+            .join(User, User.id == ProblemUserStats.user_id)
+            .filter(
+                ProblemUserStats.problem_id == problem_id,
+                ProblemUserStats.solved.is_(True),
+            )
+            .order_by(*LEADERBOARD_ORDER)
+            .limit(limit)
+            .all()
+        )
+
+    @staticmethod
+    def _lock_totals(db: Session, problem_id: str) -> ProblemStats:
+        ProblemStatsService._ensure_totals(db, problem_id)
+        return (
+            db.query(ProblemStats)
+            .filter(ProblemStats.problem_id == problem_id)
+            .with_for_update()
+            .populate_existing()
+            .one()
+        )
+
+    @staticmethod
+    def _ensure_totals(db: Session, problem_id: str) -> None:
+        exists = (
+            db.query(ProblemStats.problem_id)
+            .filter(ProblemStats.problem_id == problem_id)
+            .first()
+        )
+        if exists is None:
+            try:
+                # Another judge may be creating the row concurrently
+                with db.begin_nested():
+                    db.add(
+                        ProblemStats(
+                            problem_id=problem_id,
+                            submissions=0,
+                            accepted=0,
+                            attempted_users=0,
+                            solved_users=0,
+                        )
+                    )
+            except IntegrityError:
+                pass
+
+    @staticmethod
+    def _lock_user_row(db: Session, problem_id: str, user_id: str) -> ProblemUserStats:
+        query = (
+            db.query(ProblemUserStats)
+            .filter(
+                ProblemUserStats.problem_id == problem_id,
+                ProblemUserStats.user_id == user_id,
+            )
+            .with_for_update()
+            .populate_existing()
+        )
+        row = query.first()
+        if row is None:
+            try:
+                # The user's previous verdict may be creating the row concurrently
+                with db.begin_nested():
+                    db.add(
+                        ProblemUserStats(
+                            problem_id=problem_id,
+                            user_id=user_id,
+                            attempts=0,
+                            accepted=0,
+                            solved=False,
+                        )
+                    )
+            except IntegrityError:
+                pass
+            row = query.one()
+        return row
+
+    @staticmethod
+    def _refresh_user(db: Session, row: ProblemUserStats) -> None:
+        mine = (
+            Submission.problem_id == row.problem_id,
+            Submission.user_id == row.user_id,
+        )
+        accepted = Submission.status == "accepted"
+        row.attempts, row.accepted, row.first_solved_at = (
+            db.query(
+                func.count(Submission.id),
+                func.count(Submission.id).filter(accepted),
+                func.min(Submission.created_at).filter(accepted),
+            )
+            .filter(*mine, Submission.status.notin_(UNJUDGED_STATUSES))
+            .one()
+        )
+        best = (
+            db.query(Submission.id, Submission.execution_time, Submission.memory_used)
+            .filter(*mine, accepted)
+            .order_by(*BEST_ORDER)
+            .first()
+        )
+        row.solved = best is not None
+        row.best_submission_id = best.id if best else None
+        row.best_time = best.execution_time if best else None
+        row.best_memory = best.memory_used if best else None
+
+    @staticmethod
+    def _fastest_time_query(problem_id: str) -> ScalarSelect:
+        return (
+            select(func.min(ProblemUserStats.best_time))
+            .where(
+                ProblemUserStats.problem_id == problem_id,
+                ProblemUserStats.solved.is_(True),
+            )
+            .scalar_subquery()
+        )
+
+
+# Create a singleton instance
+problem_stats = ProblemStatsService()
@@ -0,0 +1,150 @@
+"""
+Background caching of remote profile pictures.
+
+Google sign-in leaves the user's profile_picture pointing at
+googleusercontent.com. Instead of downloading it inside a request (/auth/me
+is the most-called endpoint), routes call ``schedule``, which queues a job
+and returns at once. PROFILE_IMAGE_WORKERS tasks on the event loop download
+the picture through the shared HTTP client (file_storage_service: conditional
+fetch, type detection, thumbnail) and point the user at the local copy.
+
+A user has at most one job queued or running: scheduling again while one is
+pending only records the newest URL, which the job picks up before it
+finishes. The queue is per process and in memory; a job lost to a restart
+is simply scheduled again by the user's next /auth/me.
+"""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.models.user import User
+from app.services.file_storage import file_storage_service
+from app.services.user_cache import user_cache
+
+logger = logging.getLogger(__name__)
+
+REMOTE_IMAGE_HOSTS = ("googleusercontent.com",)
+
+
+def is_remote_image(url: Optional[str]) -> bool:
+    """Whether a profile picture URL still points at the identity provider"""
+    return bool(url) and any(host in url for host in REMOTE_IMAGE_HOSTS)
+
+
+class ProfileImageJobs:
+    """
+    Deduplicating in-memory queue of profile-image downloads
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.PROFILE_IMAGE_WORKERS,
+        max_queue: int = settings.PROFILE_IMAGE_QUEUE_SIZE,
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.completed = 0
+        self.failed = 0
+        # user id -> (image URL, base URL for the local copy) of the newest request
+        self._pending: Dict[str, Tuple[str, str]] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def schedule(self, user_id: str, image_url: str, base_url: str) -> bool:
+        """
+        Cache ``image_url`` as the user's profile picture in the background.
+        Must be called on the event loop.
+
+        Returns:
+            False if the job was merged into a pending one or dropped
+        """
+        self._ensure_workers()
+        if user_id in self._pending:
+            self._pending[user_id] = (image_url, base_url)
+            return False
+        try:
+            self._queue.put_nowait(user_id)
+        except asyncio.QueueFull:
+            logger.warning(f"Profile image queue is full; skipped user {user_id}")
+            return False
+        self._pending[user_id] = (image_url, base_url)
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": len(self._pending),
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._pending.clear()
+        self._queue = None
+
+    def _ensure_workers(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        # First use, or a new event loop: the old queue and tasks are unusable
+        self._pending.clear()
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [
+            loop.create_task(self._work(), name=f"profile-images-{index}")
+            for index in range(self.workers)
+        ]
+        self._loop = loop
+
+    async def _work(self) -> None:
+        while True:
+            user_id = await self._queue.get()
+            try:
+                while True:
+                    image_url, base_url = self._pending[user_id]
+                    await self._cache(user_id, image_url, base_url)
+                    # Rescheduled with another picture while this one ran
+                    if self._pending[user_id][0] == image_url:
+                        break
+                self.completed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Profile image job for user {user_id} failed: {str(e)}")
+            finally:
+                self._pending.pop(user_id, None)
+                self._queue.task_done()
+
+    async def _cache(self, user_id: str, image_url: str, base_url: str) -> None:
+        paths = await file_storage_service.download_profile_image(image_url, user_id)
+        if not paths:
+            return
+
+        thumbnail = paths["thumbnail"]
+        async with AsyncSessionLocal() as db:
+            # Only if the user still has this picture; they may have changed it
+            result = await db.execute(
+                update(User)
+                .where(User.id == user_id, User.profile_picture == image_url)
+                .values(
+                    profile_picture=f"{base_url}/static/{paths['image']}",
+                    profile_thumbnail=(
+                        f"{base_url}/static/{thumbnail}" if thumbnail else None
+                    ),
+                )
+            )
+            await db.commit()
+        if result.rowcount:
+            # A bulk update does not fire the ORM events the cache listens to
+            user_cache.invalidate(user_id)
+
+
+# Create a singleton instance
+profile_image_jobs = ProfileImageJobs()
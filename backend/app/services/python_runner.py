@@ -0,0 +1,199 @@
+"""
+Warm Python runner process.
+
+Started once by the runner pool (app/services/runner_pool.py) and reused for
+many submissions. The interpreter start-up and the standard-library imports
+students commonly use are paid once here instead of once per test case.
+
+Protocol: one JSON object per line on stdin, one JSON reply per line on stdout.
+
+    {"op": "load", "code": "...", "filename": "main.py"}
+        -> {"ok": true} | {"ok": false, "error": "<traceback>"}
+    {"op": "run", "cwd": "...", "time_limit_ms": 1000, "memory_limit_mb": 256,
+     "max_output_bytes": N, "isolation": {...} | null,
+     "tests": [{"stdin": p, "stdout": p, "stderr": p}]}
+        -> {"ok": true, "results": [...], "rss_kb": N}
+
+Every test runs in a child forked from this process, with its own session,
+resource limits and redirected stdin/stdout/stderr, isolated from the judge
+(sandbox.isolate) once its files are open, and ``exec``s the code
+compiled by the last "load" in fresh globals. Nothing from one test (or one
+submission) can leak into the next because this process never runs user code
+itself.
+"""
+
+import builtins
+import json
+import os
+import sys
+import time
+import traceback
+
+# Pre-import what the exercises commonly use so forked children get it for free
+import abc  # noqa: F401
+import bisect  # noqa: F401
+import collections  # noqa: F401
+import copy  # noqa: F401
+import dataclasses  # noqa: F401
+import decimal  # noqa: F401
+import enum  # noqa: F401
+import fractions  # noqa: F401
+import functools  # noqa: F401
+import heapq  # noqa: F401
+import itertools  # noqa: F401
+import math  # noqa: F401
+import operator  # noqa: F401
+import random  # noqa: F401
+import re  # noqa: F401
+import statistics  # noqa: F401
+import string  # noqa: F401
+import typing  # noqa: F401
+
+# Started with -I, so the backend root has to be added explicitly to share the
+# sandbox primitives; it is removed again before any user code can run.
+_BACKEND_ROOT = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+sys.path.insert(0, _BACKEND_ROOT)
+from app.services.sandbox import (  # noqa: E402
+    apply_limits,
+    cpu_seconds_for,
+    isolate,
+    peak_rss_kb,
+    run_result,
+    wait_for_exit,
+)
+
+sys.path.remove(_BACKEND_ROOT)
+
+
+def _run_child(
+    code_obj, test, cwd, cpu_seconds, memory_bytes, max_output_bytes, isolation
+):
+    """
+    Body of a forked test child; never returns
+    """
+    status = 1
+    try:
+        os.setsid()
+        os.chdir(cwd)
+        apply_limits(cpu_seconds, memory_bytes, max_output_bytes)
+
+        for fd, path, flags in (
+            (0, test["stdin"], os.O_RDONLY),
+            (1, test["stdout"], os.O_WRONLY | os.O_CREAT | os.O_TRUNC),
+            (2, test["stderr"], os.O_WRONLY | os.O_CREAT | os.O_TRUNC),
+        ):
+            opened = os.open(path, flags, 0o600)
+            os.dup2(opened, fd)
+            os.close(opened)
+        os.closerange(3, 256)
+        isolate(isolation)
+
+        sys.stdin = sys.__stdin__ = open(0, "r", encoding="utf-8", closefd=False)
+        sys.stdout = sys.__stdout__ = open(1, "w", encoding="utf-8", closefd=False)
+        sys.stderr = sys.__stderr__ = open(2, "w", encoding="utf-8", closefd=False)
+        sys.argv = [code_obj.co_filename]
+
+        try:
+            exec(code_obj, {"__name__": "__main__", "__builtins__": builtins})
+            status = 0
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                status = e.code or 0
+            else:
+                print(e.code, file=sys.stderr)
+                status = 1
+        except BaseException:
+            traceback.print_exc()
+            status = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+    except BaseException:
+        status = 1
+    finally:
+        os._exit(status & 0xFF)
+
+
+def _run_tests(code_obj, request):
+    time_limit_ms = request["time_limit_ms"]
+    memory_limit_mb = request.get("memory_limit_mb")
+    memory_bytes = memory_limit_mb * 1024 * 1024 if memory_limit_mb else None
+    cpu_seconds = cpu_seconds_for(time_limit_ms)
+
+    results = []
+    for test in request["tests"]:
+        start = time.monotonic()
+        pid = os.fork()
+        if pid == 0:
+            _run_child(
+                code_obj,
+                test,
+                request["cwd"],
+                cpu_seconds,
+                memory_bytes,
+                request["max_output_bytes"],
+                request.get("isolation"),
+            )
+        wait_status, usage, timed_out, peak_kb = wait_for_exit(
+            pid, time_limit_ms, start
+        )
+        wall_ms = int((time.monotonic() - start) * 1000)
+        results.append(
+            run_result(
+                wait_status,
+                usage,
+                timed_out,
+                peak_kb,
+                wall_ms,
+                test["stdout"],
+                test["stderr"],
+            )
+        )
+    return results
+
+
+def main():
+    # Keep the protocol on private descriptors; fds 0-2 are for test children
+    requests = os.fdopen(os.dup(0), "r", encoding="utf-8")
+    replies = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+
+    code_obj = None
+    for line in requests:
+        request = json.loads(line)
+        op = request.get("op")
+        if op == "load":
+            try:
+                code_obj = compile(
+                    request["code"], request.get("filename", "main.py"), "exec"
+                )
+                reply = {"ok": True}
+            except (SyntaxError, ValueError) as e:
+                code_obj = None
+                reply = {
+                    "ok": False,
+                    "error": "".join(traceback.format_exception_only(type(e), e)),
+                }
+        elif op == "run":
+            if code_obj is None:
+                reply = {"ok": False, "error": "No code loaded"}
+            else:
+                reply = {
+                    "ok": True,
+                    "results": _run_tests(code_obj, request),
+                    "rss_kb": peak_rss_kb(os.getpid()),
+                }
+        else:
+            reply = {"ok": False, "error": f"Unknown op: {op}"}
+
+        replies.write(json.dumps(reply) + "\n")
+        replies.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Bulk re-judge of a problem's existing submissions.
+
+A batch enqueues one low-priority job per selected submission on the regular
+judge queue. The queue hands re-judge jobs only the capacity live
+submissions leave and caps how many run at once (JUDGE_REJUDGE_MAX_LEASES).
+Each submission keeps its old verdict until its job is claimed.
+
+Starting a batch clears the problem's verdict cache, so every distinct
+program in the batch is judged again; identical copies of it then reuse
+that fresh verdict.
+"""
+
+import logging
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import exists, func, insert
+from sqlalchemy.orm import Session
+
+from app.models.problem import RejudgeBatch, Submission, SubmissionJob
+from app.services.submission_queue import SubmissionQueue, submission_queue
+from app.services.verdict_cache import verdict_cache
+
+logger = logging.getLogger(__name__)
+
+# Below live submissions (priority 0)
+REJUDGE_PRIORITY = -10
+
+# Job status -> progress bucket reported to the teacher
+PROGRESS_BUCKETS = {
+    "queued": "queued",
+    "leased": "running",
+    "done": "done",
+    "dead": "failed",
+    "cancelled": "cancelled",
+}
+
+
+class RejudgeService:
+    """
+    Start, track and cancel re-judge batches
+    """
+
+    def __init__(
+        self,
+        queue: SubmissionQueue = submission_queue,
+        priority: int = REJUDGE_PRIORITY,
+        chunk_size: int = 1000,
+    ):
+        self.queue = queue
+        self.priority = priority
+        self.chunk_size = chunk_size
+
+    def start(
+        self,
+        db: Session,
+        problem_id: str,
+        requested_by: Optional[str],
+        statuses: Optional[List[str]] = None,
+        user_id: Optional[str] = None,
+    ) -> RejudgeBatch:
+        """
+        Queue a re-judge of a problem's submissions, optionally only those
+        with one of ``statuses`` or by one user. Submissions already waiting
+        for a judge are skipped. Commits.
+        """
+        batch = RejudgeBatch(
+            problem_id=problem_id,
+            requested_by=requested_by,
+            status="running",
+            filters={"statuses": statuses, "user_id": user_id},
+        )
+        db.add(batch)
+        db.flush()
+
+        active_job = exists().where(
+            SubmissionJob.submission_id == Submission.id,
+            SubmissionJob.status.in_(("queued", "leased")),
+        )
+        query = db.query(Submission.id).filter(
+            Submission.problem_id == problem_id, ~active_job
+        )
+        if statuses:
+            query = query.filter(Submission.status.in_(statuses))
+        if user_id:
+            query = query.filter(Submission.user_id == user_id)
+        submission_ids = [row.id for row in query.order_by(Submission.created_at)]
+
+        now = datetime.utcnow()
+        for start in range(0, len(submission_ids), self.chunk_size):
+            db.execute(
+                insert(SubmissionJob),
+                [
+                    {
+                        "id": str(uuid.uuid4()),
+                        "submission_id": submission_id,
+                        "status": "queued",
+                        "priority": self.priority,
+                        "available_at": now,
+                        "attempts": 0,
+                        "max_attempts": self.queue.max_attempts,
+                        "batch_id": batch.id,
+                    }
+                    for submission_id in submission_ids[start : start + self.chunk_size]
+                ],
+            )
+
+        # Cached verdicts are what a re-judge is meant to re-check
+        verdict_cache.invalidate(db, problem_id)
+        batch.total = len(submission_ids)
+        if not submission_ids:
+            batch.status = "completed"
+            batch.finished_at = now
+        db.commit()
+        logger.info(
+            f"Re-judge {batch.id} of problem {problem_id} queued {batch.total} submissions"
+        )
+        return batch
+
+    @staticmethod
+    def progress(db: Session, batch: RejudgeBatch) -> Dict[str, int]:
+        """
+        Job counts by progress bucket; marks the batch completed once no job
+        is left to run
+        """
+        counts = {bucket: 0 for bucket in PROGRESS_BUCKETS.values()}
+        rows = (
+            db.query(SubmissionJob.status, func.count(SubmissionJob.id))
+            .filter(SubmissionJob.batch_id == batch.id)
+            .group_by(SubmissionJob.status)
+            .all()
+        )
+        for job_status, count in rows:
+            counts[PROGRESS_BUCKETS.get(job_status, job_status)] = count
+
+        if batch.status == "running" and not counts["queued"] and not counts["running"]:
+            batch.status = "completed"
+            batch.finished_at = datetime.utcnow()
+            db.commit()
+        return counts
+
+    @staticmethod
+    def cancel(db: Session, batch: RejudgeBatch) -> int:
+        """
+        Drop a batch's queued jobs; jobs already running finish. Commits.
+
+        Returns:
+            Number of jobs cancelled
+        """
+        cancelled = (
+            db.query(SubmissionJob)
+            .filter(
+                SubmissionJob.batch_id == batch.id,
+                SubmissionJob.status == "queued",
+            )
+            .update({"status": "cancelled"}, synchronize_session=False)
+        )
+        if batch.status == "running":
+            batch.status = "cancelled"
+            batch.finished_at = datetime.utcnow()
+        db.commit()
+        logger.info(f"Re-judge {batch.id} cancelled; {cancelled} jobs dropped")
+        return cancelled
+
+
+# Create a singleton instance
+rejudge_service = RejudgeService()
@@ -0,0 +1,207 @@
+"""
+Pool of warm, pre-imported runner processes, one set per language.
+
+Each judge worker process owns its own pool. A runner is started once, pays
+the interpreter start-up and common imports once, and then runs many batches
+of test cases (forking one isolated child per test). Runners are recycled
+after a number of jobs or when their memory grows past a threshold.
+"""
+
+import json
+import logging
+import os
+import selectors
+import subprocess
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.core.config import settings
+from app.services.sandbox import SANDBOX_ENV
+
+logger = logging.getLogger(__name__)
+
+RUNNER_COMMANDS: Dict[str, List[str]] = {
+    "python": [
+        sys.executable,
+        "-I",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "python_runner.py"),
+    ],
+}
+
+# Slack on top of the summed per-test limits before a silent runner is killed
+RUNNER_REPLY_GRACE_SECONDS = 5.0
+
+
+class RunnerError(Exception):
+    """The runner process died or stopped answering"""
+
+
+class WarmRunner:
+    """
+    Client handle for one runner process, speaking its line-delimited JSON protocol
+    """
+
+    def __init__(self, language: str):
+        self.language = language
+        self.jobs = 0
+        self.rss_kb = 0
+        self.proc = subprocess.Popen(
+            RUNNER_COMMANDS[language],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=SANDBOX_ENV,
+            cwd="/",
+            text=True,
+            encoding="utf-8",
+        )
+
+    @property
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def load(self, code: str, filename: str) -> Optional[str]:
+        """
+        Compile code in the runner
+
+        Returns:
+            The compiler error, or None on success
+        """
+        reply = self._call({"op": "load", "code": code, "filename": filename}, 30.0)
+        return None if reply["ok"] else reply["error"]
+
+    def run(
+        self,
+        cwd: str,
+        tests: List[Dict[str, str]],
+        time_limit_ms: int,
+        memory_limit_mb: Optional[int],
+        max_output_bytes: int,
+        isolation: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Run the loaded code once per test (stdin/stdout/stderr file paths),
+        in ``cwd`` and isolated as sandbox.isolate describes
+        """
+        request = {
+            "op": "run",
+            "cwd": cwd,
+            "tests": tests,
+            "time_limit_ms": time_limit_ms,
+            "memory_limit_mb": memory_limit_mb,
+            "max_output_bytes": max_output_bytes,
+            "isolation": isolation,
+        }
+        timeout = len(tests) * time_limit_ms / 1000.0 + RUNNER_REPLY_GRACE_SECONDS
+        reply = self._call(request, timeout)
+        if not reply["ok"]:
+            raise RunnerError(reply["error"])
+        self.jobs += 1
+        self.rss_kb = reply.get("rss_kb") or 0
+        return reply["results"]
+
+    def close(self) -> None:
+        if self.alive:
+            self.proc.kill()
+        self.proc.wait()
+        for stream in (self.proc.stdin, self.proc.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+    def _call(self, request: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        try:
+            self.proc.stdin.write(json.dumps(request) + "\n")
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise RunnerError(f"{self.language} runner is gone: {str(e)}")
+
+        with selectors.DefaultSelector() as selector:
+            selector.register(self.proc.stdout, selectors.EVENT_READ)
+            if not selector.select(timeout):
+                self.close()
+                raise RunnerError(f"{self.language} runner stopped responding")
+
+        line = self.proc.stdout.readline()
+        if not line:
+            raise RunnerError(f"{self.language} runner exited")
+        return json.loads(line)
+
+
+class RunnerPool:
+    """
+    Idle warm runners per language, handed out one job at a time
+    """
+
+    def __init__(
+        self,
+        max_jobs: int = settings.JUDGE_RUNNER_MAX_JOBS,
+        max_rss_mb: int = settings.JUDGE_RUNNER_MAX_RSS_MB,
+    ):
+        self.max_jobs = max_jobs
+        self.max_rss_kb = max_rss_mb * 1024
+        self._idle: Dict[str, List[WarmRunner]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def supports(language: str) -> bool:
+        return settings.JUDGE_WARM_RUNNERS and language in RUNNER_COMMANDS
+
+    def prewarm(self, languages: Optional[List[str]] = None, count: int = 1) -> None:
+        """Start runners ahead of the first job"""
+        for language in languages or list(RUNNER_COMMANDS):
+            with self._lock:
+                idle = self._idle.setdefault(language, [])
+                while len(idle) < count:
+                    idle.append(WarmRunner(language))
+
+    @contextmanager
+    def runner(self, language: str) -> Iterator[WarmRunner]:
+        """
+        Borrow a runner for one job; broken runners are discarded, worn ones recycled.
+        Safe to call from several threads (parallel test lanes).
+        """
+        runner = None
+        while runner is None:
+            with self._lock:
+                idle = self._idle.setdefault(language, [])
+                candidate = idle.pop() if idle else None
+            if candidate is None:
+                break
+            if candidate.alive:
+                runner = candidate
+            else:
+                candidate.close()
+        if runner is None:
+            runner = WarmRunner(language)
+
+        try:
+            yield runner
+        except BaseException:
+            runner.close()
+            raise
+
+        if runner.jobs >= self.max_jobs or runner.rss_kb > self.max_rss_kb:
+            logger.info(
+                f"Recycling {language} runner after {runner.jobs} jobs "
+                f"({runner.rss_kb} KB peak RSS)"
+            )
+            runner.close()
+            # Start the replacement now so it is warm by the next job
+            runner = WarmRunner(language)
+        with self._lock:
+            self._idle.setdefault(language, []).append(runner)
+
+    def close_all(self) -> None:
+        with self._lock:
+            runners = [r for idle in self._idle.values() for r in idle]
+            self._idle.clear()
+        for runner in runners:
+            runner.close()
+
+
+# Per-process pool; each judge worker process gets its own
+runner_pool = RunnerPool()
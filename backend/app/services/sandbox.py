@@ -0,0 +1,282 @@
+"""
+Low-level process primitives for running untrusted submission code.
+
+This module deliberately depends on the standard library only: it is shared
+by the judge engine and by the warm runner processes (python_runner.py), which
+must not import the application or its settings.
+"""
+
+import ctypes
+import os
+import resource
+import signal
+import subprocess
+import time
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+
+# Submissions never see the judge's environment (database URL, secrets)
+SANDBOX_ENV = {
+    "PATH": "/usr/local/bin:/usr/bin:/bin",
+    "LANG": "C.UTF-8",
+    "PYTHONIOENCODING": "utf-8",
+    "PYTHONDONTWRITEBYTECODE": "1",
+}
+
+STDERR_TAIL_BYTES = 2048
+
+# unshare(2) and mount(2) have no os wrappers; libc is loaded here rather
+# than between fork and exec
+_libc = ctypes.CDLL(None, use_errno=True)
+_libc.mount.argtypes = (
+    ctypes.c_char_p,
+    ctypes.c_char_p,
+    ctypes.c_char_p,
+    ctypes.c_ulong,
+    ctypes.c_void_p,
+)
+
+CLONE_NEWNS = 0x00020000
+MS_RDONLY = 0x1
+MS_NOSUID = 0x2
+MS_NODEV = 0x4
+MS_NOEXEC = 0x8
+MS_BIND = 0x1000
+MS_REC = 0x4000
+MS_PRIVATE = 0x40000
+
+
+def apply_limits(
+    cpu_seconds: int, memory_bytes: Optional[int], output_bytes: int
+) -> None:
+    """
+    Resource limits applied in the child between fork and exec
+    """
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (output_bytes, output_bytes))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    if memory_bytes:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+
+
+def _libc_call(result: int, what: str) -> None:
+    if result != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, f"{what}: {os.strerror(errno)}")
+
+
+def isolate(isolation: Optional[Dict[str, Any]]) -> None:
+    """
+    Cut the child off from the judge, after its limits are set and before exec.
+
+    ``isolation`` (None leaves the child as it is) has ``hide``, paths covered
+    up in a private mount namespace - directories by an empty read-only
+    tmpfs, files by /dev/null - and the ``uid``/``gid`` the child drops to, so
+    it can neither read the judge's files nor signal or inspect the judge's
+    processes. Needs root.
+    """
+    if not isolation:
+        return
+    if isolation.get("hide"):
+        _libc_call(_libc.unshare(CLONE_NEWNS), "unshare")
+        # Keep the mounts below out of the judge's own namespace
+        _libc_call(
+            _libc.mount(b"none", b"/", None, MS_REC | MS_PRIVATE, None), "mount"
+        )
+        for path in isolation["hide"]:
+            target = os.fsencode(path)
+            if os.path.isdir(path):
+                result = _libc.mount(
+                    b"tmpfs",
+                    target,
+                    b"tmpfs",
+                    MS_RDONLY | MS_NOSUID | MS_NODEV | MS_NOEXEC,
+                    b"size=4k,mode=0555",
+                )
+            else:
+                result = _libc.mount(b"/dev/null", target, None, MS_BIND, None)
+            _libc_call(result, f"mount over {path}")
+    if isolation.get("uid") is not None:
+        os.setgroups([])
+        os.setgid(isolation["gid"])
+        os.setuid(isolation["uid"])
+
+
+def prepare_child(
+    cpu_seconds: int,
+    memory_bytes: Optional[int],
+    output_bytes: int,
+    isolation: Optional[Dict[str, Any]],
+) -> None:
+    """preexec_fn of a cold spawn: limits, then isolation"""
+    apply_limits(cpu_seconds, memory_bytes, output_bytes)
+    isolate(isolation)
+
+
+def check_isolation(isolation: Optional[Dict[str, Any]]) -> Optional[str]:
+    """
+    Try ``isolate`` in a throwaway child
+
+    Returns:
+        Why isolation failed, or None if it works
+    """
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        status = 0
+        try:
+            os.close(read_end)
+            isolate(isolation)
+        except BaseException as e:
+            os.write(write_end, str(e).encode("utf-8", errors="replace"))
+            status = 1
+        finally:
+            os._exit(status)
+    os.close(write_end)
+    with os.fdopen(read_end, "rb") as f:
+        error = f.read().decode("utf-8")
+    _, wait_status = os.waitpid(pid, 0)
+    if os.waitstatus_to_exitcode(wait_status) != 0:
+        return error or "isolation failed"
+    return None
+
+
+def cpu_seconds_for(time_limit_ms: int) -> int:
+    """RLIMIT_CPU has one-second granularity; round the limit up"""
+    return max(1, -(-time_limit_ms // 1000))
+
+
+def peak_rss_kb(pid: int) -> Optional[int]:
+    """
+    Peak resident set size of a running process since its last exec, in KB
+    """
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def wait_for_exit(
+    pid: int, time_limit_ms: int, start: float
+) -> Tuple[int, Any, bool, int]:
+    """
+    Wait for a child started at ``start`` (time.monotonic()), killing its
+    process group once the wall-clock limit passes.
+
+    Peak memory is sampled from /proc VmHWM while the child runs, because the
+    ``ru_maxrss`` reported by wait4 also counts pages the child inherited from
+    its (much larger) parent before exec.
+
+    Returns:
+        (wait_status, rusage, timed_out, peak_kb)
+    """
+    deadline = start + time_limit_ms / 1000.0
+    peak_kb = peak_rss_kb(pid) or 0
+    delay = 0.0005
+    while True:
+        waited, wait_status, usage = os.wait4(pid, os.WNOHANG)
+        if waited:
+            return wait_status, usage, False, peak_kb or usage.ru_maxrss
+        peak_kb = max(peak_kb, peak_rss_kb(pid) or 0)
+        if time.monotonic() >= deadline:
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            _, wait_status, usage = os.wait4(pid, 0)
+            return wait_status, usage, True, peak_kb or usage.ru_maxrss
+        time.sleep(delay)
+        delay = min(delay * 2, 0.005)
+
+
+def read_tail(path: str, size: int = STDERR_TAIL_BYTES) -> str:
+    with open(path, "rb") as f:
+        f.seek(max(0, os.path.getsize(path) - size))
+        return f.read().decode("utf-8", errors="replace")
+
+
+def run_result(
+    wait_status: int,
+    usage: Any,
+    timed_out: bool,
+    peak_kb: int,
+    wall_ms: int,
+    stdout_path: str,
+    stderr_path: str,
+) -> Dict[str, Any]:
+    """
+    The result dict shared by cold spawns and warm runners
+    """
+    return {
+        "exit_code": os.waitstatus_to_exitcode(wait_status),
+        "timed_out": timed_out,
+        "wall_ms": wall_ms,
+        "cpu_ms": int((usage.ru_utime + usage.ru_stime) * 1000),
+        "memory_kb": peak_kb,
+        "stdout_path": stdout_path,
+        "stdout_bytes": os.path.getsize(stdout_path),
+        "stderr": read_tail(stderr_path),
+    }
+
+
+def run_process(
+    command: List[str],
+    cwd: str,
+    stdin_path: Optional[str],
+    time_limit_ms: int,
+    memory_limit_mb: Optional[int],
+    max_output_bytes: int,
+    stdout_path: Optional[str] = None,
+    stderr_path: Optional[str] = None,
+    isolation: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Spawn a command in its own session with CPU, memory and output limits,
+    isolated from the judge as ``isolation`` says (see ``isolate``).
+
+    stdout/stderr go to files (in ``cwd`` unless given) so large outputs never
+    sit in a pipe buffer. CPU time comes from ``wait4`` for this child alone.
+
+    Returns:
+        A dict with exit_code, timed_out, wall_ms, cpu_ms, memory_kb,
+        stdout_path, stdout_bytes and stderr (tail).
+    """
+    stdout_path = stdout_path or os.path.join(cwd, ".stdout")
+    stderr_path = stderr_path or os.path.join(cwd, ".stderr")
+    memory_bytes = memory_limit_mb * 1024 * 1024 if memory_limit_mb else None
+
+    with open(stdin_path or os.devnull, "rb") as stdin, open(
+        stdout_path, "wb"
+    ) as stdout, open(stderr_path, "wb") as stderr:
+        start = time.monotonic()
+        proc = subprocess.Popen(
+            command,
+            cwd=cwd,
+            stdin=stdin,
+            stdout=stdout,
+            stderr=stderr,
+            env=SANDBOX_ENV,
+            close_fds=True,
+            start_new_session=True,
+            preexec_fn=partial(
+                prepare_child,
+                cpu_seconds_for(time_limit_ms),
+                memory_bytes,
+                max_output_bytes,
+                isolation,
+            ),
+        )
+        wait_status, usage, timed_out, peak_kb = wait_for_exit(
+            proc.pid, time_limit_ms, start
+        )
+        wall_ms = int((time.monotonic() - start) * 1000)
+        # wait4 reaped the child; keep Popen from trying again
+        proc.returncode = os.waitstatus_to_exitcode(wait_status)
+
+    return run_result(
+        wait_status, usage, timed_out, peak_kb, wall_ms, stdout_path, stderr_path
+    )
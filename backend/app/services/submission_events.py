@@ -0,0 +1,210 @@
+"""
+Push channel for submission status changes.
+
+Each API process keeps an in-process broker of per-user subscriber queues that
+the Server-Sent Events endpoint drains. The judge runs in its own process, so
+the broker is fed by one watcher task per API process - started with the first
+subscriber and stopped with the last - that reads the ``submission_jobs``
+change feed (``updated_at``) for the subscribed users. That is one indexed
+query per interval per API process however many clients are listening,
+instead of one authenticated request per client per poll.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.models.problem import Submission, SubmissionJob
+
+logger = logging.getLogger(__name__)
+
+# Statuses after which a submission does not change again (until a rejudge)
+TERMINAL_STATUSES = {
+    "accepted",
+    "wrong_answer",
+    "time_limit_exceeded",
+    "memory_limit_exceeded",
+    "runtime_error",
+    "compilation_error",
+    "internal_error",
+}
+
+# Re-read this much of the change feed on every poll: on PostgreSQL
+# ``updated_at`` is the transaction start time, so a row can become visible
+# after rows with later timestamps. Duplicates are dropped by status.
+LOOKBACK = timedelta(seconds=5)
+
+EVENT_COLUMNS = (
+    Submission.id,
+    Submission.problem_id,
+    Submission.user_id,
+    Submission.status,
+    Submission.score,
+    Submission.execution_time,
+    Submission.memory_used,
+    Submission.test_results,
+)
+
+
+def submission_event(row: Any) -> Dict[str, Any]:
+    """
+    Event payload for a submission (ORM object or row of EVENT_COLUMNS).
+    Per-test results are only sent once the verdict is in.
+    """
+    event = {
+        "submission_id": row.id,
+        "problem_id": row.problem_id,
+        "user_id": row.user_id,
+        "status": row.status,
+    }
+    if row.status in TERMINAL_STATUSES:
+        event.update(
+            {
+                "score": row.score,
+                "execution_time": row.execution_time,
+                "memory_used": row.memory_used,
+                "test_results": row.test_results,
+            }
+        )
+    return event
+
+
+class SubmissionEventBroker:
+    """
+    In-process pub/sub of submission events, keyed by user
+    """
+
+    def __init__(
+        self,
+        poll_interval: float = settings.SUBMISSION_EVENTS_POLL_SECONDS,
+        queue_size: int = 100,
+    ):
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._watcher: Optional[asyncio.Task] = None
+        self._cursor: Optional[datetime] = None
+        # submission id -> (last published status, updated_at it was seen at)
+        self._published: Dict[str, Tuple[str, datetime]] = {}
+
+    def subscribe(self, user_id: str) -> asyncio.Queue:
+        """
+        Register a queue for a user's events; must run on the event loop
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        if self._watcher is None or self._watcher.done():
+            self._cursor = None
+            self._published.clear()
+            self._watcher = asyncio.get_running_loop().create_task(self._watch())
+        return queue
+
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[user_id]
+        if not self._subscribers and self._watcher is not None:
+            self._watcher.cancel()
+            self._watcher = None
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """
+        Deliver an event to its user's subscribers; must run on the event loop
+        """
+        for queue in self._subscribers.get(event["user_id"], ()):
+            if queue.full():
+                # A stalled client loses its oldest event rather than
+                # holding up everyone else's
+                queue.get_nowait()
+                logger.warning(
+                    f"Dropped a submission event for slow subscriber of user {event['user_id']}"
+                )
+            queue.put_nowait(event)
+
+    def snapshot(
+        self, db: Session, user_id: str, submission_ids: Iterable[str]
+    ) -> List[Dict[str, Any]]:
+        """
+        Current state of some of a user's submissions, sent when a client
+        connects so it cannot miss a verdict that landed before it subscribed
+        """
+        submission_ids = list(submission_ids)
+        if not submission_ids:
+            return []
+        rows = (
+            db.query(*EVENT_COLUMNS)
+            .filter(Submission.id.in_(submission_ids), Submission.user_id == user_id)
+            .all()
+        )
+        return [submission_event(row) for row in rows]
+
+    async def _watch(self) -> None:
+        while self._subscribers:
+            try:
+                events = await run_in_threadpool(self._poll, list(self._subscribers))
+                for event in events:
+                    self.publish(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Submission event poll failed: {str(e)}")
+            await asyncio.sleep(self.poll_interval)
+
+    def _poll(self, user_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Read job changes since the last poll and turn status changes of the
+        given users' submissions into events
+        """
+        db = SessionLocal()
+        try:
+            priming = self._cursor is None
+            if priming:
+                self._cursor = db.query(
+                    func.max(SubmissionJob.updated_at)
+                ).scalar() or datetime(1970, 1, 1)
+            since = self._cursor - LOOKBACK
+
+            rows = (
+                db.query(*EVENT_COLUMNS, SubmissionJob.updated_at)
+                .join(SubmissionJob, SubmissionJob.submission_id == Submission.id)
+                .filter(
+                    SubmissionJob.updated_at >= since,
+                    Submission.user_id.in_(user_ids),
+                )
+                .order_by(SubmissionJob.updated_at)
+                .all()
+            )
+        finally:
+            db.close()
+
+        events = []
+        for row in rows:
+            self._cursor = max(self._cursor, row.updated_at)
+            published = self._published.get(row.id)
+            if published is not None and published[0] == row.status:
+                continue
+            self._published[row.id] = (row.status, row.updated_at)
+            # The first poll only learns current statuses; clients get those
+            # from the snapshot when they connect
+            if not priming:
+                events.append(submission_event(row))
+
+        # Forget submissions that have left the lookback window
+        horizon = self._cursor - LOOKBACK
+        for submission_id, (_, updated_at) in list(self._published.items()):
+            if updated_at < horizon:
+                del self._published[submission_id]
+        return events
+
+
+# Create a singleton instance
+submission_events = SubmissionEventBroker()
@@ -0,0 +1,277 @@
+"""
+Durable, database-backed judge queue.
+
+Jobs live in the ``submission_jobs`` table next to the submissions they judge.
+On PostgreSQL, workers claim jobs with ``SELECT ... FOR UPDATE SKIP LOCKED`` so
+any number of judge processes can drain the queue concurrently without
+double-judging. SQLite has no row locks, so claims there are serialized with a
+single-writer lock (a process-local mutex plus an ``flock`` on a file next to
+the database) - good enough for local development and tests.
+"""
+
+import fcntl
+import logging
+import os
+import socket
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Iterator, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.problem import Submission, SubmissionJob
+from app.services.problem_stats import problem_stats
+
+logger = logging.getLogger(__name__)
+
+
+class SubmissionQueue:
+    """
+    Enqueue, claim, complete and retry judge jobs
+    """
+
+    def __init__(
+        self,
+        lease_seconds: int = settings.JUDGE_LEASE_SECONDS,
+        max_attempts: int = settings.JUDGE_MAX_ATTEMPTS,
+        retry_delay_seconds: int = settings.JUDGE_RETRY_DELAY_SECONDS,
+        max_rejudge_leases: int = settings.JUDGE_REJUDGE_MAX_LEASES,
+    ):
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay_seconds = retry_delay_seconds
+        self.max_rejudge_leases = max_rejudge_leases
+        self._sqlite_lock = threading.Lock()
+
+    @staticmethod
+    def worker_id() -> str:
+        """Identifier recorded on leases taken by this process"""
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def enqueue(
+        self,
+        db: Session,
+        submission_id: str,
+        priority: int = 0,
+        batch_id: Optional[str] = None,
+    ) -> SubmissionJob:
+        """
+        Add a job for a submission. The caller commits, so the job is created
+        in the same transaction as the submission itself.
+        """
+        job = SubmissionJob(
+            submission_id=submission_id,
+            status="queued",
+            priority=priority,
+            available_at=datetime.utcnow(),
+            max_attempts=self.max_attempts,
+            batch_id=batch_id,
+        )
+        db.add(job)
+        return job
+
+    def claim(self, db: Session, worker_id: str, limit: int) -> List[SubmissionJob]:
+        """
+        Lease up to ``limit`` queued jobs and mark their submissions running
+        """
+        if limit <= 0:
+            return []
+
+        with self._writer_lock(db):
+            now = datetime.utcnow()
+            jobs = self._queued(db, now, limit, SubmissionJob.batch_id.is_(None))
+
+            # Re-judges only get what live submissions leave, and about
+            # max_rejudge_leases of them run at once across all judges (a
+            # soft cap: judges claiming at the same instant may each take one)
+            remaining = limit - len(jobs)
+            if remaining > 0:
+                running = (
+                    db.query(func.count(SubmissionJob.id))
+                    .filter(
+                        SubmissionJob.status == "leased",
+                        SubmissionJob.batch_id.isnot(None),
+                    )
+                    .scalar()
+                )
+                jobs += self._queued(
+                    db,
+                    now,
+                    min(remaining, self.max_rejudge_leases - running),
+                    SubmissionJob.batch_id.isnot(None),
+                )
+
+            lease_expires_at = now + timedelta(seconds=self.lease_seconds)
+            for job in jobs:
+                job.status = "leased"
+                job.leased_by = worker_id
+                job.lease_expires_at = lease_expires_at
+                job.attempts += 1
+
+            if jobs:
+                db.query(Submission).filter(
+                    Submission.id.in_([job.submission_id for job in jobs])
+                ).update({"status": "running"}, synchronize_session=False)
+            db.commit()
+            return jobs
+
+    def _queued(
+        self, db: Session, now: datetime, limit: int, *criteria: Any
+    ) -> List[SubmissionJob]:
+        """Lockable queued jobs in claim order"""
+        if limit <= 0:
+            return []
+        query = (
+            db.query(SubmissionJob)
+            .filter(
+                SubmissionJob.status == "queued",
+                SubmissionJob.available_at <= now,
+                *criteria,
+            )
+            .order_by(SubmissionJob.priority.desc(), SubmissionJob.available_at)
+            .limit(limit)
+        )
+        if self._supports_skip_locked(db):
+            query = query.with_for_update(skip_locked=True)
+        return query.all()
+
+    def extend_leases(self, db: Session, job_ids: List[str], worker_id: str) -> None:
+        """
+        Heartbeat for long-running jobs so their leases do not expire mid-judge
+        """
+        if not job_ids:
+            return
+        db.query(SubmissionJob).filter(
+            SubmissionJob.id.in_(job_ids),
+            SubmissionJob.status == "leased",
+            SubmissionJob.leased_by == worker_id,
+        ).update(
+            {
+                "lease_expires_at": datetime.utcnow()
+                + timedelta(seconds=self.lease_seconds)
+            },
+            synchronize_session=False,
+        )
+        db.commit()
+
+    def complete(self, db: Session, job_id: str, worker_id: str) -> bool:
+        """
+        Mark a leased job done. Does not commit, so the verdict and the job
+        state change land in one transaction.
+
+        Returns:
+            False if the lease was lost (expired and re-claimed elsewhere)
+        """
+        updated = (
+            db.query(SubmissionJob)
+            .filter(
+                SubmissionJob.id == job_id,
+                SubmissionJob.status == "leased",
+                SubmissionJob.leased_by == worker_id,
+            )
+            .update(
+                {"status": "done", "lease_expires_at": None},
+                synchronize_session=False,
+            )
+        )
+        return bool(updated)
+
+    def fail(self, db: Session, job_id: str, error: str) -> Optional[str]:
+        """
+        Record a failed attempt: requeue with a delay, or dead-letter the job
+        once it has used up its attempts.
+
+        Returns:
+            The job's new status, or None if the job no longer exists
+        """
+        job = db.query(SubmissionJob).filter(SubmissionJob.id == job_id).first()
+        if not job:
+            return None
+        self._retry_or_bury(db, job, error)
+        db.commit()
+        return job.status
+
+    def requeue_expired(self, db: Session) -> int:
+        """
+        Return jobs whose lease ran out (crashed or stuck worker) to the queue
+
+        Returns:
+            Number of expired leases handled
+        """
+        with self._writer_lock(db):
+            query = db.query(SubmissionJob).filter(
+                SubmissionJob.status == "leased",
+                SubmissionJob.lease_expires_at < datetime.utcnow(),
+            )
+            if self._supports_skip_locked(db):
+                query = query.with_for_update(skip_locked=True)
+
+            expired = query.all()
+            for job in expired:
+                logger.warning(f"Lease on job {job.id} held by {job.leased_by} expired")
+                self._retry_or_bury(db, job, "Lease expired")
+            db.commit()
+            return len(expired)
+
+    def _retry_or_bury(self, db: Session, job: SubmissionJob, error: str) -> None:
+        job.last_error = error
+        job.leased_by = None
+        job.lease_expires_at = None
+
+        if job.attempts >= job.max_attempts:
+            job.status = "dead"
+            submission_update = {
+                "status": "internal_error",
+                "test_results": [{"status": "internal_error", "message": error}],
+            }
+            logger.error(f"Job {job.id} dead-lettered after {job.attempts} attempts")
+        else:
+            job.status = "queued"
+            job.available_at = datetime.utcnow() + timedelta(
+                seconds=self.retry_delay_seconds * job.attempts
+            )
+            submission_update = {"status": "pending"}
+
+        db.query(Submission).filter(Submission.id == job.submission_id).update(
+            submission_update, synchronize_session=False
+        )
+        if job.status == "dead":
+            # A re-judged submission loses the verdict it was counted with
+            submission = db.get(Submission, job.submission_id)
+            problem_stats.record_verdict(db, submission.problem_id, submission.user_id)
+
+    @staticmethod
+    def _supports_skip_locked(db: Session) -> bool:
+        return db.get_bind().dialect.name in ("postgresql", "mysql")
+
+    @contextmanager
+    def _writer_lock(self, db: Session) -> Iterator[None]:
+        """
+        Single-writer lock for databases without row-level locking (SQLite)
+        """
+        bind = db.get_bind()
+        if bind.dialect.name != "sqlite":
+            yield
+            return
+
+        database = bind.url.database
+        lock_path = (
+            f"{database}.queue.lock" if database and database != ":memory:" else None
+        )
+        with self._sqlite_lock:
+            if lock_path is None:
+                yield
+                return
+            with open(lock_path, "w") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+# Create a singleton instance
+submission_queue = SubmissionQueue()
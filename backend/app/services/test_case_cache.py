@@ -0,0 +1,96 @@
+"""
+Per-process LRU cache of problem test sets for the judge.
+
+Entries are keyed by (problem id, test-set version). Problem.test_set_version
+is bumped in the same transaction as every test-case change, so an edit makes
+the old entry unreachable immediately; it then ages out of the LRU.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+TestSet = Tuple[Dict[str, Any], ...]
+
+
+class TestCaseCache:
+    """
+    Byte-capped LRU of immutable test sets with hit/miss counters
+    """
+
+    def __init__(self, max_bytes: int = settings.JUDGE_TEST_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[TestSet, int]]" = (
+            OrderedDict()
+        )
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def size_of(tests: TestSet) -> int:
+        """Approximate footprint: the text blobs (or file paths) dominate"""
+        return sum(
+            len(t["input"] if "input" in t else t["input_path"])
+            + len(t["expected"] if "expected" in t else t["expected_path"])
+            + 200
+            for t in tests
+        )
+
+    def get(self, problem_id: str, version: int) -> Optional[TestSet]:
+        key = (problem_id, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, problem_id: str, version: int, tests: TestSet) -> None:
+        size = self.size_of(tests)
+        if size > self.max_bytes:
+            return
+
+        key = (problem_id, version)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (tests, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def get_or_load(
+        self, problem_id: str, version: int, loader: Callable[[], TestSet]
+    ) -> TestSet:
+        tests = self.get(problem_id, version)
+        if tests is None:
+            tests = loader()
+            self.put(problem_id, version, tests)
+        return tests
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Create a singleton instance
+test_case_cache = TestCaseCache()
@@ -0,0 +1,347 @@
+"""
+Bulk import and export of a problem's test cases.
+
+Two formats:
+
+- NDJSON: one JSON object per line with ``input_data``, ``expected_output``
+  and optionally ``is_sample`` and ``weight`` (the TestCaseCreate fields
+  without ``problem_id``). Lossless.
+- zip: ``<name>.in`` / ``<name>.out`` file pairs (``.ans`` is accepted for
+  the output), ordered by name; cases whose name starts with ``sample`` are
+  samples. Weights are always 1.
+
+Imports are parsed as a stream and inserted in batches in one transaction,
+and exports are generated as a stream, so memory stays flat however large the
+file is: only the current batch (and, for zip, the current case) is held.
+Large non-sample data goes to the test data store like any other test case
+(app/services/test_data_store.py).
+"""
+
+import io
+import itertools
+import json
+import logging
+import re
+import shutil
+import uuid
+import zipfile
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.models.problem import TestCase
+from app.schemas.problem import TestCaseBase
+from app.services.test_data_store import (
+    COPY_CHUNK_BYTES,
+    DATA_FIELDS,
+    test_data_store,
+)
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("ndjson", "zip")
+INPUT_SUFFIXES = (".in",)
+OUTPUT_SUFFIXES = (".out", ".ans")
+
+
+class TestCaseImportError(Exception):
+    """An uploaded file cannot be imported; ``location`` is a line or file name"""
+
+    def __init__(self, message: str, location: Optional[str] = None):
+        super().__init__(f"{location}: {message}" if location else message)
+        self.message = message
+        self.location = location
+
+
+class _ZipStream(io.RawIOBase):
+    """
+    Write-only, unseekable sink that zipfile writes into; ``drain`` hands out
+    what has been written so far
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class TestCaseTransfer:
+    """
+    Stream test cases in and out of a problem
+    """
+
+    def __init__(
+        self,
+        batch_rows: int = 500,
+        batch_bytes: int = 8 * 1024 * 1024,
+        max_case_bytes: int = settings.TEST_CASE_MAX_BYTES,
+    ):
+        self.batch_rows = batch_rows
+        self.batch_bytes = batch_bytes
+        self.max_case_bytes = max_case_bytes
+
+    def import_cases(
+        self,
+        db: Session,
+        problem_id: str,
+        fileobj: IO[bytes],
+        file_format: str,
+        replace: bool = False,
+    ) -> Tuple[int, int]:
+        """
+        Insert every case in the file, after deleting the problem's existing
+        cases if ``replace``. Does not commit: the caller bumps the test-set
+        version and commits, so the import is all or nothing.
+
+        Returns:
+            (cases imported, cases deleted)
+        """
+        if file_format not in FORMATS:
+            raise TestCaseImportError(f"Unsupported format '{file_format}'")
+
+        deleted = 0
+        if replace:
+            deleted = (
+                db.query(TestCase)
+                .filter(TestCase.problem_id == problem_id)
+                .delete(synchronize_session=False)
+            )
+
+        cases = (
+            self._parse_ndjson(fileobj)
+            if file_format == "ndjson"
+            else self._parse_zip(fileobj)
+        )
+
+        # Appended after the existing cases, in file order
+        first_position = next_position(db, problem_id)
+        imported = 0
+        batch: List[Dict[str, Any]] = []
+        batch_size = 0
+        for case in cases:
+            row = test_data_store.offload(
+                {
+                    "id": str(uuid.uuid4()),
+                    "problem_id": problem_id,
+                    "input_data": case.input_data,
+                    "expected_output": case.expected_output,
+                    "is_sample": bool(case.is_sample),
+                    "weight": case.weight if case.weight is not None else 1,
+                    "position": first_position + imported,
+                }
+            )
+            batch.append(row)
+            imported += 1
+            batch_size += sum(len(row[field] or "") for field in DATA_FIELDS)
+            if len(batch) >= self.batch_rows or batch_size >= self.batch_bytes:
+                db.execute(insert(TestCase), batch)
+                batch = []
+                batch_size = 0
+        if batch:
+            db.execute(insert(TestCase), batch)
+
+        if not imported:
+            raise TestCaseImportError("The file contains no test cases")
+        logger.info(f"Imported {imported} test cases into problem {problem_id}")
+        return imported, deleted
+
+    def export_ndjson(self, problem_id: str) -> Iterator[bytes]:
+        """NDJSON lines for a problem's cases, in judging order"""
+        for test_case in self._iter_cases(problem_id):
+            yield (
+                json.dumps(
+                    {
+                        "input_data": _case_text(test_case, "input_data"),
+                        "expected_output": _case_text(test_case, "expected_output"),
+                        "is_sample": bool(test_case.is_sample),
+                        "weight": test_case.weight,
+                    }
+                )
+                + "\n"
+            ).encode("utf-8")
+
+    def export_zip(self, problem_id: str) -> Iterator[bytes]:
+        """A zip of ``.in``/``.out`` pairs, produced as it is compressed"""
+        sink = _ZipStream()
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for index, test_case in enumerate(self._iter_cases(problem_id), start=1):
+                stem = f"{'sample' if test_case.is_sample else 'test'}-{index:04d}"
+                for suffix, field in (
+                    (".in", "input_data"),
+                    (".out", "expected_output"),
+                ):
+                    with archive.open(stem + suffix, "w", force_zip64=True) as member:
+                        digest = getattr(test_case, DATA_FIELDS[field])
+                        if digest:
+                            with test_data_store.open(digest) as stored:
+                                shutil.copyfileobj(stored, member, COPY_CHUNK_BYTES)
+                        else:
+                            member.write(getattr(test_case, field).encode("utf-8"))
+                    yield sink.drain()
+        yield sink.drain()
+
+    def _iter_cases(self, problem_id: str) -> Iterator[TestCase]:
+        """
+        Stream a problem's cases in judging order, loading them in chunks of
+        about ``batch_bytes`` (cases vary from bytes to megabytes, so a fixed
+        row count would not bound memory). Uses its own session, since a
+        streaming response outlives the request's.
+        """
+        db = SessionLocal()
+        try:
+            sizes = (
+                db.query(
+                    TestCase.id,
+                    func.coalesce(func.length(TestCase.input_data), 0)
+                    + func.coalesce(func.length(TestCase.expected_output), 0),
+                )
+                .filter(TestCase.problem_id == problem_id)
+                .order_by(TestCase.position, TestCase.created_at, TestCase.id)
+                .all()
+            )
+            chunk: List[str] = []
+            chunk_size = 0
+            for index, (case_id, size) in enumerate(sizes):
+                chunk.append(case_id)
+                chunk_size += size or 0
+                if chunk_size < self.batch_bytes and index < len(sizes) - 1:
+                    continue
+                cases = db.query(TestCase).filter(TestCase.id.in_(chunk)).all()
+                by_id = {test_case.id: test_case for test_case in cases}
+                for chunk_id in chunk:
+                    if chunk_id in by_id:
+                        yield by_id[chunk_id]
+                del cases, by_id
+                db.expunge_all()
+                chunk = []
+                chunk_size = 0
+        finally:
+            db.close()
+
+    def _parse_ndjson(self, fileobj: IO[bytes]) -> Iterator[TestCaseBase]:
+        text = io.TextIOWrapper(fileobj, encoding="utf-8", newline="")
+        # Bounded reads, so one huge line cannot be pulled into memory whole
+        line_limit = 2 * self.max_case_bytes + 1024
+        try:
+            for line_number in itertools.count(1):
+                line = text.readline(line_limit)
+                if not line:
+                    break
+                if len(line) >= line_limit and not line.endswith("\n"):
+                    raise TestCaseImportError(
+                        "Test case is too large", f"line {line_number}"
+                    )
+                if not line.strip():
+                    continue
+                try:
+                    data = json.loads(line)
+                except ValueError as e:
+                    raise TestCaseImportError(
+                        f"Invalid JSON ({e.msg})", f"line {line_number}"
+                    )
+                yield self._validate(data, f"line {line_number}")
+        except UnicodeDecodeError:
+            raise TestCaseImportError("The file is not valid UTF-8")
+        finally:
+            # Leave the upload open for the caller
+            text.detach()
+
+    def _parse_zip(self, fileobj: IO[bytes]) -> Iterator[TestCaseBase]:
+        try:
+            archive = zipfile.ZipFile(fileobj)
+        except zipfile.BadZipFile:
+            raise TestCaseImportError("The file is not a zip archive")
+
+        with archive:
+            inputs: Dict[str, zipfile.ZipInfo] = {}
+            outputs: Dict[str, zipfile.ZipInfo] = {}
+            for info in archive.infolist():
+                if info.is_dir() or info.filename.startswith("__MACOSX/"):
+                    continue
+                stem, _, suffix = info.filename.rpartition(".")
+                suffix = "." + suffix.lower()
+                if suffix in INPUT_SUFFIXES:
+                    inputs[stem] = info
+                elif suffix in OUTPUT_SUFFIXES:
+                    outputs[stem] = info
+
+            unpaired = sorted(set(inputs) ^ set(outputs))
+            if unpaired:
+                raise TestCaseImportError(
+                    "Every .in file needs a matching .out file", unpaired[0]
+                )
+
+            for stem in sorted(inputs, key=_natural_key):
+                name = stem.rsplit("/", 1)[-1]
+                yield self._validate(
+                    {
+                        "input_data": self._read_member(archive, inputs[stem]),
+                        "expected_output": self._read_member(archive, outputs[stem]),
+                        "is_sample": name.lower().startswith("sample"),
+                    },
+                    stem,
+                )
+
+    def _read_member(self, archive: zipfile.ZipFile, info: zipfile.ZipInfo) -> str:
+        # The declared size is checked before decompressing (zip bombs)
+        if info.file_size > self.max_case_bytes:
+            raise TestCaseImportError("Test case is too large", info.filename)
+        with archive.open(info) as member:
+            data = member.read(self.max_case_bytes + 1)
+        if len(data) > self.max_case_bytes:
+            raise TestCaseImportError("Test case is too large", info.filename)
+        try:
+            return data.decode("utf-8")
+        except UnicodeDecodeError:
+            raise TestCaseImportError("File is not valid UTF-8", info.filename)
+
+    def _validate(self, data: Any, location: str) -> TestCaseBase:
+        if not isinstance(data, dict):
+            raise TestCaseImportError("Expected a JSON object", location)
+        try:
+            case = TestCaseBase.model_validate(data)
+        except ValidationError as e:
+            error = e.errors()[0]
+            field = ".".join(str(part) for part in error["loc"])
+            raise TestCaseImportError(f"{field}: {error['msg']}", location)
+        if max(len(case.input_data), len(case.expected_output)) > self.max_case_bytes:
+            raise TestCaseImportError("Test case is too large", location)
+        return case
+
+
+def next_position(db: Session, problem_id: str) -> int:
+    """The position that appends a test case after the problem's existing ones"""
+    last = (
+        db.query(func.max(TestCase.position))
+        .filter(TestCase.problem_id == problem_id)
+        .scalar()
+    )
+    return 0 if last is None else last + 1
+
+
+def _case_text(test_case: TestCase, field: str) -> str:
+    digest = getattr(test_case, DATA_FIELDS[field])
+    return test_data_store.read_text(digest) if digest else getattr(test_case, field)
+
+
+def _natural_key(name: str) -> List[Any]:
+    """Sort ``test-2`` before ``test-10``"""
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+
+# Create a singleton instance
+test_case_transfer = TestCaseTransfer()
@@ -0,0 +1,198 @@
+"""
+Content-addressed on-disk store for large test-case data.
+
+When TEST_DATA_DIR is set, non-sample inputs and expected outputs of at least
+TEST_DATA_MIN_BYTES are written to ``<dir>/<aa>/<bb>/<sha256>`` and the row
+keeps only the hash (TestCase.input_hash / expected_output_hash) with the
+text column left NULL. Identical data - an input reused across problems, say
+- is stored once. The judge hands the file path straight to the sandbox as
+stdin and streams expected output from the file, so the data is never loaded
+through the ORM or copied in Python. Samples always stay inline, since they
+are shown to students.
+
+Files are immutable and shared, so deleting a test case leaves its files in
+place; scripts/gc_test_data.py removes the ones no row references any more.
+API and judge processes must see the same directory (a shared volume) as the
+same user, or the judge as root. The store is private to that user
+(directories 0700, files 0400): submissions run as the sandbox user with the
+store hidden, and get their input only as an already-open stdin.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from typing import IO, Any, Callable, Dict, Iterator, Optional, Set
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Text column -> hash column on TestCase
+DATA_FIELDS = {"input_data": "input_hash", "expected_output": "expected_output_hash"}
+
+COPY_CHUNK_BYTES = 1024 * 1024
+
+DIR_MODE = 0o700
+FILE_MODE = 0o400
+
+
+class TestDataStore:
+    """
+    Deduplicating file store keyed by the sha256 of the content
+    """
+
+    def __init__(
+        self,
+        root: Optional[str] = settings.TEST_DATA_DIR,
+        min_bytes: int = settings.TEST_DATA_MIN_BYTES,
+    ):
+        self.root = root
+        self.min_bytes = min_bytes
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.root)
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def put_bytes(self, data: bytes) -> str:
+        """Store ``data``; returns its hash"""
+        digest = hashlib.sha256(data).hexdigest()
+        if os.path.exists(self.path(digest)):
+            os.utime(self.path(digest))
+        else:
+            self._commit(digest, lambda f: f.write(data))
+        return digest
+
+    def put_stream(self, source: IO[bytes], limit: Optional[int] = None) -> str:
+        """
+        Store a stream without holding it in memory; returns its hash
+
+        Raises:
+            ValueError: if the stream is longer than ``limit`` bytes
+        """
+        hasher = hashlib.sha256()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=self._temp_dir())
+        try:
+            with os.fdopen(fd, "wb") as f:
+                while True:
+                    chunk = source.read(COPY_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if limit is not None and size > limit:
+                        raise ValueError(f"Data is larger than {limit} bytes")
+                    hasher.update(chunk)
+                    f.write(chunk)
+            digest = hasher.hexdigest()
+            self._move_into_place(temp_path, digest)
+            return digest
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+    def open(self, digest: str) -> IO[bytes]:
+        return open(self.path(digest), "rb")
+
+    def read_text(self, digest: str) -> str:
+        with open(self.path(digest), "r", encoding="utf-8", newline="") as f:
+            return f.read()
+
+    def offload(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Move large test data in ``values`` (TestCase column values) into the
+        store, leaving the hash in its place. Data kept inline clears any
+        stale hash.
+        """
+        for field, hash_field in DATA_FIELDS.items():
+            text = values.get(field)
+            if text is None:
+                continue
+            if (
+                self.enabled
+                and not values.get("is_sample")
+                and len(text) >= self.min_bytes
+            ):
+                values[hash_field] = self.put_bytes(text.encode("utf-8"))
+                values[field] = None
+            else:
+                values[hash_field] = None
+        return values
+
+    def inline(self, test_case: Any) -> None:
+        """Bring a test case's stored data back into its row (e.g. it became a sample)"""
+        for field, hash_field in DATA_FIELDS.items():
+            digest = getattr(test_case, hash_field)
+            if digest:
+                setattr(test_case, field, self.read_text(digest))
+                setattr(test_case, hash_field, None)
+
+    def collect_garbage(self, referenced: Set[str], min_age_seconds: int = 3600) -> int:
+        """
+        Delete stored files no test case references. Recent files are kept:
+        an import that has written them may not have committed yet.
+
+        Returns:
+            Number of files deleted
+        """
+        if not self.enabled:
+            return 0
+        cutoff = time.time() - min_age_seconds
+        removed = 0
+        for path in self._stored_files():
+            digest = os.path.basename(path)
+            if digest in referenced or os.path.getmtime(path) > cutoff:
+                continue
+            os.unlink(path)
+            removed += 1
+        logger.info(f"Removed {removed} unreferenced test data files")
+        return removed
+
+    def _stored_files(self) -> Iterator[str]:
+        for directory, _, files in os.walk(self.root):
+            if os.path.basename(directory) == ".tmp":
+                continue
+            for name in files:
+                yield os.path.join(directory, name)
+
+    def _temp_dir(self) -> str:
+        # A store created before it was private is closed off on first write
+        os.makedirs(self.root, mode=DIR_MODE, exist_ok=True)
+        if os.stat(self.root).st_uid == os.geteuid():
+            os.chmod(self.root, DIR_MODE)
+        # Same filesystem as the store, so moving a file in is atomic
+        temp_dir = os.path.join(self.root, ".tmp")
+        os.makedirs(temp_dir, mode=DIR_MODE, exist_ok=True)
+        return temp_dir
+
+    def _commit(self, digest: str, write: Callable[[IO[bytes]], Any]) -> None:
+        fd, temp_path = tempfile.mkstemp(dir=self._temp_dir())
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            self._move_into_place(temp_path, digest)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+    def _move_into_place(self, temp_path: str, digest: str) -> None:
+        final_path = self.path(digest)
+        if os.path.exists(final_path):
+            # Already stored; refresh the mtime so a garbage collection
+            # running now does not delete it from under the new reference
+            os.utime(final_path)
+            return
+        # makedirs gives ``mode`` to the leaf only
+        shard = os.path.dirname(final_path)
+        os.makedirs(os.path.dirname(shard), mode=DIR_MODE, exist_ok=True)
+        os.makedirs(shard, mode=DIR_MODE, exist_ok=True)
+        os.chmod(temp_path, FILE_MODE)
+        os.replace(temp_path, final_path)
+
+
+# Create a singleton instance
+test_data_store = TestDataStore()
@@ -0,0 +1,121 @@
+"""
+Per-process TTL cache of active users for request authentication.
+
+get_current_user would otherwise read the users row on every authenticated
+request. The cache keeps a snapshot of the row's columns (minus the password
+hash and the Google token, which are loaded on first access if a route needs
+them) for USER_CACHE_TTL_SECONDS, and authenticate_token turns a snapshot back
+into a session-attached User without a query.
+
+Any ORM update or delete of a user - a role change, the Google callback, a
+deactivation - evicts it once the transaction commits, so this process never
+serves the old row after its own change. Other processes see the change
+within the TTL. Bulk ``query(User).update()`` bypasses the ORM events and
+must call invalidate itself.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.config import settings
+from app.models.user import User
+
+# Loaded lazily instead of being held in the cache
+UNCACHED_COLUMNS = ("hashed_password", "google_token")
+
+Snapshot = Dict[str, Any]
+
+
+class UserCache:
+    """
+    Entry-capped LRU of user snapshots that expire after ``ttl_seconds``
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = settings.USER_CACHE_TTL_SECONDS,
+        max_entries: int = settings.USER_CACHE_MAX_ENTRIES,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[Snapshot, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._columns = [
+            attr.key
+            for attr in inspect(User).column_attrs
+            if attr.key not in UNCACHED_COLUMNS
+        ]
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, db: Session, user_id: str) -> Optional[User]:
+        """The cached user attached to ``db``, or None"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[1] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            snapshot = entry[0]
+
+        user = User(**snapshot)
+        # Mark it as an unmodified copy of the stored row, so attaching it
+        # neither queries nor schedules an update
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+    def put(self, user: User) -> None:
+        """Cache an active user loaded from the database"""
+        if not self.enabled or not user.is_active:
+            return
+        snapshot = {column: getattr(user, column) for column in self._columns}
+        expires = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries[user.id] = (snapshot, expires)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Create a singleton instance
+user_cache = UserCache()
+
+
+# Ids of users changed in a session's current transaction
+_CHANGED_KEY = "user_cache_changed"
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _record_change(mapper, connection, target: User) -> None:
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(_CHANGED_KEY, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_changed(session: Session) -> None:
+    for user_id in session.info.pop(_CHANGED_KEY, ()):
+        user_cache.invalidate(user_id)
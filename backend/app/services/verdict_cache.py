@@ -0,0 +1,144 @@
+"""
+Verdict cache for identical resubmissions.
+
+Judged verdicts are stored under (problem id, test-set version, language,
+code hash). A new submission whose key matches an entry gets the
+stored verdict copied onto it and is never queued for the judge. Entries are
+invalidated by bumping Problem.test_set_version (test-case changes, and
+changes to limits or compare settings), which also deletes the problem's old
+entries.
+"""
+
+import hashlib
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.problem import Problem, Submission, VerdictCacheEntry
+
+logger = logging.getLogger(__name__)
+
+# Verdicts that depend only on the code and the tests. Time/memory verdicts
+# vary with judge load, and internal errors are never a property of the code.
+CACHEABLE_STATUSES = {"accepted", "wrong_answer", "runtime_error", "compilation_error"}
+
+
+class VerdictCache:
+    """
+    Look up and store verdicts for identical code
+    """
+
+    @staticmethod
+    def normalize_code(code: str) -> str:
+        """
+        Normalize line endings only. Any other whitespace can change what a
+        program does (inside a string literal) or what its errors say (line
+        numbers), so it is part of the key.
+        """
+        return code.replace("\r\n", "\n")
+
+    @staticmethod
+    def normalize_language(language: str) -> str:
+        return (language or "").strip().lower()
+
+    def code_hash(self, code: str) -> str:
+        return hashlib.sha256(self.normalize_code(code).encode("utf-8")).hexdigest()
+
+    def lookup(
+        self, db: Session, problem: Problem, language: str, code: str
+    ) -> Optional[VerdictCacheEntry]:
+        """
+        Find the cached verdict for this code against the problem's current tests
+        """
+        entry = (
+            db.query(VerdictCacheEntry)
+            .filter(
+                VerdictCacheEntry.problem_id == problem.id,
+                VerdictCacheEntry.test_set_version == problem.test_set_version,
+                VerdictCacheEntry.language == self.normalize_language(language),
+                VerdictCacheEntry.code_hash == self.code_hash(code),
+            )
+            .first()
+        )
+        if entry:
+            db.query(VerdictCacheEntry).filter(VerdictCacheEntry.id == entry.id).update(
+                {
+                    VerdictCacheEntry.hits: VerdictCacheEntry.hits + 1,
+                    VerdictCacheEntry.last_hit_at: datetime.utcnow(),
+                },
+                synchronize_session=False,
+            )
+        return entry
+
+    @staticmethod
+    def apply(entry: VerdictCacheEntry, submission: Submission) -> None:
+        """Copy a cached verdict onto a new submission"""
+        submission.status = entry.status
+        submission.score = entry.score
+        submission.execution_time = entry.execution_time
+        submission.memory_used = entry.memory_used
+        submission.test_results = entry.test_results
+        submission.from_verdict_cache = True
+
+    def store(
+        self, db: Session, payload: Dict[str, Any], result: Dict[str, Any]
+    ) -> None:
+        """
+        Remember a judge result. Does not commit, so it lands with the verdict.
+        """
+        if result["status"] not in CACHEABLE_STATUSES:
+            return
+
+        entry = VerdictCacheEntry(
+            problem_id=payload["problem_id"],
+            test_set_version=payload["test_set_version"],
+            language=self.normalize_language(payload["language"]),
+            code_hash=self.code_hash(payload["code"]),
+            status=result["status"],
+            score=result["score"],
+            execution_time=result.get("execution_time"),
+            memory_used=result.get("memory_used"),
+            test_results=result["test_results"],
+        )
+        try:
+            # Another judge may have cached the same code concurrently
+            with db.begin_nested():
+                db.add(entry)
+        except IntegrityError:
+            pass
+
+    @staticmethod
+    def invalidate(db: Session, problem_id: str) -> None:
+        """Drop a problem's entries; commits with the caller's change"""
+        db.query(VerdictCacheEntry).filter(
+            VerdictCacheEntry.problem_id == problem_id
+        ).delete(synchronize_session=False)
+
+    @staticmethod
+    def stats(db: Session, problem_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Share of submissions served from the cache, overall or for one problem
+        """
+        query = db.query(
+            func.count(Submission.id),
+            func.count(Submission.id).filter(Submission.from_verdict_cache.is_(True)),
+        )
+        entries = db.query(func.count(VerdictCacheEntry.id))
+        if problem_id:
+            query = query.filter(Submission.problem_id == problem_id)
+            entries = entries.filter(VerdictCacheEntry.problem_id == problem_id)
+        total, cached = query.one()
+        return {
+            "submissions": total,
+            "served_from_cache": cached,
+            "hit_rate": cached / total if total else 0.0,
+            "entries": entries.scalar(),
+        }
+
+
+# Create a singleton instance
+verdict_cache = VerdictCache()
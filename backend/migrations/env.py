@@ -14,7 +14,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 from app.db.database import Base
 from app.models.user import User
 from app.models.skill_tree import SkillTree
-from app.models.problem import Problem, TestCase, Submission
+from app.models.problem import Problem, TestCase, Submission, SubmissionJob, RejudgeBatch, VerdictCacheEntry, ProblemStats, ProblemUserStats
 
 # This is the Alembic Config object
 config = context.config
@@ -0,0 +1,36 @@
+"""index_submissions_for_pagination
+
+Revision ID: 0b7e5c9a4f12
+Revises: 6d1e4b7a2c53
+Create Date: 2025-05-27 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0b7e5c9a4f12"
+down_revision: Union[str, None] = "6d1e4b7a2c53"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema to index submission listings for keyset pagination."""
+    op.create_index(
+        "ix_submissions_problem_created",
+        "submissions",
+        ["problem_id", "created_at", "id"],
+    )
+    op.create_index(
+        "ix_submissions_problem_user_created",
+        "submissions",
+        ["problem_id", "user_id", "created_at", "id"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_submissions_problem_user_created", table_name="submissions")
+    op.drop_index("ix_submissions_problem_created", table_name="submissions")
@@ -0,0 +1,28 @@
+"""clear_verdict_cache
+
+Revision ID: 1d7f3a9c6e52
+Revises: 6a8d3f2b9c41
+Create Date: 2025-06-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "1d7f3a9c6e52"
+down_revision: Union[str, None] = "6a8d3f2b9c41"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Drop verdicts cached under the old whitespace-stripping code hash."""
+    # An old key equals the new key of the stripped code, so the entries could
+    # be served to a program that differs from the one that was judged
+    op.execute("DELETE FROM verdict_cache")
+
+
+def downgrade() -> None:
+    """Nothing to restore; the cache refills as submissions are judged."""
+    pass
@@ -0,0 +1,40 @@
+"""add_test_data_hashes_to_test_cases
+
+Revision ID: 2c8f5d1e7a63
+Revises: 4a9c7e2b5d18
+Create Date: 2025-06-10 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "2c8f5d1e7a63"
+down_revision: Union[str, None] = "4a9c7e2b5d18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("test_cases", sa.Column("input_hash", sa.String(64), nullable=True))
+    op.add_column(
+        "test_cases", sa.Column("expected_output_hash", sa.String(64), nullable=True)
+    )
+    op.alter_column("test_cases", "input_data", existing_type=sa.Text(), nullable=True)
+    op.alter_column(
+        "test_cases", "expected_output", existing_type=sa.Text(), nullable=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Stored data must be inlined first (see scripts/gc_test_data.py --inline)
+    op.alter_column(
+        "test_cases", "expected_output", existing_type=sa.Text(), nullable=False
+    )
+    op.alter_column("test_cases", "input_data", existing_type=sa.Text(), nullable=False)
+    op.drop_column("test_cases", "expected_output_hash")
+    op.drop_column("test_cases", "input_hash")
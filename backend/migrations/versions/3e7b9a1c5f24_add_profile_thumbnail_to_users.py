@@ -0,0 +1,27 @@
+"""add_profile_thumbnail_to_users
+
+Revision ID: 3e7b9a1c5f24
+Revises: 9d5b2f7e4a08
+Create Date: 2025-06-16 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "3e7b9a1c5f24"
+down_revision: Union[str, None] = "9d5b2f7e4a08"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema with a thumbnail URL for cached profile pictures."""
+    op.add_column("users", sa.Column("profile_thumbnail", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "profile_thumbnail")
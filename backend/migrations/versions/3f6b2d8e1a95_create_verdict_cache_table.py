@@ -0,0 +1,55 @@
+"""create_verdict_cache_table
+
+Revision ID: 3f6b2d8e1a95
+Revises: e5a3c8d90f16
+Create Date: 2025-05-25 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "3f6b2d8e1a95"
+down_revision: Union[str, None] = "e5a3c8d90f16"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema to add the verdict cache."""
+    op.create_table(
+        "verdict_cache",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("problem_id", sa.String(), nullable=False),
+        sa.Column("test_set_version", sa.Integer(), nullable=False),
+        sa.Column("language", sa.String(), nullable=False),
+        sa.Column("code_hash", sa.String(length=64), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("score", sa.Integer(), nullable=True),
+        sa.Column("execution_time", sa.Integer(), nullable=True),
+        sa.Column("memory_used", sa.Integer(), nullable=True),
+        sa.Column("test_results", sa.JSON(), nullable=True),
+        sa.Column("hits", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=True),
+        sa.Column("last_hit_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["problem_id"], ["problems.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "problem_id", "test_set_version", "language", "code_hash",
+            name="uq_verdict_cache_key",
+        ),
+    )
+    op.add_column(
+        "submissions",
+        sa.Column(
+            "from_verdict_cache", sa.Boolean(), server_default=sa.text("false"), nullable=False
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("submissions", "from_verdict_cache")
+    op.drop_table("verdict_cache")
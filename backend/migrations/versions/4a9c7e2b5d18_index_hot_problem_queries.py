@@ -0,0 +1,46 @@
+"""index_hot_problem_queries
+
+Revision ID: 4a9c7e2b5d18
+Revises: 8e2f6a1c9d47
+Create Date: 2025-05-29 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4a9c7e2b5d18"
+down_revision: Union[str, None] = "8e2f6a1c9d47"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema with indexes for the test-case and submission queries.
+
+    Built concurrently on PostgreSQL so submissions keep flowing while the
+    indexes are created on a large table. Check the resulting plans with
+    scripts/check_query_plans.py.
+    """
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_test_cases_problem_sample",
+            "test_cases",
+            ["problem_id", "is_sample"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_submissions_problem_status_created",
+            "submissions",
+            ["problem_id", "status", "created_at", "id"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_submissions_problem_status_created", table_name="submissions"
+    )
+    op.drop_index("ix_test_cases_problem_sample", table_name="test_cases")
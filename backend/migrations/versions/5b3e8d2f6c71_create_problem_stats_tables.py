@@ -0,0 +1,65 @@
+"""create_problem_stats_tables
+
+Revision ID: 5b3e8d2f6c71
+Revises: 2c8f5d1e7a63
+Create Date: 2025-06-12 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "5b3e8d2f6c71"
+down_revision: Union[str, None] = "2c8f5d1e7a63"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema to add problem statistics.
+
+    The tables start empty; fill them with scripts/rebuild_problem_stats.py.
+    """
+    op.create_table(
+        "problem_stats",
+        sa.Column("problem_id", sa.String(), nullable=False),
+        sa.Column("submissions", sa.Integer(), nullable=False),
+        sa.Column("accepted", sa.Integer(), nullable=False),
+        sa.Column("attempted_users", sa.Integer(), nullable=False),
+        sa.Column("solved_users", sa.Integer(), nullable=False),
+        sa.Column("fastest_time", sa.Integer(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["problem_id"], ["problems.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("problem_id")
+    )
+    op.create_table(
+        "problem_user_stats",
+        sa.Column("problem_id", sa.String(), nullable=False),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("accepted", sa.Integer(), nullable=False),
+        sa.Column("solved", sa.Boolean(), nullable=False),
+        sa.Column("best_submission_id", sa.String(), nullable=True),
+        sa.Column("best_time", sa.Integer(), nullable=True),
+        sa.Column("best_memory", sa.Integer(), nullable=True),
+        sa.Column("first_solved_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["problem_id"], ["problems.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["best_submission_id"], ["submissions.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("problem_id", "user_id")
+    )
+    op.create_index(
+        "ix_problem_user_stats_leaderboard",
+        "problem_user_stats",
+        ["problem_id", "solved", "best_time"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_problem_user_stats_leaderboard", table_name="problem_user_stats")
+    op.drop_table("problem_user_stats")
+    op.drop_table("problem_stats")
@@ -0,0 +1,52 @@
+"""add_position_to_test_cases
+
+Revision ID: 6a8d3f2b9c41
+Revises: 3e7b9a1c5f24
+Create Date: 2025-06-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "6a8d3f2b9c41"
+down_revision: Union[str, None] = "3e7b9a1c5f24"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema with an explicit judging order for test cases."""
+    op.add_column(
+        "test_cases",
+        sa.Column("position", sa.Integer(), nullable=False, server_default="0"),
+    )
+    # Existing cases keep the order they were judged in: created_at, then id
+    op.execute(
+        """
+        UPDATE test_cases SET position = (
+            SELECT COUNT(*) FROM test_cases AS earlier
+            WHERE earlier.problem_id = test_cases.problem_id
+            AND (
+                earlier.created_at < test_cases.created_at
+                OR (
+                    earlier.created_at = test_cases.created_at
+                    AND earlier.id < test_cases.id
+                )
+            )
+        )
+        """
+    )
+    op.create_index(
+        "ix_test_cases_problem_position",
+        "test_cases",
+        ["problem_id", "position"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_test_cases_problem_position", table_name="test_cases")
+    op.drop_column("test_cases", "position")
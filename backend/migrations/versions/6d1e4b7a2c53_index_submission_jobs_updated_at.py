@@ -0,0 +1,28 @@
+"""index_submission_jobs_updated_at
+
+Revision ID: 6d1e4b7a2c53
+Revises: 3f6b2d8e1a95
+Create Date: 2025-05-26 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "6d1e4b7a2c53"
+down_revision: Union[str, None] = "3f6b2d8e1a95"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema to index the job change feed."""
+    op.create_index(
+        "ix_submission_jobs_updated_at", "submission_jobs", ["updated_at"]
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_submission_jobs_updated_at", table_name="submission_jobs")
@@ -0,0 +1,48 @@
+"""create_problem_ref_id_sequence
+
+Revision ID: 7a1c4e9b2d36
+Revises: 5b3e8d2f6c71
+Create Date: 2025-06-13 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "7a1c4e9b2d36"
+down_revision: Union[str, None] = "5b3e8d2f6c71"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema to allocate problem reference ids from a sequence.
+
+    The sequence continues after the highest existing "P<number>" id. SQLite
+    has no sequences and needs nothing here.
+    """
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute(sa.schema.CreateSequence(sa.Sequence("problem_ref_id_seq")))
+    op.execute(
+        """
+        SELECT setval(
+            'problem_ref_id_seq',
+            COALESCE(
+                (SELECT MAX(SUBSTRING(problem_ref_id FROM 2)::bigint)
+                 FROM problems WHERE problem_ref_id ~ '^P[0-9]+$'),
+                0
+            ) + 1,
+            false
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute(sa.schema.DropSequence(sa.Sequence("problem_ref_id_seq")))
@@ -0,0 +1,73 @@
+"""create_submission_jobs_table
+
+Revision ID: 7c2e9b41d5a8
+Revises: d4f8a2c16b39
+Create Date: 2025-05-20 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "7c2e9b41d5a8"
+down_revision: Union[str, None] = "d4f8a2c16b39"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema to add the durable judge queue."""
+    op.create_table(
+        "submission_jobs",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("submission_id", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("priority", sa.Integer(), nullable=False),
+        sa.Column("available_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False),
+        sa.Column("leased_by", sa.String(), nullable=True),
+        sa.Column("lease_expires_at", sa.DateTime(), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("max_attempts", sa.Integer(), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["submission_id"], ["submissions.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id")
+    )
+    op.create_index(
+        "ix_submission_jobs_submission_id", "submission_jobs", ["submission_id"]
+    )
+    # Partial indexes so claiming and lease reaping never scan finished jobs
+    op.create_index(
+        "ix_submission_jobs_claim",
+        "submission_jobs",
+        [sa.text("priority DESC"), "available_at"],
+        postgresql_where=sa.text("status = 'queued'"),
+    )
+    op.create_index(
+        "ix_submission_jobs_lease",
+        "submission_jobs",
+        ["lease_expires_at"],
+        postgresql_where=sa.text("status = 'leased'"),
+    )
+
+    # Queue submissions that were still waiting for a judge
+    op.execute(
+        """
+        INSERT INTO submission_jobs (id, submission_id, status, priority, available_at, attempts, max_attempts)
+        SELECT gen_random_uuid()::text, id, 'queued', 0, COALESCE(created_at, now()), 0, 3
+        FROM submissions
+        WHERE status IN ('pending', 'running')
+        """
+    )
+    op.execute("UPDATE submissions SET status = 'pending' WHERE status = 'running'")
+
+
+def downgrade() -> None:
+    """Downgrade schema by removing the judge queue."""
+    op.drop_index("ix_submission_jobs_lease", table_name="submission_jobs")
+    op.drop_index("ix_submission_jobs_claim", table_name="submission_jobs")
+    op.drop_index("ix_submission_jobs_submission_id", table_name="submission_jobs")
+    op.drop_table("submission_jobs")
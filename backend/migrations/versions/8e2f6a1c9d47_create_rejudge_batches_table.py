@@ -0,0 +1,64 @@
+"""create_rejudge_batches_table
+
+Revision ID: 8e2f6a1c9d47
+Revises: 0b7e5c9a4f12
+Create Date: 2025-05-28 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "8e2f6a1c9d47"
+down_revision: Union[str, None] = "0b7e5c9a4f12"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema to add re-judge batches."""
+    op.create_table(
+        "rejudge_batches",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("problem_id", sa.String(), nullable=False),
+        sa.Column("requested_by", sa.String(), nullable=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("filters", sa.JSON(), nullable=True),
+        sa.Column("total", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["problem_id"], ["problems.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["requested_by"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id")
+    )
+    op.create_index(
+        "ix_rejudge_batches_problem_id", "rejudge_batches", ["problem_id"]
+    )
+
+    op.add_column(
+        "submission_jobs", sa.Column("batch_id", sa.String(), nullable=True)
+    )
+    op.create_foreign_key(
+        "fk_submission_jobs_batch_id",
+        "submission_jobs",
+        "rejudge_batches",
+        ["batch_id"],
+        ["id"],
+        ondelete="SET NULL",
+    )
+    op.create_index(
+        "ix_submission_jobs_batch_id", "submission_jobs", ["batch_id"]
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_submission_jobs_batch_id", table_name="submission_jobs")
+    op.drop_constraint(
+        "fk_submission_jobs_batch_id", "submission_jobs", type_="foreignkey"
+    )
+    op.drop_column("submission_jobs", "batch_id")
+    op.drop_index("ix_rejudge_batches_problem_id", table_name="rejudge_batches")
+    op.drop_table("rejudge_batches")
@@ -0,0 +1,31 @@
+"""add_judge_mode_to_problems
+
+Revision ID: 9a4d1f6e3b27
+Revises: 7c2e9b41d5a8
+Create Date: 2025-05-22 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "9a4d1f6e3b27"
+down_revision: Union[str, None] = "7c2e9b41d5a8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # "full" keeps the existing behaviour of running every test case
+    op.add_column(
+        "problems",
+        sa.Column("judge_mode", sa.String(), nullable=False, server_default="full"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("problems", "judge_mode")
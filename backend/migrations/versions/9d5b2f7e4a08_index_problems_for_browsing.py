@@ -0,0 +1,39 @@
+"""index_problems_for_browsing
+
+Revision ID: 9d5b2f7e4a08
+Revises: 7a1c4e9b2d36
+Create Date: 2025-06-14 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9d5b2f7e4a08"
+down_revision: Union[str, None] = "7a1c4e9b2d36"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema with indexes for the paginated problem browser."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_problems_created",
+            "problems",
+            ["created_at", "id"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_problems_difficulty_created",
+            "problems",
+            ["difficulty", "created_at", "id"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_problems_difficulty_created", table_name="problems")
+    op.drop_index("ix_problems_created", table_name="problems")
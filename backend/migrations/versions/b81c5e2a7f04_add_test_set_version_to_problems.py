@@ -0,0 +1,30 @@
+"""add_test_set_version_to_problems
+
+Revision ID: b81c5e2a7f04
+Revises: 9a4d1f6e3b27
+Create Date: 2025-05-23 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "b81c5e2a7f04"
+down_revision: Union[str, None] = "9a4d1f6e3b27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "problems",
+        sa.Column("test_set_version", sa.Integer(), nullable=False, server_default="1"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("problems", "test_set_version")
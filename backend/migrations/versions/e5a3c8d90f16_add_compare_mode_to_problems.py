@@ -0,0 +1,32 @@
+"""add_compare_mode_to_problems
+
+Revision ID: e5a3c8d90f16
+Revises: b81c5e2a7f04
+Create Date: 2025-05-24 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "e5a3c8d90f16"
+down_revision: Union[str, None] = "b81c5e2a7f04"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "problems",
+        sa.Column("compare_mode", sa.String(), nullable=False, server_default="lines"),
+    )
+    op.add_column("problems", sa.Column("float_tolerance", sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("problems", "float_tolerance")
+    op.drop_column("problems", "compare_mode")
@@ -0,0 +1,130 @@
+"""
+Benchmark cold process spawns against warm runners for short test programs.
+
+Runs a `Person` class exercise (like the ones in seed_skill_trees.py) against
+a batch of test inputs, once by spawning a fresh interpreter per test and once
+through a warm runner from the judge's runner pool.
+
+Usage:
+    python scripts/bench_runners.py [--tests 50] [--rounds 5]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.runner_pool import RunnerPool
+from app.services.sandbox import run_process
+
+PERSON_PROGRAM = """
+from dataclasses import dataclass
+
+
+@dataclass
+class Person:
+    name: str
+    age: int
+
+    def greet(self):
+        return f"Hi, I am {self.name} and I am {self.age} years old"
+
+
+name, age = input().split()
+print(Person(name, int(age)).greet())
+"""
+
+TIME_LIMIT_MS = 2000
+MEMORY_LIMIT_MB = 256
+MAX_OUTPUT_BYTES = 1024 * 1024
+
+
+def prepare(work_dir, count):
+    files = []
+    for index in range(count):
+        stdin_path = os.path.join(work_dir, f".stdin-{index}")
+        with open(stdin_path, "w") as f:
+            f.write(f"student{index} {10 + index % 50}\n")
+        files.append(
+            {
+                "stdin": stdin_path,
+                "stdout": os.path.join(work_dir, f".stdout-{index}"),
+                "stderr": os.path.join(work_dir, f".stderr-{index}"),
+            }
+        )
+    with open(os.path.join(work_dir, "main.py"), "w") as f:
+        f.write(PERSON_PROGRAM)
+    return files
+
+
+def bench_cold(work_dir, files):
+    start = time.perf_counter()
+    for test in files:
+        run = run_process(
+            [sys.executable, "-I", "main.py"],
+            work_dir,
+            test["stdin"],
+            TIME_LIMIT_MS,
+            MEMORY_LIMIT_MB,
+            MAX_OUTPUT_BYTES,
+            stdout_path=test["stdout"],
+            stderr_path=test["stderr"],
+        )
+        assert run["exit_code"] == 0, run["stderr"]
+    return time.perf_counter() - start
+
+
+def bench_warm(pool, work_dir, files):
+    start = time.perf_counter()
+    with pool.runner("python") as runner:
+        assert runner.load(PERSON_PROGRAM, "main.py") is None
+        runs = runner.run(
+            work_dir, files, TIME_LIMIT_MS, MEMORY_LIMIT_MB, MAX_OUTPUT_BYTES
+        )
+    assert all(run["exit_code"] == 0 for run in runs), runs[0]["stderr"]
+    return time.perf_counter() - start
+
+
+def report(label, samples, tests):
+    per_test = [sample / tests * 1000 for sample in samples]
+    print(
+        f"{label:<6} per submission: median {statistics.median(samples) * 1000:8.1f} ms"
+        f" | per test: median {statistics.median(per_test):6.2f} ms,"
+        f" best {min(per_test):6.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tests", type=int, default=50, help="test cases per run")
+    parser.add_argument("--rounds", type=int, default=5, help="repetitions")
+    args = parser.parse_args()
+
+    pool = RunnerPool()
+    pool.prewarm(["python"])
+    work_dir = tempfile.mkdtemp(prefix="bench-runners-")
+    try:
+        files = prepare(work_dir, args.tests)
+        # Let the pre-warmed runner finish its imports before timing
+        bench_warm(pool, work_dir, files[:1])
+
+        cold = [bench_cold(work_dir, files) for _ in range(args.rounds)]
+        warm = [bench_warm(pool, work_dir, files) for _ in range(args.rounds)]
+
+        print(f"{args.tests} tests x {args.rounds} rounds")
+        report("cold", cold, args.tests)
+        report("warm", warm, args.tests)
+        print(f"speed-up: {statistics.median(cold) / statistics.median(warm):.1f}x")
+    finally:
+        pool.close_all()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
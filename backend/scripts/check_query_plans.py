@@ -0,0 +1,495 @@
+"""
+Check that the hot problem, test-case, submission and judge queries use their
+indexes.
+
+Seeds a scratch database with about a million submissions (topping up an
+earlier run), runs EXPLAIN on each query - built the same way as in
+app/api/routes/problem.py and the judge services - and fails if a plan does
+not use the expected index or falls back to a full scan of a large table.
+Works on PostgreSQL (EXPLAIN (FORMAT JSON)) and SQLite (EXPLAIN QUERY PLAN).
+
+The database must be a scratch one: seeding writes fake users and problems.
+Missing tables are created from the models; on an existing database run
+``alembic upgrade head`` first so the migrations' indexes are what is checked.
+
+Usage:
+    python scripts/check_query_plans.py --database-url postgresql://... \
+        [--rows 1000000] [--verbose]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Tuple
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, exists, func, insert, tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, load_only
+
+from app.api.routes.problem import PROBLEM_SUMMARY_COLUMNS, SUBMISSION_SUMMARY_COLUMNS
+from app.db.database import Base
+from app.models.problem import (
+    Problem,
+    Submission,
+    SubmissionJob,
+    TestCase,
+    VerdictCacheEntry,
+)
+from app.models.user import User
+from app.services.problem_stats import BEST_ORDER, UNJUDGED_STATUSES
+
+STATUSES = (
+    ["accepted"] * 4 + ["wrong_answer"] * 4 + ["runtime_error", "time_limit_exceeded"]
+)
+DIFFICULTIES = ["easy", "medium", "hard"]
+SUBMISSIONS_PER_PROBLEM = 500
+SUBMISSIONS_PER_USER = 200
+TESTS_PER_PROBLEM = 10
+CHUNK = 10000
+
+# Tables big enough that a full scan is a regression
+LARGE_TABLES = {"submissions", "submission_jobs", "test_cases", "verdict_cache"}
+
+
+def seed(engine: Engine, rows: int) -> None:
+    """
+    Top the database up to ``rows`` submissions, each with a finished job
+    """
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        existing = db.query(func.count(Submission.id)).scalar()
+        if existing >= rows:
+            print(f"Database already has {existing} submissions")
+            return
+
+        missing = rows - existing
+        problem_count = max(1, missing // SUBMISSIONS_PER_PROBLEM)
+        user_count = max(1, missing // SUBMISSIONS_PER_USER)
+        print(
+            f"Seeding {missing} submissions over {problem_count} problems "
+            f"and {user_count} users..."
+        )
+        started = time.time()
+
+        user_ids = [str(uuid.uuid4()) for _ in range(user_count)]
+        problem_ids = [str(uuid.uuid4()) for _ in range(problem_count)]
+        _insert(
+            db,
+            User,
+            (
+                {
+                    "id": user_id,
+                    "email": f"{user_id}@plans.test",
+                    "username": f"plans-{user_id}",
+                    "is_active": True,
+                }
+                for user_id in user_ids
+            ),
+        )
+        _insert(
+            db,
+            Problem,
+            (
+                {
+                    "id": problem_id,
+                    "title": f"Problem {index}",
+                    "description": "Seeded by check_query_plans.py",
+                    "problem_ref_id": f"plans-{problem_id}",
+                    "difficulty": DIFFICULTIES[index % len(DIFFICULTIES)],
+                    "test_set_version": 1,
+                }
+                for index, problem_id in enumerate(problem_ids)
+            ),
+        )
+        _insert(
+            db,
+            TestCase,
+            (
+                {
+                    "id": str(uuid.uuid4()),
+                    "problem_id": problem_id,
+                    "input_data": f"{index}\n",
+                    "expected_output": f"{index}\n",
+                    "is_sample": index < 2,
+                    "weight": 1,
+                    "position": index,
+                }
+                for problem_id in problem_ids
+                for index in range(TESTS_PER_PROBLEM)
+            ),
+        )
+
+        start = datetime.utcnow() - timedelta(days=365)
+        submissions = []
+        jobs = []
+        for index in range(missing):
+            submission_id = str(uuid.uuid4())
+            created_at = start + timedelta(seconds=random.randrange(365 * 86400))
+            submissions.append(
+                {
+                    "id": submission_id,
+                    "problem_id": random.choice(problem_ids),
+                    "user_id": random.choice(user_ids),
+                    "code": f"print({index})\n",
+                    "language": "python",
+                    "status": random.choice(STATUSES),
+                    "score": 0,
+                    "from_verdict_cache": False,
+                    "created_at": created_at,
+                }
+            )
+            jobs.append(
+                {
+                    "id": str(uuid.uuid4()),
+                    "submission_id": submission_id,
+                    "status": "done",
+                    "priority": 0,
+                    "available_at": created_at,
+                    "attempts": 1,
+                    "max_attempts": 3,
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                }
+            )
+            if len(submissions) >= CHUNK:
+                _flush(db, submissions, jobs)
+        _flush(db, submissions, jobs)
+
+        db.commit()
+        print(f"Seeded in {time.time() - started:.0f}s")
+
+
+def analyze(engine: Engine) -> None:
+    """Refresh planner statistics, so plans do not depend on stale row counts"""
+    with engine.connect() as connection:
+        connection.exec_driver_sql("ANALYZE")
+        connection.commit()
+
+
+def _insert(db: Session, model: Any, rows: Any) -> None:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= CHUNK:
+            db.execute(insert(model), batch)
+            batch = []
+    if batch:
+        db.execute(insert(model), batch)
+
+
+def _flush(db: Session, submissions: List[Dict], jobs: List[Dict]) -> None:
+    if submissions:
+        db.execute(insert(Submission), submissions)
+        db.execute(insert(SubmissionJob), jobs)
+        submissions.clear()
+        jobs.clear()
+
+
+def hot_queries(db: Session) -> List[Tuple[str, Any, Tuple[str, ...]]]:
+    """
+    (name, query, acceptable index names or name prefixes) for each query
+    """
+    problem_id, user_id = db.query(Submission.problem_id, Submission.user_id).first()
+    newest = (
+        db.query(Submission.created_at, Submission.id)
+        .filter(Submission.problem_id == problem_id)
+        .order_by(Submission.created_at.desc(), Submission.id.desc())
+        .offset(50)
+        .first()
+    )
+    # Few enough ref ids that probing the unique index beats scanning even
+    # the problems table of a small seed (--rows 20000 makes 40 problems)
+    ref_ids = [
+        row.problem_ref_id
+        for row in db.query(Problem.problem_ref_id)
+        .filter(Problem.problem_ref_id.isnot(None))
+        .limit(3)
+    ]
+    now = datetime.utcnow()
+
+    def submission_page(*criteria: Any) -> Any:
+        return (
+            db.query(Submission)
+            .filter(Submission.problem_id == problem_id, *criteria)
+            .options(load_only(*SUBMISSION_SUMMARY_COLUMNS))
+            .order_by(Submission.created_at.desc(), Submission.id.desc())
+            .limit(51)
+        )
+
+    active_job = exists().where(
+        SubmissionJob.submission_id == Submission.id,
+        SubmissionJob.status.in_(("queued", "leased")),
+    )
+
+    def problem_page(*criteria: Any) -> Any:
+        return (
+            db.query(Problem)
+            .filter(*criteria)
+            .options(load_only(*PROBLEM_SUMMARY_COLUMNS))
+            .order_by(Problem.created_at.desc(), Problem.id.desc())
+            .limit(51)
+        )
+
+    return [
+        (
+            "problem browser",
+            problem_page(),
+            ("ix_problems_created",),
+        ),
+        (
+            "problem browser (difficulty)",
+            problem_page(Problem.difficulty == "hard"),
+            ("ix_problems_difficulty_created",),
+        ),
+        (
+            "problem by ref id",
+            db.query(Problem).filter(Problem.problem_ref_id == ref_ids[0]),
+            ("problems_problem_ref_id_key", "sqlite_autoindex_problems_"),
+        ),
+        (
+            "problems by ref id",
+            db.query(Problem).filter(Problem.problem_ref_id.in_(ref_ids)),
+            # The unique constraint's index, named by the database
+            ("problems_problem_ref_id_key", "sqlite_autoindex_problems_"),
+        ),
+        (
+            "test cases (teacher)",
+            db.query(TestCase)
+            .filter(TestCase.problem_id == problem_id)
+            .order_by(TestCase.position, TestCase.created_at, TestCase.id),
+            ("ix_test_cases_problem_position",),
+        ),
+        (
+            "test cases (samples)",
+            db.query(TestCase)
+            .filter(TestCase.problem_id == problem_id, TestCase.is_sample == True)
+            .order_by(TestCase.position, TestCase.created_at, TestCase.id),
+            # Either the sample filter or the listing order
+            ("ix_test_cases_problem_sample", "ix_test_cases_problem_position"),
+        ),
+        (
+            "judge test set",
+            db.query(TestCase)
+            .filter(TestCase.problem_id == problem_id)
+            .order_by(TestCase.position, TestCase.created_at, TestCase.id),
+            ("ix_test_cases_problem_position",),
+        ),
+        (
+            "submissions page",
+            submission_page(),
+            ("ix_submissions_problem_created",),
+        ),
+        (
+            "submissions page (cursor)",
+            submission_page(
+                tuple_(Submission.created_at, Submission.id) < tuple_(*newest)
+            ),
+            ("ix_submissions_problem_created",),
+        ),
+        (
+            "submissions page (user)",
+            submission_page(Submission.user_id == user_id),
+            ("ix_submissions_problem_user_created",),
+        ),
+        (
+            "submissions page (status)",
+            submission_page(Submission.status == "accepted"),
+            ("ix_submissions_problem_status_created",),
+        ),
+        (
+            "re-judge selection",
+            db.query(Submission.id)
+            .filter(
+                Submission.problem_id == problem_id,
+                ~active_job,
+                Submission.status.in_(["wrong_answer", "runtime_error"]),
+            )
+            .order_by(Submission.created_at),
+            ("ix_submissions_problem_status_created", "ix_submissions_problem_created"),
+        ),
+        (
+            "stats user refresh",
+            db.query(
+                func.count(Submission.id),
+                func.min(Submission.created_at).filter(Submission.status == "accepted"),
+            ).filter(
+                Submission.problem_id == problem_id,
+                Submission.user_id == user_id,
+                Submission.status.notin_(UNJUDGED_STATUSES),
+            ),
+            ("ix_submissions_problem_user_created",),
+        ),
+        (
+            "stats best submission",
+            db.query(Submission.id, Submission.execution_time)
+            .filter(
+                Submission.problem_id == problem_id,
+                Submission.user_id == user_id,
+                Submission.status == "accepted",
+            )
+            .order_by(*BEST_ORDER)
+            .limit(1),
+            (
+                "ix_submissions_problem_user_created",
+                "ix_submissions_problem_status_created",
+            ),
+        ),
+        (
+            "verdict cache stats",
+            db.query(
+                func.count(Submission.id),
+                func.count(Submission.id).filter(
+                    Submission.from_verdict_cache.is_(True)
+                ),
+            ).filter(Submission.problem_id == problem_id),
+            (
+                "ix_submissions_problem_created",
+                "ix_submissions_problem_user_created",
+                "ix_submissions_problem_status_created",
+            ),
+        ),
+        (
+            "verdict cache lookup",
+            db.query(VerdictCacheEntry).filter(
+                VerdictCacheEntry.problem_id == problem_id,
+                VerdictCacheEntry.test_set_version == 1,
+                VerdictCacheEntry.language == "python",
+                VerdictCacheEntry.code_hash == "0" * 64,
+            ),
+            # SQLite names unique constraint indexes itself
+            ("uq_verdict_cache_key", "sqlite_autoindex_verdict_cache_"),
+        ),
+        (
+            "judge claim",
+            db.query(SubmissionJob)
+            .filter(
+                SubmissionJob.status == "queued",
+                SubmissionJob.available_at <= now,
+                SubmissionJob.batch_id.is_(None),
+            )
+            .order_by(SubmissionJob.priority.desc(), SubmissionJob.available_at)
+            .limit(4),
+            ("ix_submission_jobs_claim",),
+        ),
+        (
+            "lease reaper",
+            db.query(SubmissionJob).filter(
+                SubmissionJob.status == "leased",
+                SubmissionJob.lease_expires_at < now,
+            ),
+            ("ix_submission_jobs_lease",),
+        ),
+        (
+            "submission event feed",
+            db.query(Submission.id, Submission.status, SubmissionJob.updated_at)
+            .join(SubmissionJob, SubmissionJob.submission_id == Submission.id)
+            .filter(
+                SubmissionJob.updated_at >= now - timedelta(seconds=5),
+                Submission.user_id.in_([user_id]),
+            )
+            .order_by(SubmissionJob.updated_at),
+            # Either side bounds the join: recent changes, or the user's rows
+            ("ix_submission_jobs_updated_at", "ix_submissions_problem_user_created"),
+        ),
+    ]
+
+
+def explain(db: Session, query: Any) -> Tuple[List[str], List[str], str]:
+    """
+    Run EXPLAIN on a query
+
+    Returns:
+        Indexes used, large tables read with a full scan, and the raw plan
+    """
+    connection = db.connection()
+    dialect = connection.dialect
+    compiled = query.statement.compile(
+        dialect=dialect, compile_kwargs={"render_postcompile": True}
+    )
+    params = compiled.construct_params()
+    if dialect.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+
+    if dialect.name == "postgresql":
+        plan = connection.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {compiled}", params
+        ).scalar()
+        plan = plan if isinstance(plan, list) else json.loads(plan)
+        indexes: List[str] = []
+        scans: List[str] = []
+        _walk_postgres_plan(plan[0]["Plan"], indexes, scans)
+        return indexes, scans, json.dumps(plan, indent=2)
+
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+    details = [row[-1] for row in rows]
+    indexes = [
+        detail.split(" INDEX ")[1].split(" ")[0]
+        for detail in details
+        if " INDEX " in detail
+    ]
+    scans = [
+        detail.split()[1]
+        for detail in details
+        if detail.startswith("SCAN ") and " INDEX " not in detail
+    ]
+    return indexes, scans, "\n".join(details)
+
+
+def _walk_postgres_plan(node: Dict, indexes: List[str], scans: List[str]) -> None:
+    if "Index Name" in node:
+        indexes.append(node["Index Name"])
+    if node.get("Node Type") == "Seq Scan":
+        scans.append(node.get("Relation Name"))
+    for child in node.get("Plans", []):
+        _walk_postgres_plan(child, indexes, scans)
+
+
+def check(engine: Engine, verbose: bool) -> bool:
+    ok = True
+    with Session(engine) as db:
+        for name, query, expected in hot_queries(db):
+            indexes, scans, plan = explain(db, query)
+            full_scans = [table for table in scans if table in LARGE_TABLES]
+            passed = (
+                any(index.startswith(expected) for index in indexes) and not full_scans
+            )
+            ok = ok and passed
+
+            print(
+                f"{'ok  ' if passed else 'FAIL'} {name:<28} "
+                f"indexes={','.join(indexes) or '-'}"
+                + (f" full scans={','.join(full_scans)}" if full_scans else "")
+            )
+            if verbose or not passed:
+                print("     expected one of: " + ", ".join(expected))
+                for line in plan.splitlines():
+                    print(f"     {line}")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--database-url", required=True, help="Scratch database")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--verbose", action="store_true", help="Print every plan")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    seed(engine, args.rows)
+    analyze(engine)
+    if not check(engine, args.verbose):
+        print("Query plans regressed")
+        sys.exit(1)
+    print("All query plans use their indexes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Maintain the test data store (TEST_DATA_DIR).
+
+By default deletes stored files that no test case references any more
+(deleting or editing a test case leaves its files behind, since other cases
+may share them). Files younger than --min-age seconds are kept, so an import
+that is still running is not robbed of its data.
+
+--inline instead moves all stored data back into the test_cases rows, e.g.
+before turning the store off or downgrading past the migration that added it.
+
+Usage:
+    python scripts/gc_test_data.py [--min-age 3600]
+    python scripts/gc_test_data.py --inline
+"""
+
+import argparse
+import logging
+import os
+import sys
+from typing import Set
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.db.database import SessionLocal
+from app.models.problem import Problem, TestCase
+from app.services.test_data_store import test_data_store
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INLINE_CHUNK = 100
+
+
+def referenced_hashes(db: Session) -> Set[str]:
+    referenced = set()
+    for input_hash, expected_output_hash in db.query(
+        TestCase.input_hash, TestCase.expected_output_hash
+    ).filter(
+        or_(TestCase.input_hash.isnot(None), TestCase.expected_output_hash.isnot(None))
+    ):
+        referenced.update(
+            digest for digest in (input_hash, expected_output_hash) if digest
+        )
+    return referenced
+
+
+def inline_all(db: Session) -> int:
+    inlined = 0
+    while True:
+        test_cases = (
+            db.query(TestCase)
+            .filter(
+                or_(
+                    TestCase.input_hash.isnot(None),
+                    TestCase.expected_output_hash.isnot(None),
+                )
+            )
+            .limit(INLINE_CHUNK)
+            .all()
+        )
+        if not test_cases:
+            return inlined
+        for test_case in test_cases:
+            test_data_store.inline(test_case)
+            # The judge's cached test sets still point at the files
+            db.query(Problem).filter(Problem.id == test_case.problem_id).update(
+                {Problem.test_set_version: Problem.test_set_version + 1},
+                synchronize_session=False,
+            )
+        db.commit()
+        db.expunge_all()
+        inlined += len(test_cases)
+        logger.info(f"Inlined {inlined} test cases")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--min-age", type=int, default=3600)
+    parser.add_argument("--inline", action="store_true")
+    args = parser.parse_args()
+
+    if not test_data_store.enabled:
+        sys.exit("TEST_DATA_DIR is not set")
+
+    db = SessionLocal()
+    try:
+        if args.inline:
+            inline_all(db)
+            return
+        referenced = referenced_hashes(db)
+    finally:
+        db.close()
+    test_data_store.collect_garbage(referenced, min_age_seconds=args.min_age)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Load-test the skill-tree routes on one worker at rising concurrency.
+
+Sends --requests GETs to the skill-tree list at each concurrency level and
+prints throughput and latency, so scaling with concurrency shows directly.
+Against --url it measures a running server (start it with a single worker,
+e.g. ``uvicorn app.main:app --workers 1``, against PostgreSQL). Without
+--url it runs the routes in-process on one event loop, and also runs the
+same query through the sync session inside an ``async def`` handler - the
+pattern the routes used before - for comparison. A local SQLite database
+answers in microseconds, which hides what blocking costs; --db-latency-ms
+adds a simulated network round trip to every SQLite statement.
+
+Usage:
+    python scripts/load_test_async_db.py [--url http://localhost:8000]
+        [--concurrency 1,4,16,64] [--requests 2000] [--seed-trees 10]
+        [--db-latency-ms 2]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+import uuid
+from typing import List
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.api.dependencies import get_current_user
+from app.api.routes import skill_tree
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.db.database import Base, SessionLocal, async_engine, engine, get_db
+from app.models.skill_tree import SkillTree
+from app.models.user import User
+from app.schemas.skill_tree import SkillTreeResponse
+
+LIST_PATH = f"{settings.API_V1_STR}/skill-trees/"
+BLOCKING_PATH = "/blocking/skill-trees/"
+
+
+def seed(count):
+    """A user to authenticate as, and ``count`` skill trees; returns the user id"""
+    db = SessionLocal()
+    try:
+        user = User(
+            email=f"load-{uuid.uuid4().hex[:8]}@example.com",
+            username=f"load-{uuid.uuid4().hex[:8]}",
+        )
+        db.add(user)
+        existing = db.query(SkillTree).count()
+        for index in range(existing, count):
+            db.add(
+                SkillTree(
+                    id=f"ST{uuid.uuid4().hex[:8].upper()}",
+                    title=f"Load test tree {index}",
+                    nodes=[{"id": node, "title": f"Node {node}"} for node in range(5)],
+                )
+            )
+        db.commit()
+        return user.id
+    finally:
+        db.close()
+
+
+def add_latency(seconds):
+    """Delay every SQLite statement, in the thread that runs it"""
+
+    def on_connect(dbapi_connection, connection_record):
+        # aiosqlite wraps the sqlite3 connection it runs in its own thread
+        connection = getattr(dbapi_connection, "driver_connection", dbapi_connection)
+        connection = getattr(connection, "_conn", connection)
+        connection.set_trace_callback(lambda statement: time.sleep(seconds))
+
+    for target in (engine, async_engine.sync_engine):
+        if target.dialect.name != "sqlite":
+            sys.exit("--db-latency-ms needs a SQLite DATABASE_URL")
+        event.listen(target, "connect", on_connect)
+
+
+def in_process_app():
+    app = FastAPI()
+    app.include_router(skill_tree.router, prefix=f"{settings.API_V1_STR}/skill-trees")
+
+    @app.get(BLOCKING_PATH, response_model=List[SkillTreeResponse])
+    async def list_skill_trees_blocking(
+        current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
+    ):
+        # The old pattern: sync queries that block the event loop
+        return db.query(SkillTree).all()
+
+    return app
+
+
+async def run_level(client, path, headers, concurrency, total):
+    latencies = []
+    remaining = iter(range(total))
+
+    async def worker():
+        for _ in remaining:
+            begin = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            latencies.append(time.perf_counter() - begin)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return total / elapsed, latencies
+
+
+async def sweep(client, label, path, headers, levels, total):
+    print(label)
+    baseline = None
+    for concurrency in levels:
+        try:
+            rate, latencies = await run_level(client, path, headers, concurrency, total)
+        except Exception as e:
+            # The blocking handler can starve its own connection pool
+            print(f"  concurrency {concurrency:>4}: failed ({type(e).__name__}: {e})")
+            return
+        baseline = baseline or rate
+        millis = sorted(latency * 1000 for latency in latencies)
+        print(
+            f"  concurrency {concurrency:>4}: {rate:8.1f} req/s ({rate / baseline:4.1f}x)"
+            f" | median {statistics.median(millis):7.1f} ms,"
+            f" p99 {millis[int(len(millis) * 0.99) - 1]:7.1f} ms"
+        )
+
+
+async def main_async(args):
+    levels = [int(level) for level in args.concurrency.split(",")]
+    if not args.url:
+        Base.metadata.create_all(bind=engine)
+    headers = {"Authorization": f"Bearer {create_access_token(seed(args.seed_trees))}"}
+    limits = httpx.Limits(max_connections=max(levels))
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, limits=limits) as client:
+            await sweep(client, LIST_PATH, LIST_PATH, headers, levels, args.requests)
+        return
+
+    if args.db_latency_ms:
+        add_latency(args.db_latency_ms / 1000)
+    transport = httpx.ASGITransport(app=in_process_app())
+    try:
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://load-test", limits=limits
+        ) as client:
+            await sweep(
+                client, "async session", LIST_PATH, headers, levels, args.requests
+            )
+            await sweep(
+                client,
+                "sync session (before)",
+                BLOCKING_PATH,
+                headers,
+                levels,
+                args.requests,
+            )
+    finally:
+        # aiosqlite connections hold non-daemon threads
+        await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="base URL of a running server")
+    parser.add_argument("--concurrency", default="1,4,16,64")
+    parser.add_argument("--requests", type=int, default=2000, help="per level")
+    parser.add_argument("--seed-trees", type=int, default=10)
+    parser.add_argument("--db-latency-ms", type=float, default=0)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Rebuild problem_stats and problem_user_stats from the submissions table.
+
+The judge keeps both tables up to date as verdicts land; run this after the
+migration that creates them, after editing submissions by hand, or whenever
+the numbers look off. Each problem is rebuilt in its own transaction while
+verdicts on it wait, so it is safe to run against a live judge.
+
+Usage:
+    python scripts/rebuild_problem_stats.py [--problem-id ID]
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.database import SessionLocal
+from app.services.problem_stats import problem_stats
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--problem-id", help="Rebuild only this problem")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.problem_id:
+            totals = problem_stats.rebuild(db, args.problem_id)
+            logger.info(
+                f"Problem {args.problem_id}: {totals.submissions} submissions, "
+                f"{totals.solved_users}/{totals.attempted_users} users solved it"
+            )
+        else:
+            problem_stats.rebuild_all(db)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+import os
+import tempfile
+
+# Settings are read at import time: point the app at a throwaway SQLite
+# database before anything under app/ is imported
+_db_dir = tempfile.mkdtemp(prefix="leapcode-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/test.db")
+os.environ.setdefault("DEBUG", "false")
+
+import pytest  # noqa: E402
+
+from app.db.database import Base, SessionLocal, engine  # noqa: E402
+from app.models import problem, skill_tree, user  # noqa: E402,F401
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
@@ -0,0 +1,83 @@
+from app.services import execution
+from app.services.block_compiler import block_compiler
+from app.services.execution import judge_submission
+
+# Function blocks are outside the VM's subset, so this runs as Python
+FAILING_FUNCTION = [
+    {
+        "id": "func",
+        "type": "createFunc",
+        "name": "f",
+        "nestedBlocks": [
+            {"id": "ok", "type": "setVariable", "name": "x", "value": "1"},
+            {"id": "boom", "type": "setVariable", "name": "y", "value": "x / 0"},
+        ],
+    },
+    {"id": "call", "type": "callFunc", "name": "f"},
+]
+
+
+def test_traceback_maps_to_the_innermost_block():
+    program = block_compiler.compile(FAILING_FUNCTION)
+    stderr = (
+        "Traceback (most recent call last):\n"
+        '  File "/tmp/run-1/main.py", line 4, in <module>\n'
+        '  File "/tmp/run-1/main.py", line 3, in f\n'
+        "ZeroDivisionError: division by zero\n"
+    )
+
+    assert program.block_for_traceback(stderr, "main.py") == "boom"
+    assert program.block_for_traceback("MemoryError\n", "main.py") is None
+
+
+def test_runtime_error_in_the_sandbox_names_its_block(monkeypatch):
+    monkeypatch.setattr(execution, "sandbox_isolation", lambda: None)
+    program = block_compiler.compile(FAILING_FUNCTION)
+
+    result = judge_submission(
+        {
+            "language": "blocks",
+            "code": program.source,
+            "block_structure": FAILING_FUNCTION,
+            "time_limit": 5000,
+            "memory_limit": 256,
+            "tests": [
+                {
+                    "id": "t1",
+                    "weight": 1,
+                    "is_sample": False,
+                    "input": "",
+                    "expected": "",
+                }
+            ],
+        }
+    )
+
+    assert result["status"] == "runtime_error"
+    assert result["test_results"][0]["block_id"] == "boom"
+
+
+def test_runtime_error_in_the_vm_names_its_block():
+    result = judge_submission(
+        {
+            "language": "blocks",
+            "code": "",
+            "block_structure": [
+                {"id": "boom", "type": "setVariable", "name": "x", "value": "1 / 0"}
+            ],
+            "time_limit": 1000,
+            "memory_limit": 256,
+            "tests": [
+                {
+                    "id": "t1",
+                    "weight": 1,
+                    "is_sample": False,
+                    "input": "",
+                    "expected": "",
+                }
+            ],
+        }
+    )
+
+    assert result["status"] == "runtime_error"
+    assert result["test_results"][0]["block_id"] == "boom"
@@ -0,0 +1,83 @@
+import time
+
+from app.services.block_vm import compile_blocks, step_budget
+from app.services.execution import classify_run
+
+MEMORY_BYTES = 256 * 1024 * 1024
+MAX_OUTPUT_BYTES = 1024 * 1024
+
+
+def _program(*expressions):
+    return compile_blocks(
+        [
+            {"id": f"b{index}", "type": "setVariable", "name": "x", "value": value}
+            for index, value in enumerate(expressions)
+        ]
+    )
+
+
+def _run(program, time_limit_ms=1000, max_steps=None, memory_bytes=MEMORY_BYTES):
+    if max_steps is None:
+        max_steps = step_budget(time_limit_ms)
+    return program.run("", max_steps, memory_bytes, MAX_OUTPUT_BYTES, time_limit_ms)
+
+
+def test_max_over_huge_range_is_time_limit_exceeded():
+    start = time.perf_counter()
+    run = _run(_program("max(range(10**12))"), max_steps=step_budget(1000))
+
+    assert time.perf_counter() - start < 1
+    assert run["timed_out"]
+    assert classify_run(run, 1000, 256) == "time_limit_exceeded"
+
+
+def test_builtins_over_small_iterables_still_run():
+    run = _run(_program("max(range(1000)) + len(range(10**12))", "min('zyx')"))
+
+    assert not run["timed_out"]
+    assert run["exit_code"] == 0
+
+
+def test_scan_of_huge_range_is_time_limit_exceeded():
+    run = _run(_program("0.5 in range(10**12)"))
+
+    assert run["timed_out"]
+
+
+def test_big_integer_arithmetic_is_charged():
+    start = time.perf_counter()
+    run = _run(_program("10 ** 100000000"))
+
+    assert time.perf_counter() - start < 1
+    assert run["timed_out"]
+
+
+def test_wall_clock_deadline_applies_without_step_limit():
+    loop = compile_blocks(
+        [{"id": "loop", "type": "whileLoop", "condition": "True", "nestedBlocks": []}]
+    )
+
+    start = time.perf_counter()
+    run = _run(loop, time_limit_ms=100, max_steps=10**12)
+
+    assert time.perf_counter() - start < 1
+    assert run["timed_out"]
+
+
+def test_wide_string_format_is_memory_limit_exceeded():
+    run = _run(_program('len("%0300000000d" % 1)'), memory_bytes=64 * 1024 * 1024)
+
+    assert classify_run(run, 1000, 64) == "memory_limit_exceeded"
+
+
+def test_string_concatenation_past_budget_is_memory_limit_exceeded():
+    run = _run(_program('"a" * 40000000', "x + x"), memory_bytes=64 * 1024 * 1024)
+
+    assert classify_run(run, 1000, 64) == "memory_limit_exceeded"
+
+
+def test_small_string_operations_still_run():
+    run = _run(_program('"%05d" % 42 + "!" * 3'))
+
+    assert run["exit_code"] == 0
+    assert run["memory_kb"] < 1024
@@ -0,0 +1,30 @@
+import sys
+
+from app.services.execution import classify_run
+from app.services.sandbox import run_process
+
+
+def test_python_output_past_limit_is_output_limit_exceeded(tmp_path):
+    source = tmp_path / "main.py"
+    source.write_text("while True:\n    print('x' * 1000)\n")
+
+    run = run_process(
+        [sys.executable, "-I", "main.py"], str(tmp_path), None, 5000, None, 64 * 1024
+    )
+
+    # CPython ignores SIGXFSZ: the write fails and the program exits with a traceback
+    assert run["exit_code"] == 1
+    assert run["stdout_bytes"] == 64 * 1024
+    assert classify_run(run, 5000, None, 64 * 1024) == "output_limit_exceeded"
+
+
+def test_output_under_limit_is_not_flagged(tmp_path):
+    source = tmp_path / "main.py"
+    source.write_text("print('hello')\n")
+
+    run = run_process(
+        [sys.executable, "-I", "main.py"], str(tmp_path), None, 5000, None, 64 * 1024
+    )
+
+    assert run["stdout_bytes"] == len("hello\n")
+    assert classify_run(run, 5000, None, 64 * 1024) is None
@@ -0,0 +1,34 @@
+import os
+
+from app.services.file_storage import FileStorageService, file_storage_service
+
+
+def _is_under(path, directory):
+    path = os.path.realpath(path)
+    directory = os.path.realpath(directory)
+    return os.path.commonpath([path, directory]) == directory
+
+
+def test_metadata_is_not_served_from_static():
+    path = file_storage_service._metadata_path("user-1")
+
+    assert not _is_under(path, file_storage_service.base_dir)
+
+
+def test_metadata_written_outside_base_dir(tmp_path):
+    storage = FileStorageService(
+        base_dir=str(tmp_path / "static"), metadata_dir=str(tmp_path / "meta")
+    )
+    legacy_path = os.path.join(storage.profile_images_dir, "user-1.json")
+    with open(legacy_path, "w") as f:
+        f.write("{}")
+
+    storage._write_metadata("user-1", {"source_url": "https://example.com/a.png"})
+
+    assert os.path.exists(tmp_path / "meta" / "user-1.json")
+    assert not os.path.exists(legacy_path)
+    assert not any(
+        name.endswith(".json")
+        for _, _, names in os.walk(storage.base_dir)
+        for name in names
+    )
@@ -0,0 +1,78 @@
+from app.models.problem import Problem, ProblemStats, Submission
+from app.models.user import User
+from app.services.problem_stats import problem_stats
+
+TOTALS = ("submissions", "accepted", "attempted_users", "solved_users", "fastest_time")
+
+
+def _setup(db):
+    problem = Problem(title="Stats", description="", problem_ref_id="stats")
+    users = [
+        User(email=f"u{index}@example.com", username=f"u{index}") for index in range(3)
+    ]
+    db.add(problem)
+    db.add_all(users)
+    db.commit()
+    return problem, users
+
+
+def _judge(db, problem, user, status, execution_time=None):
+    submission = Submission(
+        problem_id=problem.id,
+        user_id=user.id,
+        code="print(1)",
+        language="python",
+        status=status,
+        execution_time=execution_time,
+    )
+    db.add(submission)
+    db.flush()
+    problem_stats.record_verdict(db, problem.id, user.id)
+    db.commit()
+    return submission
+
+
+def _totals(db, problem):
+    totals = db.get(ProblemStats, problem.id, populate_existing=True)
+    return {name: getattr(totals, name) for name in TOTALS}
+
+
+def test_verdicts_apply_deltas_to_totals(db):
+    problem, (first, second, third) = _setup(db)
+    _judge(db, problem, first, "wrong_answer")
+    _judge(db, problem, first, "accepted", 120)
+    _judge(db, problem, second, "accepted", 80)
+    _judge(db, problem, third, "runtime_error")
+
+    assert _totals(db, problem) == {
+        "submissions": 4,
+        "accepted": 2,
+        "attempted_users": 3,
+        "solved_users": 2,
+        "fastest_time": 80,
+    }
+
+
+def test_rejudge_that_loses_the_record_recomputes_fastest_time(db):
+    problem, (first, second, _) = _setup(db)
+    _judge(db, problem, first, "accepted", 120)
+    fastest = _judge(db, problem, second, "accepted", 80)
+
+    fastest.status = "wrong_answer"
+    fastest.execution_time = None
+    db.flush()
+    problem_stats.record_verdict(db, problem.id, second.id)
+    db.commit()
+
+    totals = _totals(db, problem)
+    assert totals["fastest_time"] == 120
+    assert totals["solved_users"] == 1
+    rebuilt = problem_stats.rebuild(db, problem.id)
+    assert {name: getattr(rebuilt, name) for name in TOTALS} == totals
+
+
+def test_unjudged_verdict_leaves_totals_untouched(db):
+    problem, (first, _, _) = _setup(db)
+    _judge(db, problem, first, "internal_error")
+
+    assert db.get(ProblemStats, problem.id) is None
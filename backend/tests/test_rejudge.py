@@ -0,0 +1,38 @@
+from app.models.problem import Problem, Submission, SubmissionJob
+from app.models.user import User
+from app.services.execution import JudgeEngine
+from app.services.rejudge import rejudge_service
+from app.services.verdict_cache import verdict_cache
+
+
+def _judged_submission(db):
+    problem = Problem(title="Rejudge", description="", problem_ref_id="rejudge")
+    user = User(email="student@example.com", username="student")
+    db.add_all([problem, user])
+    db.commit()
+    submission = Submission(
+        problem_id=problem.id,
+        user_id=user.id,
+        code="print(1)\n",
+        language="python",
+        status="wrong_answer",
+        score=0,
+    )
+    db.add(submission)
+    db.commit()
+    return problem, submission
+
+
+def test_rejudge_does_not_reuse_verdicts_cached_before_the_batch(db):
+    problem, submission = _judged_submission(db)
+    payload = JudgeEngine._build_payload(db, submission)
+    verdict_cache.store(
+        db, payload, {"status": "wrong_answer", "score": 0, "test_results": []}
+    )
+    db.commit()
+    assert verdict_cache.lookup(db, problem, "python", submission.code) is not None
+
+    batch = rejudge_service.start(db, problem.id, None)
+
+    assert db.query(SubmissionJob).filter_by(batch_id=batch.id).count() == 1
+    assert JudgeEngine()._settle_from_cache(db, payload) is False
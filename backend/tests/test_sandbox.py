@@ -0,0 +1,71 @@
+import os
+import sys
+
+import pytest
+
+from app.services.execution import BACKEND_ROOT, judge_submission, sandbox_isolation
+from app.services.sandbox import check_isolation, run_process
+
+# Any file of the application will do; .env is not in every checkout
+APP_FILE = os.path.join(BACKEND_ROOT, "app", "core", "config.py")
+
+READ_APP_FILE = f"""
+try:
+    open({APP_FILE!r}).read()
+    print("read")
+except OSError:
+    print("denied")
+"""
+
+pytestmark = pytest.mark.skipif(
+    check_isolation(sandbox_isolation()) is not None,
+    reason="isolating submissions needs a root judge",
+)
+
+
+def _payload(code, expected):
+    return {
+        "language": "python",
+        "code": code,
+        "time_limit": 5000,
+        "memory_limit": 256,
+        "tests": [
+            {
+                "id": "t1",
+                "weight": 1,
+                "is_sample": True,
+                "input": "",
+                "expected": expected,
+            }
+        ],
+    }
+
+
+def test_submission_cannot_read_the_app_directory():
+    result = judge_submission(_payload(READ_APP_FILE, "denied\n"))
+
+    assert result["status"] == "accepted", result["test_results"]
+
+
+def test_submission_runs_in_an_empty_directory():
+    result = judge_submission(_payload("import os\nprint(os.listdir('.'))\n", "[]\n"))
+
+    assert result["status"] == "accepted", result["test_results"]
+
+
+def test_cold_spawn_cannot_read_the_app_directory(tmp_path):
+    (tmp_path / "main.py").write_text(READ_APP_FILE)
+
+    run = run_process(
+        [sys.executable, "-I", "main.py"],
+        str(tmp_path),
+        None,
+        5000,
+        None,
+        64 * 1024,
+        isolation={"hide": [BACKEND_ROOT]},
+    )
+
+    assert run["exit_code"] == 0, run["stderr"]
+    with open(run["stdout_path"]) as f:
+        assert f.read() == "denied\n"
@@ -0,0 +1,59 @@
+import io
+import json
+
+from app.api.routes.problem import create_test_case
+from app.models.problem import Problem
+from app.models.user import User
+from app.schemas.problem import TestCaseCreate
+from app.services.execution import JudgeEngine
+from app.services.test_case_transfer import test_case_transfer
+
+
+def _teacher_and_problem(db):
+    teacher = User(email="teacher@example.com", username="teacher", is_teacher=True)
+    problem = Problem(title="Order", description="", problem_ref_id="order")
+    db.add_all([teacher, problem])
+    db.commit()
+    return teacher, problem
+
+
+def test_single_creates_are_judged_in_authoring_order(db):
+    teacher, problem = _teacher_and_problem(db)
+    # Fast enough to land in the same second, where uuid ids would decide
+    for index in range(10):
+        create_test_case(
+            TestCaseCreate(
+                problem_id=problem.id,
+                input_data=f"{index}\n",
+                expected_output=f"{index}\n",
+                is_sample=index == 0,
+            ),
+            db=db,
+            current_user=teacher,
+        )
+
+    tests = JudgeEngine._load_tests(db, problem.id)
+
+    assert [test["input"] for test in tests] == [f"{index}\n" for index in range(10)]
+    assert tests[0]["is_sample"]
+
+
+def test_import_appends_after_existing_cases(db):
+    teacher, problem = _teacher_and_problem(db)
+    create_test_case(
+        TestCaseCreate(problem_id=problem.id, input_data="a\n", expected_output="a\n"),
+        db=db,
+        current_user=teacher,
+    )
+    upload = "".join(
+        json.dumps({"input_data": f"{name}\n", "expected_output": f"{name}\n"}) + "\n"
+        for name in ("b", "c", "d")
+    )
+    test_case_transfer.import_cases(
+        db, problem.id, io.BytesIO(upload.encode("utf-8")), "ndjson"
+    )
+    db.commit()
+
+    tests = JudgeEngine._load_tests(db, problem.id)
+
+    assert [test["input"] for test in tests] == ["a\n", "b\n", "c\n", "d\n"]
@@ -0,0 +1,27 @@
+import io
+import os
+import stat
+
+from app.services.test_data_store import TestDataStore as DataStore
+
+
+def _mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_store_is_private_to_its_owner(tmp_path):
+    root = tmp_path / "store"
+    root.mkdir(mode=0o755)
+    store = DataStore(root=str(root), min_bytes=1)
+
+    digests = [
+        store.put_bytes(b"expected output\n"),
+        store.put_stream(io.BytesIO(b"large input\n")),
+    ]
+
+    assert _mode(root) == 0o700
+    for digest in digests:
+        path = store.path(digest)
+        assert _mode(path) == 0o400
+        assert _mode(os.path.dirname(path)) == 0o700
+        assert _mode(os.path.dirname(os.path.dirname(path))) == 0o700
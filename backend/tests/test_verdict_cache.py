@@ -0,0 +1,20 @@
+from app.services.verdict_cache import verdict_cache
+
+
+def test_whitespace_inside_a_string_changes_the_hash():
+    padded = 'print("""a  \nb""")\n'
+    stripped = 'print("""a\nb""")\n'
+
+    assert verdict_cache.code_hash(padded) != verdict_cache.code_hash(stripped)
+
+
+def test_line_numbers_change_the_hash():
+    assert verdict_cache.code_hash("\n\nraise ValueError\n") != verdict_cache.code_hash(
+        "raise ValueError\n"
+    )
+
+
+def test_line_endings_do_not_change_the_hash():
+    assert verdict_cache.code_hash("x = 1\r\nprint(x)\r\n") == verdict_cache.code_hash(
+        "x = 1\nprint(x)\n"
+    )
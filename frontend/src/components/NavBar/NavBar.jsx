@@ -146,7 +146,7 @@ function NavBar({ darkMode, toggleDarkMode }) {
           >
             {user?.profile_picture ? (
               <img
-                src={user.profile_picture}
+                src={user.profile_thumbnail || user.profile_picture}
                 alt="Profile"
                 style={{
                   width: 32,
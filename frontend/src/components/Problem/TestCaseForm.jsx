@@ -37,7 +37,12 @@ const TestCaseForm = ({
 
   const handleSubmit = (e) => {
     e.preventDefault();
-    onSave(formData);
+    // Large data kept in the test data store is not sent back to the form;
+    // leaving its field empty keeps the stored data
+    const data = { ...formData };
+    if (testCase?.input_hash && !data.input_data) delete data.input_data;
+    if (testCase?.expected_output_hash && !data.expected_output) delete data.expected_output;
+    onSave(data);
   };
 
   return (
@@ -59,7 +64,7 @@ const TestCaseForm = ({
             rows={3}
             fullWidth
             margin="normal"
-            placeholder="Enter test case input data"
+            placeholder={testCase?.input_hash ? "Stored as a file (too large to show)" : "Enter test case input data"}
             helperText="Enter input exactly as it would be provided to the program"
           />
           
@@ -72,7 +77,7 @@ const TestCaseForm = ({
             rows={3}
             fullWidth
             margin="normal"
-            placeholder="Enter expected output"
+            placeholder={testCase?.expected_output_hash ? "Stored as a file (too large to show)" : "Enter expected output"}
             helperText="Enter output exactly as it should be returned by the program"
           />
           
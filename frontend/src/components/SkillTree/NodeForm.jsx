@@ -67,8 +67,8 @@ const NodeForm = ({
       const fetchProblems = async () => {
         setProblemsLoading(true);
         try {
-          const problemsData = await problemAPI.getAllProblems();
-          setProblems(problemsData);
+          const problemsData = await problemAPI.listProblems({ limit: 200 });
+          setProblems(problemsData.items);
         } catch (err) {
           console.error("Error loading problems:", err);
         } finally {
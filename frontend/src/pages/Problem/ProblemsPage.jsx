@@ -14,7 +14,6 @@ import {
   TextField,
   InputAdornment,
   CircularProgress,
-  Divider,
   Alert
 } from "@mui/material";
 import {
@@ -34,6 +33,7 @@ const difficultyColors = {
 
 const ProblemsPage = () => {
   const [problems, setProblems] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [searchQuery, setSearchQuery] = useState("");
@@ -66,11 +66,13 @@ const ProblemsPage = () => {
     }
   }, [location.search]);
 
-  const fetchProblems = async () => {
+  // Loads the first page, or the next one after `cursor`
+  const fetchProblems = async (cursor = null) => {
     setLoading(true);
     try {
-      const data = await problemAPI.getAllProblems();
-      setProblems(data);
+      const page = await problemAPI.listProblems(cursor ? { cursor } : {});
+      setProblems(cursor ? [...problems, ...page.items] : page.items);
+      setNextCursor(page.next_cursor);
       setError(null);
     } catch (err) {
       setError("Failed to load problems. Please try again.");
@@ -85,9 +87,15 @@ const ProblemsPage = () => {
     setFormOpen(true);
   };
 
-  const handleOpenEdit = (problem) => {
-    setEditData(problem);
-    setFormOpen(true);
+  const handleOpenEdit = async (problem) => {
+    // The list only has summaries; the form needs the full problem
+    try {
+      setEditData(await problemAPI.getProblem(problem.id));
+      setFormOpen(true);
+    } catch (err) {
+      setError("Failed to load problem");
+      console.error("Error loading problem:", err);
+    }
   };
 
   const handleCloseForm = () => {
@@ -237,22 +245,6 @@ const ProblemsPage = () => {
                         ID: {problem.problem_ref_id}
                       </Typography>
                     )}
-
-                    <Divider sx={{ my: 1 }} />
-
-                    <Typography
-                      variant="body2"
-                      color="text.secondary"
-                      sx={{
-                        overflow: "hidden",
-                        textOverflow: "ellipsis",
-                        display: "-webkit-box",
-                        WebkitLineClamp: 3,
-                        WebkitBoxOrient: "vertical",
-                      }}
-                    >
-                      {problem.description}
-                    </Typography>
                   </CardContent>
                   <CardActions>
                     <Button
@@ -276,6 +268,18 @@ const ProblemsPage = () => {
             ))}
           </Grid>
         )}
+
+        {nextCursor && (
+          <Box sx={{ display: "flex", justifyContent: "center", mt: 3 }}>
+            <Button
+              variant="outlined"
+              disabled={loading}
+              onClick={() => fetchProblems(nextCursor)}
+            >
+              Load more
+            </Button>
+          </Box>
+        )}
       </Box>
 
       <ProblemForm
@@ -9,11 +9,28 @@ export const problemAPI = {
     return response.data;
   },
 
+  // Compact problem list for browsing: one page of { id, problem_ref_id,
+  // title, difficulty, created_at } as { items, next_cursor }. params may
+  // set cursor (a previous next_cursor), limit and difficulty.
+  listProblems: async (params = {}) => {
+    const response = await api.get(`${BASE_URL}/summaries`, { params });
+    return response.data;
+  },
+
   getProblem: async (id) => {
     const response = await api.get(`${BASE_URL}/${id}`);
     return response.data;
   },
 
+  // Resolve problem reference IDs (e.g. "PP1" in skill tree steps) in one
+  // request; unknown IDs are left out of the result.
+  getProblemsByRef: async (refIds) => {
+    const params = new URLSearchParams();
+    refIds.forEach((ref) => params.append('ref', ref));
+    const response = await api.get(`${BASE_URL}/by-ref`, { params });
+    return response.data;
+  },
+
   createProblem: async (problemData) => {
     const response = await api.post(BASE_URL, problemData);
     return response.data;
@@ -40,6 +57,30 @@ export const problemAPI = {
     return response.data;
   },
 
+  updateTestCase: async (testCaseId, testCaseData) => {
+    const response = await api.put(`${BASE_URL}/test-cases/${testCaseId}`, testCaseData);
+    return response.data;
+  },
+
+  // Bulk import from an NDJSON or zip file (options: { format, replace })
+  importTestCases: async (problemId, file, options = {}) => {
+    const formData = new FormData();
+    formData.append('file', file);
+    const response = await api.post(`${BASE_URL}/${problemId}/test-cases/import`, formData, {
+      params: options,
+      headers: { 'Content-Type': 'multipart/form-data' },
+    });
+    return response.data;
+  },
+
+  exportTestCases: async (problemId, format = 'ndjson') => {
+    const response = await api.get(`${BASE_URL}/${problemId}/test-cases/export`, {
+      params: { format },
+      responseType: 'blob',
+    });
+    return response.data;
+  },
+
   deleteTestCase: async (testCaseId) => {
     const response = await api.delete(`${BASE_URL}/test-cases/${testCaseId}`);
     return response.data;
@@ -56,8 +97,72 @@ export const problemAPI = {
     return response.data;
   },
 
-  getProblemSubmissions: async (problemId) => {
-    const response = await api.get(`${BASE_URL}/${problemId}/submissions`);
+  // Returns one page: { items, next_cursor }. Pass next_cursor back as
+  // params.cursor for the next page; params may also set limit, user_id,
+  // status and view ('summary' or 'full').
+  getProblemSubmissions: async (problemId, params = {}) => {
+    const response = await api.get(`${BASE_URL}/${problemId}/submissions`, { params });
     return response.data;
+  },
+
+  // Statistics endpoints. getProblemsStats takes a list of problem ids
+  // (e.g. the visible page of the problem list).
+  getProblemsStats: async (problemIds) => {
+    const params = new URLSearchParams();
+    problemIds.forEach((id) => params.append('problem_id', id));
+    const response = await api.get(`${BASE_URL}/stats`, { params });
+    return response.data;
+  },
+
+  getProblemStats: async (problemId) => {
+    const response = await api.get(`${BASE_URL}/${problemId}/stats`);
+    return response.data;
+  },
+
+  getLeaderboard: async (problemId, limit = 50) => {
+    const response = await api.get(`${BASE_URL}/${problemId}/leaderboard`, { params: { limit } });
+    return response.data;
+  },
+
+  // Re-judge endpoints (teachers/admin). filters: { statuses, user_id }
+  rejudgeSubmissions: async (problemId, filters = {}) => {
+    const response = await api.post(`${BASE_URL}/${problemId}/rejudge`, filters);
+    return response.data;
+  },
+
+  getRejudge: async (batchId) => {
+    const response = await api.get(`${BASE_URL}/rejudges/${batchId}`);
+    return response.data;
+  },
+
+  cancelRejudge: async (batchId) => {
+    const response = await api.post(`${BASE_URL}/rejudges/${batchId}/cancel`);
+    return response.data;
+  },
+
+  // Stream status changes of a submission instead of polling getSubmission.
+  // onEvent receives { submission_id, status, ... }; test results arrive with
+  // the final verdict, after which the stream closes. Returns a close function.
+  watchSubmission: (submissionId, onEvent, onError) => {
+    const params = new URLSearchParams({
+      submission_id: submissionId,
+      access_token: localStorage.getItem('access_token') || '',
+    });
+    const source = new EventSource(
+      `${api.defaults.baseURL}${BASE_URL}/submissions/events?${params}`
+    );
+
+    source.addEventListener('submission', (message) => {
+      const event = JSON.parse(message.data);
+      onEvent(event);
+      if (!['pending', 'running'].includes(event.status)) {
+        source.close();
+      }
+    });
+    source.onerror = (error) => {
+      if (onError) onError(error);
+    };
+
+    return () => source.close();
   }
 };
\ No newline at end of file